@@ -1,5 +1,6 @@
 from sqlalchemy import Column, Integer, Float, String, DateTime, Boolean, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import text
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from app.database import Base
@@ -46,4 +47,11 @@ class Expense(Base):
     __table_args__ = (
         UniqueConstraint("business_id", "ref_no", name="uq_expense_business_ref"),
         Index("idx_expense_business_date", "business_id", "expense_date"),
+        Index("idx_expense_business_active_date", "business_id", "is_active", "expense_date"),
+        Index(
+            "idx_expense_active_business_date",
+            "business_id",
+            "expense_date",
+            postgresql_where=text("is_active"),
+        ),
     )
@@ -12,6 +12,7 @@ from app.users import schemas as user_schemas
 
 from app.users.permissions import role_required
 from app.users.schemas import UserDisplaySchema
+from app.core.exports import EXPORT_FORMATS, EXPORT_FORMAT_PATTERN
 
 
 
@@ -63,6 +64,11 @@ def list_expenses(
         None,
         description="Filter by specific business (super admin only)"
     ),
+    format: str = Query(
+        "json",
+        pattern=EXPORT_FORMAT_PATTERN,
+        description="json (paginated) or csv / xlsx download of every matching expense"
+    ),
     db: Session = Depends(get_db),
     current_user: UserDisplaySchema = Depends(
         role_required(["user", "manager", "admin", "super_admin"])
@@ -75,6 +81,16 @@ def list_expenses(
     - Super admin → all expenses or filtered by ?business_id=
     - Returns enriched list + total expenses summary
     """
+    if format in EXPORT_FORMATS:
+        return service.export_expenses(
+            current_user=current_user,
+            fmt=format,
+            start_date=start_date,
+            end_date=end_date,
+            account_type=account_type,
+            business_id=business_id
+        )
+
     return service.list_expenses(
         db=db,
         current_user=current_user,
@@ -58,10 +58,20 @@ class ExpenseOut(ExpenseBase):
         from_attributes = True
 
 
+class ExpenseAccountTotal(BaseModel):
+    account_type: str
+    count: int
+    total: float
+
+
 # ─── NEW: Proper response model for list ────────────────────────────────
 class ExpenseListResponse(BaseModel):
     total_expenses: float = Field(..., description="Sum of amounts in filtered results")
     count: int = Field(..., description="Number of expenses returned (after pagination)")
+    total_count: int = Field(0, description="Number of expenses matching the filters")
+    by_account_type: List[ExpenseAccountTotal] = Field(
+        default_factory=list, description="Subtotals per account type over the filtered results"
+    )
     expenses: List[ExpenseOut]
 
     class Config:
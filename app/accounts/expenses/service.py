@@ -19,6 +19,8 @@ from app.users.permissions import role_required
 from app.users.schemas import UserDisplaySchema
 from app.vendor import models as vendor_models
 from app.bank import models as bank_models
+from app.users import models as user_models
+from app.core.exports import EXPORT_FETCH_SIZE, export_response
 
 
 from zoneinfo import ZoneInfo
@@ -34,7 +36,7 @@ from sqlalchemy import func, desc, cast, Date
 
 
 from sqlalchemy.orm import joinedload
-from sqlalchemy import func, desc, cast, Date
+from sqlalchemy import func, desc, cast, Date, select
 from typing import Optional, Dict, Any
 
 
@@ -273,77 +275,103 @@ def create_expense(
 
 
 
-def list_expenses(
-    db: Session,
+def _expense_list_filters(
     current_user: UserDisplaySchema,
-    skip: int = 0,
-    limit: int = 100,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     account_type: Optional[str] = None,
     business_id: Optional[int] = None
-) -> Dict[str, Any]:
-
-    # ─── 1. Base query ───────────────────────────────────────────────
-    query = (
-        db.query(models.Expense)
-        .options(
-            joinedload(models.Expense.vendor),
-            joinedload(models.Expense.bank),
-            joinedload(models.Expense.creator)
-        )
-        .filter(models.Expense.is_active == True)
-    )
+) -> list:
+    """Active expenses, tenant isolation, dates, account type (list + export)."""
+    filters = [models.Expense.is_active == True]
 
-    # ─── 2. Tenant isolation ─────────────────────────────────────────
-    roles = set(current_user.roles)
-
-    if "super_admin" in roles:
+    # ─── Tenant isolation ────────────────────────────────────────────
+    if "super_admin" in current_user.roles:
         if business_id:
-            query = query.filter(models.Expense.business_id == business_id)
+            filters.append(models.Expense.business_id == business_id)
     else:
         if not current_user.business_id:
             raise HTTPException(
                 status_code=403,
                 detail="User does not belong to a business"
             )
-        query = query.filter(models.Expense.business_id == current_user.business_id)
+        filters.append(models.Expense.business_id == current_user.business_id)
 
-    # ─── 3. Date filters ─────────────────────────────────────────────
+    # ─── Date filters (half-open, raw column → index usable) ─────────
     if start_date:
-        query = query.filter(cast(models.Expense.expense_date, Date) >= start_date)
+        filters.append(models.Expense.expense_date >= datetime.combine(start_date, time.min))
 
     if end_date:
-        query = query.filter(cast(models.Expense.expense_date, Date) <= end_date)
+        filters.append(
+            models.Expense.expense_date < datetime.combine(end_date + timedelta(days=1), time.min)
+        )
 
-    # ─── 4. Account type filter ──────────────────────────────────────
+    # ─── Account type filter ─────────────────────────────────────────
     if account_type:
-        query = query.filter(
+        filters.append(
             func.lower(func.trim(models.Expense.account_type)) ==
             account_type.lower().strip()
         )
 
-    # ─── 5. Total expenses ───────────────────────────────────────────
-    total_query = db.query(func.coalesce(func.sum(models.Expense.amount), 0.0)) \
-        .filter(models.Expense.is_active == True)
-
-    if start_date:
-        total_query = total_query.filter(cast(models.Expense.expense_date, Date) >= start_date)
+    return filters
 
-    if end_date:
-        total_query = total_query.filter(cast(models.Expense.expense_date, Date) <= end_date)
 
-    if "super_admin" in roles and business_id:
-        total_query = total_query.filter(models.Expense.business_id == business_id)
+def list_expenses(
+    db: Session,
+    current_user: UserDisplaySchema,
+    skip: int = 0,
+    limit: int = 100,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    account_type: Optional[str] = None,
+    business_id: Optional[int] = None
+) -> Dict[str, Any]:
 
-    elif "super_admin" not in roles:
-        total_query = total_query.filter(models.Expense.business_id == current_user.business_id)
+    # ─── 1-4. Tenant isolation, dates, account type → one filtered CTE ─
+    filtered = (
+        select(
+            models.Expense.id,
+            models.Expense.amount,
+            func.lower(func.trim(models.Expense.account_type)).label("account_key"),
+            func.trim(models.Expense.account_type).label("account_type"),
+        )
+        .where(*_expense_list_filters(current_user, start_date, end_date, account_type, business_id))
+        .cte("filtered_expenses")
+    )
 
-    total_expenses = total_query.scalar() or 0.0
+    # ─── 5. Count, total and per-account-type subtotals (one pass) ───
+    # ROLLUP's grand-total row has account_key NULL
+    totals = db.execute(
+        select(
+            filtered.c.account_key,
+            func.min(filtered.c.account_type).label("account_type"),
+            func.count().label("count"),
+            func.coalesce(func.sum(filtered.c.amount), 0.0).label("total"),
+            func.grouping(filtered.c.account_key).label("is_total"),
+        )
+        .group_by(func.rollup(filtered.c.account_key))
+        .order_by(func.grouping(filtered.c.account_key), desc("total"))
+    ).all()
+
+    grand_total = next((row for row in totals if row.is_total), None)
+    by_account_type = [
+        schemas.ExpenseAccountTotal(
+            account_type=row.account_type,
+            count=row.count,
+            total=float(row.total),
+        )
+        for row in totals if not row.is_total
+    ]
 
-    # ─── 6. Fetch results ───────────────────────────────────────────
+    # ─── 6. Page of the same filtered rows ───────────────────────────
     expenses = (
-        query
+        db.query(models.Expense)
+        .join(filtered, filtered.c.id == models.Expense.id)
+        .options(
+            joinedload(models.Expense.vendor),
+            joinedload(models.Expense.bank),
+            joinedload(models.Expense.creator)
+        )
         .order_by(desc(models.Expense.expense_date), desc(models.Expense.created_at))
         .offset(skip)
         .limit(limit)
@@ -381,12 +409,58 @@ def list_expenses(
 
     # ─── 8. Response ────────────────────────────────────────────────
     return {
-        "total_expenses": float(total_expenses),
+        "total_expenses": float(grand_total.total) if grand_total else 0.0,
         "count": len(enriched_expenses),
+        "total_count": grand_total.count if grand_total else 0,
+        "by_account_type": by_account_type,
         "expenses": enriched_expenses
     }
 
 
+EXPENSE_EXPORT_HEADERS = [
+    "ID", "Ref No", "Expense Date", "Account Type", "Description", "Vendor",
+    "Amount", "Payment Method", "Bank", "Status", "Created By", "Created At",
+]
+
+
+def export_expenses(
+    current_user: UserDisplaySchema,
+    fmt: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    account_type: Optional[str] = None,
+    business_id: Optional[int] = None
+):
+    """Every expense matching the list_expenses filters, streamed as csv / xlsx."""
+    filters = _expense_list_filters(current_user, start_date, end_date, account_type, business_id)
+
+    def build_rows(db: Session):
+        return (
+            db.query(
+                models.Expense.id,
+                models.Expense.ref_no,
+                models.Expense.expense_date,
+                models.Expense.account_type,
+                models.Expense.description,
+                vendor_models.Vendor.business_name,
+                models.Expense.amount,
+                models.Expense.payment_method,
+                bank_models.Bank.name,
+                models.Expense.status,
+                user_models.User.username,
+                models.Expense.created_at,
+            )
+            .outerjoin(vendor_models.Vendor, vendor_models.Vendor.id == models.Expense.vendor_id)
+            .outerjoin(bank_models.Bank, bank_models.Bank.id == models.Expense.bank_id)
+            .outerjoin(user_models.User, user_models.User.id == models.Expense.created_by)
+            .filter(*filters)
+            .order_by(desc(models.Expense.expense_date), desc(models.Expense.created_at))
+            .yield_per(EXPORT_FETCH_SIZE)
+        )
+
+    return export_response(fmt, "expenses", EXPENSE_EXPORT_HEADERS, build_rows)
+
+
 
 
 def get_expense_by_id(
@@ -8,7 +8,7 @@ from . import service
 
 
 # app/reports/router.py
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from sqlalchemy.orm import Session
 from datetime import date, datetime
 from typing import Optional
@@ -16,13 +16,15 @@ from typing import Optional
 from app.accounts.profit_loss import service
 from app.users.schemas import UserDisplaySchema
 from app.users.permissions import role_required
-from app.accounts.profit_loss.schemas import ProfitLossResponse
+from app.accounts.profit_loss.schemas import ProfitLossResponse, ProfitLossSeriesResponse
+from app.core.report_cache import cached_report
 
 router = APIRouter()
 
 
 @router.get("/profit-loss", response_model=ProfitLossResponse)
 def get_profit_loss(
+    request: Request,
     start_date: Optional[date] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="End date (YYYY-MM-DD) – inclusive"),
     business_id: Optional[int] = Query(
@@ -34,15 +36,59 @@ def get_profit_loss(
         role_required(["manager", "admin", "super_admin"])
     )
 ):
-   
-    return service.get_profit_and_loss(
-        db=db,
-        current_user=current_user,
-        start_date=start_date,
-        end_date=end_date,
-        business_id=business_id
+    # Cached until a write lands in the period (see app/core/report_cache.py)
+    return cached_report(
+        request,
+        current_user,
+        report="profit_loss",
+        params={"start_date": start_date, "end_date": end_date},
+        business_id=business_id,
+        period_end=end_date,
+        compute=lambda: service.get_profit_and_loss(
+            db=db,
+            current_user=current_user,
+            start_date=start_date,
+            end_date=end_date,
+            business_id=business_id
+        ),
     )
 
 
 
 
+
+
+@router.get("/series", response_model=ProfitLossSeriesResponse)
+def get_profit_loss_series(
+    request: Request,
+    granularity: str = Query("month", description="day | week | month | quarter | year"),
+    periods: int = Query(12, ge=1, le=120, description="Number of periods, oldest first"),
+    end_date: Optional[date] = Query(None, description="Last period contains this date (default: today)"),
+    business_id: Optional[int] = Query(
+        None,
+        description="Filter by specific business (super admin only)"
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserDisplaySchema = Depends(
+        role_required(["manager", "admin", "super_admin"])
+    )
+):
+    """
+    Trend chart data: one P&L per period, computed in four grouped queries.
+    """
+    return cached_report(
+        request,
+        current_user,
+        report="profit_loss_series",
+        params={"granularity": granularity, "periods": periods, "end_date": end_date},
+        business_id=business_id,
+        period_end=end_date,
+        compute=lambda: service.get_profit_and_loss_series(
+            db=db,
+            current_user=current_user,
+            granularity=granularity,
+            periods=periods,
+            end_date=end_date,
+            business_id=business_id
+        ),
+    )
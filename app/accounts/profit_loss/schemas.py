@@ -1,7 +1,7 @@
 # app/reports/schemas.py
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List
 
 
 class ProfitLossPeriod(BaseModel):
@@ -21,4 +21,8 @@ class ProfitLossResponse(BaseModel):
     net_profit: float
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ProfitLossSeriesResponse(BaseModel):
+    granularity: str                   # day | week | month | quarter | year
+    periods: List[ProfitLossResponse]  # oldest first
@@ -17,6 +17,28 @@ from zoneinfo import ZoneInfo
 LAGOS_TZ = ZoneInfo("Africa/Lagos")
 
 
+def _tenant_filters(current_user: UserDisplaySchema, business_id: Optional[int]):
+    """(sale_filter, expense_filter, adjustment_filter) for the caller's tenant."""
+    sale_filter = []
+    expense_filter = []
+    adjustment_filter = []
+
+    if "super_admin" in current_user.roles:
+        if business_id is not None:
+            sale_filter.append(sales_models.Sale.business_id == business_id)
+            expense_filter.append(expense_models.Expense.business_id == business_id)
+            adjustment_filter.append(adjustments_models.StockAdjustment.business_id == business_id)
+    else:
+        if not current_user.business_id:
+            raise HTTPException(403, "Current user does not belong to any business")
+
+        sale_filter.append(sales_models.Sale.business_id == current_user.business_id)
+        expense_filter.append(expense_models.Expense.business_id == current_user.business_id)
+        adjustment_filter.append(adjustments_models.StockAdjustment.business_id == current_user.business_id)
+
+    return sale_filter, expense_filter, adjustment_filter
+
+
 
 def get_profit_and_loss(
     db: Session,
@@ -36,23 +58,14 @@ def get_profit_and_loss(
     start_dt = datetime.combine(start_date, time.min, tzinfo=LAGOS_TZ)
     end_dt   = datetime.combine(end_date, time.max, tzinfo=LAGOS_TZ)
 
-    sale_filter = []
-    expense_filter = []
-    adjustment_filter = []
+    # Same bounds on sale_items so partition pruning applies to both tables
+    sale_item_period = [
+        sales_models.SaleItem.sold_at >= start_dt,
+        sales_models.SaleItem.sold_at <= end_dt,
+    ]
 
     # ───────────────── Tenant Filtering ─────────────────
-    if "super_admin" in current_user.roles:
-        if business_id is not None:
-            sale_filter.append(sales_models.Sale.business_id == business_id)
-            expense_filter.append(expense_models.Expense.business_id == business_id)
-            adjustment_filter.append(adjustments_models.StockAdjustment.business_id == business_id)
-    else:
-        if not current_user.business_id:
-            raise HTTPException(403, "Current user does not belong to any business")
-
-        sale_filter.append(sales_models.Sale.business_id == current_user.business_id)
-        expense_filter.append(expense_models.Expense.business_id == current_user.business_id)
-        adjustment_filter.append(adjustments_models.StockAdjustment.business_id == current_user.business_id)
+    sale_filter, expense_filter, adjustment_filter = _tenant_filters(current_user, business_id)
 
     # ───────────────── Revenue ─────────────────
     revenue_query = (
@@ -68,6 +81,7 @@ def get_profit_and_loss(
         .filter(
             sales_models.Sale.sold_at >= start_dt,
             sales_models.Sale.sold_at <= end_dt,
+            *sale_item_period,
             *sale_filter
         )
         .group_by(category_models.Category.name)
@@ -88,6 +102,7 @@ def get_profit_and_loss(
         .filter(
             sales_models.Sale.sold_at >= start_dt,
             sales_models.Sale.sold_at <= end_dt,
+            *sale_item_period,
             *sale_filter
         )
         .scalar()
@@ -162,3 +177,196 @@ def get_profit_and_loss(
         # 🔥 OPTIONAL: show separately for transparency
         stock_adjustment_loss=stock_adjustment_loss
     )
+
+
+
+
+# ───────────────── Multi-period series ─────────────────
+from datetime import timedelta
+from sqlalchemy import literal_column
+
+from app.accounts.profit_loss.schemas import ProfitLossSeriesResponse
+
+SERIES_GRANULARITIES = {"day": 0, "week": 0, "month": 1, "quarter": 3, "year": 12}
+
+
+def _period_start(d: date, granularity: str) -> date:
+    """Python twin of Postgres date_trunc (weeks start on Monday)."""
+    if granularity == "day":
+        return d
+    if granularity == "week":
+        return d - timedelta(days=d.weekday())
+    if granularity == "month":
+        return d.replace(day=1)
+    if granularity == "quarter":
+        return date(d.year, 3 * ((d.month - 1) // 3) + 1, 1)
+    return date(d.year, 1, 1)
+
+
+def _shift_period(d: date, granularity: str, n: int) -> date:
+    if granularity == "day":
+        return d + timedelta(days=n)
+    if granularity == "week":
+        return d + timedelta(weeks=n)
+    years, month_index = divmod(d.month - 1 + n * SERIES_GRANULARITIES[granularity], 12)
+    return date(d.year + years, month_index + 1, 1)
+
+
+def _bucket(granularity: str, column, local: bool = True):
+    """date_trunc in Lagos time; literals inlined so SELECT and GROUP BY match."""
+    value = func.timezone(literal_column("'Africa/Lagos'"), column) if local else column
+    return func.date_trunc(literal_column(f"'{granularity}'"), value)
+
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def get_profit_and_loss_series(
+    db: Session,
+    current_user: UserDisplaySchema,
+    granularity: str = "month",
+    periods: int = 12,
+    end_date: Optional[date] = None,
+    business_id: Optional[int] = None
+) -> ProfitLossSeriesResponse:
+    """
+    P&L for the last `periods` periods ending with the one containing
+    `end_date`, in four grouped queries regardless of how many periods.
+    """
+    if granularity not in SERIES_GRANULARITIES:
+        raise HTTPException(400, f"granularity must be one of {list(SERIES_GRANULARITIES)}")
+
+    end_date = end_date or datetime.now(LAGOS_TZ).date()
+    last_start = _period_start(end_date, granularity)
+    starts = [_shift_period(last_start, granularity, -n) for n in range(periods - 1, -1, -1)]
+
+    start_dt = datetime.combine(starts[0], time.min, tzinfo=LAGOS_TZ)
+    end_dt = datetime.combine(end_date, time.max, tzinfo=LAGOS_TZ)
+
+    sale_filter, expense_filter, adjustment_filter = _tenant_filters(current_user, business_id)
+
+    sale_period = [
+        sales_models.Sale.sold_at >= start_dt,
+        sales_models.Sale.sold_at <= end_dt,
+        sales_models.SaleItem.sold_at >= start_dt,
+        sales_models.SaleItem.sold_at <= end_dt,
+    ]
+
+    # ───────────────── 1. Revenue by period + category ─────────────────
+    sale_bucket = _bucket(granularity, sales_models.Sale.sold_at)
+    revenue_rows = (
+        db.query(
+            sale_bucket.label("period"),
+            category_models.Category.name.label("category"),
+            func.sum(
+                sales_models.SaleItem.quantity * sales_models.SaleItem.selling_price
+            ).label("revenue")
+        )
+        .join(sales_models.Sale, sales_models.Sale.invoice_no == sales_models.SaleItem.sale_invoice_no)
+        .join(product_models.Product, product_models.Product.id == sales_models.SaleItem.product_id)
+        .join(category_models.Category, category_models.Category.id == product_models.Product.category_id)
+        .filter(*sale_period, *sale_filter)
+        .group_by(sale_bucket, category_models.Category.name)
+        .all()
+    )
+
+    # ───────────────── 2. Cost of sales by period ─────────────────
+    cos_rows = (
+        db.query(
+            sale_bucket.label("period"),
+            func.sum(
+                sales_models.SaleItem.quantity * sales_models.SaleItem.cost_price
+            ).label("cos")
+        )
+        .join(sales_models.Sale, sales_models.Sale.invoice_no == sales_models.SaleItem.sale_invoice_no)
+        .filter(*sale_period, *sale_filter)
+        .group_by(sale_bucket)
+        .all()
+    )
+
+    # ───────────────── 3. Stock adjustment loss by period ─────────────────
+    adjustment_bucket = _bucket(granularity, adjustments_models.StockAdjustment.adjusted_at)
+    adjustment_rows = (
+        db.query(
+            adjustment_bucket.label("period"),
+            func.sum(
+                func.abs(adjustments_models.StockAdjustment.quantity) *
+                product_models.Product.cost_price
+            ).label("adjustment_loss")
+        )
+        .select_from(adjustments_models.StockAdjustment)
+        .join(
+            product_models.Product,
+            product_models.Product.id == adjustments_models.StockAdjustment.product_id
+        )
+        .filter(
+            adjustments_models.StockAdjustment.adjusted_at >= start_dt,
+            adjustments_models.StockAdjustment.adjusted_at <= end_dt,
+            adjustments_models.StockAdjustment.quantity < 0,
+            *adjustment_filter
+        )
+        .group_by(adjustment_bucket)
+        .all()
+    )
+
+    # ───────────────── 4. Expenses by period + account type ─────────────────
+    # expense_date is a naive local date-time: bucket it as stored
+    expense_bucket = _bucket(granularity, expense_models.Expense.expense_date, local=False)
+    expense_rows = (
+        db.query(
+            expense_bucket.label("period"),
+            expense_models.Expense.account_type.label("account_type"),
+            func.sum(expense_models.Expense.amount).label("total")
+        )
+        .filter(
+            expense_models.Expense.expense_date >= start_dt,
+            expense_models.Expense.expense_date <= end_dt,
+            expense_models.Expense.is_active == True,
+            *expense_filter
+        )
+        .group_by(expense_bucket, expense_models.Expense.account_type)
+        .all()
+    )
+
+    # ───────────────── Assemble one P&L per period ─────────────────
+    revenue = {s: {} for s in starts}
+    for row in revenue_rows:
+        revenue.setdefault(_as_date(row.period), {})[row.category] = float(row.revenue or 0)
+
+    cos = {_as_date(row.period): float(row.cos or 0) for row in cos_rows}
+    adjustment_loss = {_as_date(row.period): float(row.adjustment_loss or 0) for row in adjustment_rows}
+
+    expenses = {s: {} for s in starts}
+    for row in expense_rows:
+        expenses.setdefault(_as_date(row.period), {})[row.account_type] = float(row.total or 0)
+
+    series = []
+    for index, start in enumerate(starts):
+        period_start = datetime.combine(start, time.min, tzinfo=LAGOS_TZ)
+        if index + 1 < len(starts):
+            period_end = datetime.combine(starts[index + 1], time.min, tzinfo=LAGOS_TZ) - timedelta(microseconds=1)
+        else:
+            period_end = end_dt
+
+        total_revenue = sum(revenue[start].values())
+        cost_of_sales = cos.get(start, 0.0)
+        loss = adjustment_loss.get(start, 0.0)
+        gross_profit = total_revenue - cost_of_sales - loss
+        total_expenses = sum(expenses[start].values())
+
+        series.append(
+            ProfitLossResponse(
+                period={"start_date": period_start, "end_date": period_end},
+                revenue=revenue[start],
+                total_revenue=total_revenue,
+                cost_of_sales=cost_of_sales,
+                gross_profit=gross_profit,
+                expenses=expenses[start],
+                total_expenses=total_expenses,
+                net_profit=gross_profit - total_expenses,
+                stock_adjustment_loss=loss
+            )
+        )
+
+    return ProfitLossSeriesResponse(granularity=granularity, periods=series)
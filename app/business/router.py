@@ -11,8 +11,10 @@ from app.license import models as license_models
 
 
 from app.database import get_db
-from app.business import models, schemas
+from app.business import models, schemas, service
 from app.users.permissions import role_required
+from app.core.jobs import submit_job, find_running
+from app.jobs.schemas import JobOut
 
 
 from datetime import datetime
@@ -342,7 +344,7 @@ def update_business(
 # -------------------------------
 # DELETE BUSINESS - SUPER ADMIN ONLY
 # -------------------------------
-@router.delete("/{business_id}")
+@router.delete("/{business_id}", response_model=JobOut, status_code=202)
 def delete_business(
     business_id: int,
     db: Session = Depends(get_db),
@@ -357,7 +359,15 @@ def delete_business(
     if not business:
         raise HTTPException(status_code=404, detail="Business not found")
 
-    db.delete(business)
-    db.commit()
-
-    return {"message": f"Business {business.name} deleted successfully"}
\ No newline at end of file
+    # Set-based delete in batches; poll GET /jobs/{id}
+    running = find_running(f"delete_business:{business_id}")
+    if running:
+        return running
+
+    return submit_job(
+        f"delete_business:{business_id}",
+        service.delete_business_data,
+        business_id,
+        owner_id=current_user.id,
+        business_id=business_id,
+    )
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Set-based business deletion.
+
+Deleting a Business through the ORM walks every cascade relationship and
+loads each child row; for a large tenant that takes minutes. This deletes
+child-first with one statement per batch instead, committing as it goes
+so locks stay short and progress can be reported.
+"""
+from sqlalchemy import text
+
+from app.core.report_cache import bump_data_version
+from app.database import SessionLocal
+from app.sales.service import WIPE_BATCH_SIZE, delete_sales_batch
+
+
+# (table, subquery selecting up to :limit row ids of business :business_id)
+# Children before parents: no FK is violated at any point.
+WIPE_STEPS = [
+    ("sale_idempotency_keys", "SELECT id FROM sale_idempotency_keys WHERE business_id = :business_id LIMIT :limit"),
+    ("payments", "SELECT id FROM payments WHERE business_id = :business_id LIMIT :limit"),
+    (
+        "purchase_items",
+        "SELECT pi.id FROM purchase_items pi JOIN purchases p ON p.id = pi.purchase_id "
+        "WHERE p.business_id = :business_id LIMIT :limit",
+    ),
+    ("purchases", "SELECT id FROM purchases WHERE business_id = :business_id LIMIT :limit"),
+    ("stock_adjustments", "SELECT id FROM stock_adjustments WHERE business_id = :business_id LIMIT :limit"),
+    ("customers", "SELECT id FROM customers WHERE business_id = :business_id LIMIT :limit"),
+    ("expenses", "SELECT id FROM expenses WHERE business_id = :business_id LIMIT :limit"),
+    ("stock_movements", "SELECT id FROM stock_movements WHERE business_id = :business_id LIMIT :limit"),
+    ("stock_snapshots", "SELECT id FROM stock_snapshots WHERE business_id = :business_id LIMIT :limit"),
+    ("inventory", "SELECT id FROM inventory WHERE business_id = :business_id LIMIT :limit"),
+    ("products", "SELECT id FROM products WHERE business_id = :business_id LIMIT :limit"),
+    ("categories", "SELECT id FROM categories WHERE business_id = :business_id LIMIT :limit"),
+    ("vendors", "SELECT id FROM vendors WHERE business_id = :business_id LIMIT :limit"),
+    ("banks", "SELECT id FROM banks WHERE business_id = :business_id LIMIT :limit"),
+    ("accounts", "SELECT id FROM accounts WHERE business_id = :business_id LIMIT :limit"),
+    ("license_keys", "SELECT id FROM license_keys WHERE business_id = :business_id LIMIT :limit"),
+    ("users", "SELECT id FROM users WHERE business_id = :business_id LIMIT :limit"),
+]
+
+
+def _wipe_sales(db, job, business_id: int, batch_size: int) -> int:
+    """All sales with items and payments; stock is going away, so no restore."""
+    deleted = 0
+    while True:
+        invoices = [
+            row[0] for row in db.execute(
+                text("SELECT invoice_no FROM sales WHERE business_id = :business_id LIMIT :limit"),
+                {"business_id": business_id, "limit": batch_size},
+            )
+        ]
+        if not invoices:
+            return deleted
+
+        delete_sales_batch(db, invoices, restore_stock=False)
+        db.commit()
+
+        deleted += len(invoices)
+        job.update(message=f"Deleted {deleted} sales")
+
+
+def delete_business_data(job, business_id: int, batch_size: int = WIPE_BATCH_SIZE) -> dict:
+    """Background job: delete a business and every row that belongs to it."""
+    db = SessionLocal()
+    counts = {}
+    steps = len(WIPE_STEPS) + 2
+
+    try:
+        name = db.execute(
+            text("SELECT name FROM businesses WHERE id = :business_id"),
+            {"business_id": business_id},
+        ).scalar()
+        if name is None:
+            raise ValueError("Business not found")
+
+        counts["sales"] = _wipe_sales(db, job, business_id, batch_size)
+        job.update(progress=100 / steps)
+
+        for index, (table, ids_sql) in enumerate(WIPE_STEPS, start=2):
+            delete_sql = text(f"DELETE FROM {table} WHERE id IN ({ids_sql})")
+            counts[table] = 0
+            while True:
+                result = db.execute(delete_sql, {"business_id": business_id, "limit": batch_size})
+                db.commit()
+                if not result.rowcount:
+                    break
+                counts[table] += result.rowcount
+                job.update(message=f"Deleted {counts[table]} rows from {table}")
+
+            job.update(progress=100 * index / steps)
+
+        db.execute(text("DELETE FROM businesses WHERE id = :business_id"), {"business_id": business_id})
+        db.commit()
+    finally:
+        db.close()
+
+    bump_data_version(business_id)
+    return {"business_id": business_id, "name": name, "deleted": counts}
@@ -0,0 +1,113 @@
+"""
+In-process background job registry.
+
+Long operations (backups, restores, imports, bulk deletes) are submitted
+here so the request returns immediately with a job id; clients poll
+GET /jobs/{job_id} for status, progress and the result.
+
+Single uvicorn process (start.py) → a thread pool and a dict are enough.
+Finished jobs are kept for JOB_RETENTION_HOURS (default 24).
+"""
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_RETENTION = timedelta(hours=int(os.getenv("JOB_RETENTION_HOURS", "24")))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    owner_id: Optional[int] = None
+    business_id: Optional[int] = None
+    status: str = QUEUED
+    progress: float = 0.0
+    message: str = ""
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    def update(self, progress: Optional[float] = None, message: Optional[str] = None):
+        """Called by the job function to report progress (0–100)."""
+        if progress is not None:
+            self.progress = max(0.0, min(100.0, float(progress)))
+        if message is not None:
+            self.message = message
+
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+_jobs: Dict[str, Job] = {}
+_lock = threading.Lock()
+
+
+def _prune():
+    cutoff = datetime.now(timezone.utc) - JOB_RETENTION
+    for job_id in [j.id for j in _jobs.values() if j.finished_at and j.finished_at < cutoff]:
+        _jobs.pop(job_id, None)
+
+
+def _run(job: Job, fn: Callable, args, kwargs):
+    job.status = RUNNING
+    job.started_at = datetime.now(timezone.utc)
+    try:
+        job.result = fn(job, *args, **kwargs)
+        job.status = SUCCEEDED
+        job.progress = 100.0
+    except Exception as e:
+        job.status = FAILED
+        job.error = str(e) or e.__class__.__name__
+        print(f"[WARNING] Job {job.kind} {job.id} failed: {job.error}")
+        traceback.print_exc()
+    finally:
+        job.finished_at = datetime.now(timezone.utc)
+
+
+def submit_job(
+    kind: str,
+    fn: Callable,
+    *args,
+    owner_id: Optional[int] = None,
+    business_id: Optional[int] = None,
+    **kwargs,
+) -> Job:
+    """
+    Run fn(job, *args, **kwargs) in the background.
+    fn's return value (a JSON-serialisable dict) becomes job.result.
+    """
+    job = Job(id=uuid.uuid4().hex, kind=kind, owner_id=owner_id, business_id=business_id)
+
+    with _lock:
+        _prune()
+        _jobs[job.id] = job
+
+    _executor.submit(_run, job, fn, args, kwargs)
+    return job
+
+
+def get_job(job_id: str) -> Optional[Job]:
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def find_running(kind: str) -> Optional[Job]:
+    """The queued/running job of this kind, if any (to refuse duplicates)."""
+    with _lock:
+        for job in _jobs.values():
+            if job.kind == kind and job.status in (QUEUED, RUNNING):
+                return job
+    return None
@@ -0,0 +1,87 @@
+"""
+Schema version helpers shared by:
+- app startup (check only, never creates tables)
+- app/scripts/migrate.py (stamp legacy databases + upgrade)
+- migrations/env.py and app/scripts/index_audit.py (model metadata)
+"""
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.engine import Engine
+
+from app.database import SQLALCHEMY_DATABASE_URL
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+ALEMBIC_INI = BASE_DIR / "alembic.ini"
+MIGRATIONS_DIR = BASE_DIR / "migrations"
+
+# Revision matching the schema that Base.metadata.create_all used to build.
+# Databases created before Alembic are stamped with it, then upgraded.
+BASELINE_REVISION = "0001_baseline"
+
+
+def import_all_models():
+    """
+    Import every model module so Base.metadata knows all tables.
+    Routers used to do this implicitly; scripts and Alembic have no routers.
+    """
+    from app.business import models as business_models  # noqa: F401
+    from app.customers import models as customer_models  # noqa: F401
+    from app.users import models as users_models  # noqa: F401
+    from app.license import models as license_models  # noqa: F401
+    from app.bank import models as bank_models  # noqa: F401
+    from app.accounts import models as accounts_models  # noqa: F401
+    from app.vendor import models as vendor_models  # noqa: F401
+    from app.stock.category import models as category_models  # noqa: F401
+    from app.stock.products import models as product_models  # noqa: F401
+    from app.stock.inventory import models as inventory_models  # noqa: F401
+    from app.stock.inventory.adjustments import models as adjustment_models  # noqa: F401
+    from app.purchase import models as purchase_models  # noqa: F401
+    from app.sales import models as sales_models  # noqa: F401
+    from app.payments import models as payment_models  # noqa: F401
+    from app.accounts.expenses import models as expense_models  # noqa: F401
+
+    from app.database import Base
+    return Base.metadata
+
+
+def get_alembic_config() -> Config:
+    cfg = Config(str(ALEMBIC_INI))
+    cfg.set_main_option("script_location", str(MIGRATIONS_DIR))
+    # ConfigParser interpolation: escape % in passwords
+    cfg.set_main_option("sqlalchemy.url", SQLALCHEMY_DATABASE_URL.replace("%", "%%"))
+    return cfg
+
+
+def get_head_revisions() -> set:
+    script = ScriptDirectory.from_config(get_alembic_config())
+    return set(script.get_heads())
+
+
+def get_current_revisions(engine: Engine) -> set:
+    with engine.connect() as conn:
+        context = MigrationContext.configure(conn)
+        return set(context.get_current_heads())
+
+
+def check_schema_version(engine: Engine):
+    """
+    Fail fast when the database is not at the migration head.
+    This is a single SELECT on alembic_version — no DDL at startup.
+    """
+    heads = get_head_revisions()
+    current = get_current_revisions(engine)
+
+    if current == heads:
+        print(f"[INFO] Database schema at revision {', '.join(sorted(current))}")
+        return
+
+    raise RuntimeError(
+        "Database schema is out of date "
+        f"(database: {', '.join(sorted(current)) or 'unversioned'}, "
+        f"expected: {', '.join(sorted(heads))}). "
+        "Run: python -m app.scripts.migrate"
+    )
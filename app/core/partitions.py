@@ -0,0 +1,524 @@
+"""
+Optional monthly range partitioning for sales, sale_items and payments.
+
+    sales        PARTITION BY RANGE (sold_at)
+    sale_items   PARTITION BY RANGE (sold_at)       -- co-partitioned with sales
+    payments     PARTITION BY RANGE (payment_date)
+
+Partitions are named <table>_yYYYYmMM and bounded on Lagos month starts.
+Each table also gets a <table>_default partition so an insert outside the
+prepared range never fails.
+
+Postgres rules that shape the conversion:
+- PK / UNIQUE on a partitioned table must contain the partition key,
+  so sales_pkey becomes (id, sold_at) and invoice_no is unique per
+  (invoice_no, sold_at). invoice_no values still come from one sequence.
+- sale_items references sales on (sale_invoice_no, sold_at).
+- payments cannot reference sales (different key): ON DELETE CASCADE is
+  kept by an AFTER DELETE trigger on sales.
+
+Everything here is driven by app/scripts/partitions.py and the scheduler;
+databases that are never converted are left untouched.
+"""
+import os
+import re
+import subprocess
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+
+LAGOS_TZ = ZoneInfo("Africa/Lagos")
+
+
+@dataclass(frozen=True)
+class PartitionSpec:
+    column: str
+    timezone_aware: bool
+
+
+# Order matters: referenced table first
+PARTITIONED_TABLES = {
+    "sales": PartitionSpec("sold_at", True),
+    "sale_items": PartitionSpec("sold_at", True),
+    "payments": PartitionSpec("payment_date", False),
+}
+
+PARTITION_NAME_RE = re.compile(r"^(?P<table>\w+)_y(?P<year>\d{4})m(?P<month>\d{2})$")
+
+
+# ============================================================
+# MONTH HELPERS
+# ============================================================
+
+def month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def add_months(d: date, months: int) -> date:
+    years, month_index = divmod(d.month - 1 + months, 12)
+    return date(d.year + years, month_index + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def _bound(table: str, month: date) -> str:
+    if PARTITIONED_TABLES[table].timezone_aware:
+        return datetime.combine(month, time.min, tzinfo=LAGOS_TZ).isoformat()
+    return datetime.combine(month, time.min).isoformat()
+
+
+def range_months(start_dt: datetime, end_dt: datetime) -> list:
+    """Every month start touched by [start_dt, end_dt] in Lagos time."""
+    if start_dt.tzinfo is not None:
+        start_dt, end_dt = start_dt.astimezone(LAGOS_TZ), end_dt.astimezone(LAGOS_TZ)
+    month, last = month_start(start_dt.date()), month_start(end_dt.date())
+    months = []
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def _lagos_today() -> date:
+    return datetime.now(LAGOS_TZ).date()
+
+
+# ============================================================
+# INTROSPECTION
+# ============================================================
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    return bool(conn.execute(
+        text("""
+            SELECT EXISTS (
+                SELECT 1
+                FROM pg_partitioned_table pt
+                JOIN pg_class c ON c.oid = pt.partrelid
+                WHERE c.relname = :table
+                  AND c.relnamespace = current_schema()::regnamespace
+            )
+        """),
+        {"table": table},
+    ).scalar())
+
+
+def list_partitions(conn: Connection, table: str) -> dict:
+    """{month: partition name} for the monthly partitions of `table`."""
+    rows = conn.execute(
+        text("""
+            SELECT child.relname
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE parent.relname = :table
+              AND parent.relnamespace = current_schema()::regnamespace
+        """),
+        {"table": table},
+    ).scalars().all()
+
+    months = {}
+    for name in rows:
+        match = PARTITION_NAME_RE.match(name)
+        if match and match.group("table") == table:
+            months[date(int(match.group("year")), int(match.group("month")), 1)] = name
+    return months
+
+
+# ============================================================
+# CREATE PARTITIONS AHEAD OF TIME
+# ============================================================
+
+def _create_partition(conn: Connection, table: str, month: date) -> bool:
+    name = partition_name(table, month)
+    column = PARTITIONED_TABLES[table].column
+    lower, upper = _bound(table, month), _bound(table, add_months(month, 1))
+
+    # A month that already landed in the default partition cannot be split
+    # out without moving rows; leave it for the operator.
+    stray = conn.execute(
+        text(
+            f"SELECT 1 FROM {table}_default "
+            f"WHERE {column} >= :lower AND {column} < :upper LIMIT 1"
+        ),
+        {"lower": lower, "upper": upper},
+    ).first()
+    if stray:
+        print(f"[WARNING] {table}_default holds rows for {month:%Y-%m}; {name} not created")
+        return False
+
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    ))
+    return True
+
+
+def ensure_partitions(engine: Engine, months_ahead: int = 3) -> list:
+    """
+    Make sure this month and the next `months_ahead` months have partitions.
+    Safe to run repeatedly; does nothing on unpartitioned databases.
+    """
+    created = []
+    current = month_start(_lagos_today())
+
+    with engine.begin() as conn:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(conn, table):
+                continue
+
+            existing = list_partitions(conn, table)
+            for offset in range(months_ahead + 1):
+                month = add_months(current, offset)
+                if month not in existing and _create_partition(conn, table, month):
+                    created.append(partition_name(table, month))
+
+    for name in created:
+        print(f"[INFO] Created partition {name}")
+    return created
+
+
+# ============================================================
+# ONE-OFF CONVERSION
+# ============================================================
+
+def _metadata_table(table: str):
+    from app.core.migrations import import_all_models
+    return import_all_models().tables[table]
+
+
+def _first_month(conn: Connection, table: str) -> date:
+    column = PARTITIONED_TABLES[table].column
+    oldest = conn.execute(text(f"SELECT MIN({column}) FROM {table}_legacy")).scalar()
+    if oldest is None:
+        return month_start(_lagos_today())
+    if oldest.tzinfo is not None:
+        oldest = oldest.astimezone(LAGOS_TZ)
+    return month_start(oldest.date())
+
+
+def _create_parent(conn: Connection, table: str, months_ahead: int):
+    column = PARTITIONED_TABLES[table].column
+
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {table}_legacy"))
+    conn.execute(text(
+        f"CREATE TABLE {table} (LIKE {table}_legacy INCLUDING DEFAULTS) "
+        f"PARTITION BY RANGE ({column})"
+    ))
+    conn.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+
+    month = _first_month(conn, table)
+    last = add_months(month_start(_lagos_today()), months_ahead)
+    while month <= last:
+        _create_partition(conn, table, month)
+        month = add_months(month, 1)
+
+
+def _move_sequences(conn: Connection, table: str):
+    """Serial sequences belong to the legacy table; hand them to the new parent."""
+    for column in _metadata_table(table).primary_key.columns:
+        sequence = conn.execute(
+            text("SELECT pg_get_serial_sequence(:table, :column)"),
+            {"table": f"{table}_legacy", "column": column.name},
+        ).scalar()
+        if sequence:
+            conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.{column.name}"))
+
+
+def _replace_identity(conn: Connection, table: str, column: str):
+    """Identity columns cannot move between tables; use a plain sequence."""
+    sequence = f"{table}_{column}_seq"
+    conn.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {sequence} OWNED BY {table}.{column}"))
+    conn.execute(text(
+        f"SELECT setval('{sequence}', COALESCE((SELECT MAX({column}) FROM {table}), 0) + 1, false)"
+    ))
+    conn.execute(text(
+        f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT nextval('{sequence}')"
+    ))
+
+
+def _add_keys_and_indexes(conn: Connection, table: str):
+    key = PARTITIONED_TABLES[table].column
+    model_table = _metadata_table(table)
+
+    pk = [c.name for c in model_table.primary_key.columns] + [key]
+    conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({', '.join(pk)})"))
+
+    for index in model_table.indexes:
+        columns = [c.name for c in index.columns]
+        if index.unique and key not in columns:
+            # Uniqueness is only enforceable together with the partition key
+            conn.execute(text(
+                f"ALTER TABLE {table} ADD CONSTRAINT uq_{table}_{'_'.join(columns)}_{key} "
+                f"UNIQUE ({', '.join(columns + [key])})"
+            ))
+            conn.execute(text(f"CREATE INDEX {index.name} ON {table} ({', '.join(columns)})"))
+        else:
+            unique = "UNIQUE " if index.unique else ""
+            conn.execute(text(f"CREATE {unique}INDEX {index.name} ON {table} ({', '.join(columns)})"))
+
+
+def _add_foreign_keys(conn: Connection, table: str):
+    model_table = _metadata_table(table)
+
+    for fk in model_table.foreign_key_constraints:
+        local = [c.name for c in fk.columns]
+        remote_table = fk.referred_table.name
+        remote = [e.column.name for e in fk.elements]
+        name = fk.name or f"{table}_{local[0]}_fkey"
+        on_delete = f" ON DELETE {fk.ondelete}" if fk.ondelete else ""
+
+        if remote_table in PARTITIONED_TABLES:
+            remote_key = PARTITIONED_TABLES[remote_table].column
+            if remote_key not in model_table.c:
+                _add_cascade_trigger(conn, table, local[0], remote_table, remote[0], fk.ondelete)
+                continue
+            local.append(remote_key)
+            remote.append(remote_key)
+
+        conn.execute(text(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} "
+            f"FOREIGN KEY ({', '.join(local)}) "
+            f"REFERENCES {remote_table} ({', '.join(remote)}){on_delete}"
+        ))
+
+
+def _add_cascade_trigger(conn, table, local, remote_table, remote, on_delete):
+    if (on_delete or "").upper() != "CASCADE":
+        return
+
+    function = f"{remote_table}_delete_{table}"
+    conn.execute(text(f"""
+        CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+        BEGIN
+            DELETE FROM {table} WHERE {local} = OLD.{remote};
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+    """))
+    conn.execute(text(
+        f"CREATE TRIGGER trg_{function} AFTER DELETE ON {remote_table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {function}()"
+    ))
+
+
+def convert_to_partitioned(engine: Engine, months_ahead: int = 3):
+    """
+    Rebuild sales, sale_items and payments as partitioned tables in one
+    transaction. Takes ACCESS EXCLUSIVE locks for the duration of the copy:
+    run it in a maintenance window, after a backup.
+    """
+    tables = list(PARTITIONED_TABLES)
+
+    with engine.begin() as conn:
+        if any(is_partitioned(conn, t) for t in tables):
+            raise RuntimeError("Tables are already partitioned")
+
+        conn.execute(text(f"LOCK TABLE {', '.join(tables)} IN ACCESS EXCLUSIVE MODE"))
+
+        # The partition key joins the primary key, so it must never be NULL
+        # (payments.payment_date is nullable in the model)
+        for table in tables:
+            column = PARTITIONED_TABLES[table].column
+            missing = conn.execute(text(f"SELECT COUNT(*) FROM {table} WHERE {column} IS NULL")).scalar()
+            if missing:
+                raise RuntimeError(
+                    f"{table} has {missing} row(s) with NULL {column}; "
+                    f"set {column} on them before converting"
+                )
+
+        for table in tables:
+            _create_parent(conn, table, months_ahead)
+            conn.execute(text(f"INSERT INTO {table} SELECT * FROM {table}_legacy"))
+            _move_sequences(conn, table)
+            print(f"[INFO] Copied {table} into partitioned table")
+
+        _replace_identity(conn, "sales", "invoice_no")
+
+        conn.execute(text(f"DROP TABLE {', '.join(t + '_legacy' for t in tables)}"))
+
+        for table in tables:
+            _add_keys_and_indexes(conn, table)
+        for table in tables:
+            _add_foreign_keys(conn, table)
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in tables:
+            conn.execute(text(f"ANALYZE {table}"))
+
+    print("[INFO] sales, sale_items and payments are now partitioned by month")
+
+
+# ============================================================
+# DETACH / ARCHIVE OLD PARTITIONS
+# ============================================================
+
+def _drop_outgoing_foreign_keys(conn: Connection, partition: str):
+    """A detached sale_items month keeps an FK to sales; drop it so that
+    the matching sales month can be detached too."""
+    names = conn.execute(
+        text("""
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = CAST(:partition AS regclass) AND contype = 'f'
+        """),
+        {"partition": partition},
+    ).scalars().all()
+    for name in names:
+        conn.execute(text(f"ALTER TABLE {partition} DROP CONSTRAINT {name}"))
+
+
+def _archive_partition(partition: str, archive_dir: str):
+    from app.database import SQLALCHEMY_DATABASE_URL
+
+    db_url = SQLALCHEMY_DATABASE_URL
+    if db_url.startswith("postgresql+psycopg2://"):
+        db_url = db_url.replace("postgresql+psycopg2://", "postgresql://", 1)
+    elif db_url.startswith("postgres://"):
+        db_url = db_url.replace("postgres://", "postgresql://", 1)
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{partition}.dump")
+
+    subprocess.run(
+        [
+            os.getenv("PG_DUMP_PATH", "pg_dump"),
+            "--dbname", db_url,
+            "-F", "c",
+            "-t", partition,
+            "-f", path,
+            "--no-owner",
+            "--no-privileges",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return path
+
+
+def detach_old_partitions(engine: Engine, keep_months: int, archive_dir: str | None = None) -> list:
+    """
+    Detach monthly partitions older than `keep_months` full months.
+    Detached tables stay in the database as plain tables unless
+    `archive_dir` is given, in which case each one is pg_dump'ed there
+    and dropped.
+    """
+    cutoff = add_months(month_start(_lagos_today()), -keep_months)
+    detached = []
+
+    # Referencing tables first so the FK check on sales passes
+    for table in ("sale_items", "payments", "sales"):
+        with engine.begin() as conn:
+            if not is_partitioned(conn, table):
+                continue
+
+            for month, name in sorted(list_partitions(conn, table).items()):
+                if month >= cutoff:
+                    break
+                conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                _drop_outgoing_foreign_keys(conn, name)
+                detached.append(name)
+                print(f"[INFO] Detached {name}")
+
+    if archive_dir:
+        for name in detached:
+            path = _archive_partition(name, archive_dir)
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP TABLE {name}"))
+            print(f"[INFO] Archived {name} to {path}")
+
+    return detached
+
+
+# ============================================================
+# PARTITION PRUNING CHECK
+# ============================================================
+
+def _scanned_relations(plan: dict) -> list:
+    found = []
+    if "Relation Name" in plan:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(_scanned_relations(child))
+    return found
+
+
+def report_queries(business_id: int, start_dt: datetime, end_dt: datetime) -> dict:
+    """
+    Same predicates as the date-bounded reports in app/sales/service.py
+    (list_sales, staff report, sales_analysis) and
+    app/accounts/profit_loss/service.py (revenue / cost of sales).
+    """
+    from sqlalchemy import func, select
+    from app.core.migrations import import_all_models
+    import_all_models()
+    from app.payments.models import Payment
+    from app.sales.models import Sale, SaleItem
+
+    return {
+        "list_sales / staff report": (
+            select(Sale.id)
+            .where(Sale.business_id == business_id, Sale.sold_at >= start_dt, Sale.sold_at <= end_dt)
+        ),
+        "sales_analysis / profit and loss": (
+            select(SaleItem.product_id, func.sum(SaleItem.quantity))
+            .join(Sale, Sale.invoice_no == SaleItem.sale_invoice_no)
+            .where(
+                Sale.business_id == business_id,
+                Sale.sold_at >= start_dt, Sale.sold_at <= end_dt,
+                SaleItem.sold_at >= start_dt, SaleItem.sold_at <= end_dt,
+            )
+            .group_by(SaleItem.product_id)
+        ),
+        "payments by date": (
+            select(func.sum(Payment.amount_paid))
+            .where(
+                Payment.business_id == business_id,
+                Payment.payment_date >= start_dt.replace(tzinfo=None),
+                Payment.payment_date <= end_dt.replace(tzinfo=None),
+            )
+        ),
+    }
+
+
+def check_pruning(engine: Engine, business_id: int, start_dt: datetime, end_dt: datetime) -> bool:
+    """
+    EXPLAIN each report query and check that only the partitions covering
+    [start_dt, end_dt] (plus the default partition) appear in the plan.
+    """
+    from sqlalchemy.dialects import postgresql
+
+    ok = True
+    with engine.connect() as conn:
+        partitions = {}
+        for table in PARTITIONED_TABLES:
+            names = set(list_partitions(conn, table).values())
+            if names:
+                names.add(f"{table}_default")  # created with every parent
+            partitions[table] = names
+
+        for label, query in report_queries(business_id, start_dt, end_dt).items():
+            sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+            plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()[0]["Plan"]
+            scanned = set(_scanned_relations(plan))
+
+            for table, names in partitions.items():
+                hit = scanned & names
+                if not hit:
+                    continue
+
+                allowed = {
+                    partition_name(table, m)
+                    for m in range_months(start_dt, end_dt)
+                }
+                allowed.add(f"{table}_default")
+                pruned = hit <= allowed
+                ok = ok and pruned
+                status = "OK" if pruned else "NOT PRUNED"
+                default = " (incl. default)" if f"{table}_default" in hit else ""
+                print(f"[{status}] {label}: {table} scans {len(hit)}/{len(names)} partitions{default}")
+
+    return ok
@@ -0,0 +1,338 @@
+"""
+Report result cache, keyed by (tenant, report, normalised params).
+
+- Bounded by memory (REPORT_CACHE_MAX_MB, default 64) with LRU eviction.
+- Open periods (ending today or later / unbounded) stay valid while the
+  tenant's data version is unchanged and only for the current Lagos day
+  (their default dates move at midnight). Every committed write to a
+  tracked table bumps that version.
+- Closed past periods are kept indefinitely. They are evicted only by a
+  write dated inside the period (e.g. a backdated expense, or deleting an
+  old sale) or by an undated write to a table the report reads.
+- Responses carry ETag / Last-Modified; a matching If-None-Match or
+  If-Modified-Since gets 304 without a body.
+
+The app runs as a single uvicorn process (start.py), so an in-process
+cache is coherent. Bulk statements and raw SQL bypass the ORM flush
+events: call bump_data_version() or invalidate_all() after them.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+from zoneinfo import ZoneInfo
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session as SessionType
+
+
+LAGOS_TZ = ZoneInfo("Africa/Lagos")
+
+MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_MB", "64")) * 1024 * 1024
+
+# Table → attribute that dates a row (None: undated, affects every period)
+TRACKED_TABLES = {
+    "sales": "sold_at",
+    "payments": None,  # reports place payments on the sale's date, not their own
+    "purchases": "purchase_date",
+    "expenses": "expense_date",
+    "stock_adjustments": "adjusted_at",
+    "products": None,
+    "inventory": None,
+}
+
+# Tables each report reads (for closed-period eviction)
+REPORT_SOURCES = {
+    "profit_loss": {"sales", "expenses", "stock_adjustments", "products"},
+    "profit_loss_series": {"sales", "expenses", "stock_adjustments", "products"},
+    "sales_analysis": {"sales", "products"},
+    "staff_report": {"sales", "payments", "products"},
+    "outstanding": {"sales", "payments"},
+    "receivables_aging": {"sales", "payments"},
+    "stock_reorder": {"sales", "inventory", "products"},
+    "abc_analysis": {"sales", "products", "inventory"},  # stock on hand is live
+    "sales_heatmap": {"sales"},
+}
+
+ALL_TENANTS = "all"
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str
+    last_modified: datetime
+    version: int
+    report: str
+    period_end: Optional[date]
+
+    @property
+    def closed(self) -> bool:
+        return self.period_end is not None and self.period_end < _lagos_today()
+
+
+@dataclass
+class _TenantState:
+    version: int = 0
+    last_write: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+def _lagos_today() -> date:
+    return datetime.now(LAGOS_TZ).date()
+
+
+def _as_date(value) -> Optional[date]:
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(LAGOS_TZ)
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return None
+
+
+# ============================================================
+# CACHE STORE
+# ============================================================
+
+class ReportCache:
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, CacheEntry]" = OrderedDict()
+        self._size = 0
+        self._tenants: Dict[Any, _TenantState] = {}
+        self._lock = threading.Lock()
+
+    # ---------- versions ----------
+    def version(self, tenant) -> int:
+        with self._lock:
+            return self._tenants.setdefault(tenant, _TenantState()).version
+
+    def bump(self, writes: Iterable[tuple]):
+        """writes: (business_id, table, written date or None)"""
+        with self._lock:
+            now = datetime.now(timezone.utc)
+            for business_id, table, written in writes:
+                for tenant in (business_id, ALL_TENANTS):
+                    state = self._tenants.setdefault(tenant, _TenantState())
+                    state.version += 1
+                    state.last_write = now
+                self._evict_closed(business_id, table, written)
+
+    def _evict_closed(self, business_id, table, written: Optional[date]):
+        for key in list(self._entries):
+            entry = self._entries[key]
+            if key[0] not in (business_id, ALL_TENANTS) or not entry.closed:
+                continue
+            if table not in REPORT_SOURCES.get(entry.report, ()):
+                continue
+            if written is None or written <= entry.period_end:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            for state in self._tenants.values():
+                state.version += 1
+                state.last_write = datetime.now(timezone.utc)
+
+    # ---------- entries ----------
+    def get(self, key: tuple, tenant) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            current = self._tenants.setdefault(tenant, _TenantState()).version
+            if not entry.closed and entry.version != current:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, entry: CacheEntry):
+        size = len(entry.body)
+        if size > self.max_bytes // 4:
+            return  # one huge report must not flush everything else
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._size += size
+            while self._size > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry.body)
+
+
+report_cache = ReportCache()
+
+
+def bump_data_version(business_id: Optional[int] = None):
+    """Explicit invalidation after bulk / raw SQL writes."""
+    if business_id is None:
+        invalidate_all()
+        return
+    report_cache.bump((business_id, table, None) for table in TRACKED_TABLES)
+
+
+def invalidate_all():
+    report_cache.clear()
+
+
+def mark_written(session: SessionType, business_id: int, table: str, written: Optional[date] = None):
+    """
+    Register a raw SQL write to a tracked table on `session`; it bumps the
+    tenant's version when the session commits (nothing on rollback).
+    """
+    session.info.setdefault("report_cache_writes", set()).add((business_id, table, written))
+
+
+# ============================================================
+# WRITE TRACKING (ORM flush → version bump on commit)
+# ============================================================
+
+def _written_dates(obj, attr: Optional[str]) -> list:
+    """Old and new value of the dating attribute (both periods change)."""
+    if attr is None:
+        return [None]
+    history = inspect(obj).attrs[attr].history
+    values = [_as_date(v) for v in (*history.added, *history.unchanged, *history.deleted)]
+    values = [v for v in values if v is not None]
+    return values or [_lagos_today()]  # server default → written now
+
+
+@event.listens_for(SessionType, "before_flush")
+def _collect_report_writes(session, flush_context, instances):
+    pending = session.info.setdefault("report_cache_writes", set())
+
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table not in TRACKED_TABLES:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+
+        business_id = getattr(obj, "business_id", None)
+        for written in _written_dates(obj, TRACKED_TABLES[table]):
+            pending.add((business_id, table, written))
+
+
+@event.listens_for(SessionType, "do_orm_execute")
+def _collect_bulk_writes(execute_state):
+    if not (execute_state.is_update or execute_state.is_delete):
+        return
+    mapper = execute_state.bind_mapper
+    if mapper is not None and mapper.local_table.name in TRACKED_TABLES:
+        execute_state.session.info["report_cache_bulk"] = True
+
+
+@event.listens_for(SessionType, "after_commit")
+def _apply_report_writes(session):
+    writes = session.info.pop("report_cache_writes", None)
+    bulk = session.info.pop("report_cache_bulk", False)
+
+    if bulk or any(business_id is None for business_id, _, _ in writes or ()):
+        invalidate_all()
+    elif writes:
+        report_cache.bump(writes)
+
+
+@event.listens_for(SessionType, "after_rollback")
+def _discard_report_writes(session):
+    session.info.pop("report_cache_writes", None)
+    session.info.pop("report_cache_bulk", None)
+
+
+# ============================================================
+# HTTP
+# ============================================================
+
+def _normalise(params: Dict[str, Any]) -> tuple:
+    return tuple(sorted(
+        (k, v.isoformat() if isinstance(v, (date, datetime)) else v)
+        for k, v in params.items()
+        if v is not None
+    ))
+
+
+def _not_modified(request: Request, entry: CacheEntry) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return entry.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return entry.last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def cached_report(
+    request: Request,
+    current_user,
+    report: str,
+    params: Dict[str, Any],
+    compute: Callable[[], Any],
+    business_id: Optional[int] = None,
+    period_end: Optional[date] = None,
+) -> Response:
+    """
+    Serve `report` from cache (or compute and store it) as a JSON Response
+    with ETag / Last-Modified, answering 304 when the client is current.
+
+    `period_end` is the last day the report covers; None means open-ended.
+    """
+    if "super_admin" in current_user.roles:
+        tenant = business_id if business_id is not None else ALL_TENANTS
+    else:
+        tenant = current_user.business_id
+
+    key = (tenant, report, _normalise(params))
+    # Open-ended reports default their dates to today / this month: the
+    # same params mean a different period tomorrow, even without writes
+    today = _lagos_today()
+    if period_end is None or period_end >= today:
+        key += (today.isoformat(),)
+    entry = report_cache.get(key, tenant)
+
+    if entry is None:
+        version = report_cache.version(tenant)
+        body = json.dumps(
+            jsonable_encoder(compute()), separators=(",", ":"), default=str
+        ).encode("utf-8")
+        entry = CacheEntry(
+            body=body,
+            etag=f'"{hashlib.sha1(body).hexdigest()}"',
+            last_modified=datetime.now(timezone.utc),
+            version=version,
+            report=report,
+            period_end=period_end,
+        )
+        report_cache.put(key, entry)
+
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": format_datetime(entry.last_modified, usegmt=True),
+        # Always revalidate; a 304 is cheap
+        "Cache-Control": "private, no-cache",
+    }
+
+    if _not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=entry.body, media_type="application/json", headers=headers)
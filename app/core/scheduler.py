@@ -0,0 +1,87 @@
+"""
+In-process background scheduler (single uvicorn process, see start.py).
+
+Jobs are registered here and started from the lifespan in app/main.py.
+"""
+import os
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from app.core.jobs import find_running, submit_job
+from app.core.partitions import ensure_partitions
+from app.database import SessionLocal, engine
+
+
+scheduler = BackgroundScheduler(timezone="Africa/Lagos")
+
+# Nightly backup time (HH:MM, Lagos); empty disables it
+BACKUP_DAILY_AT = os.getenv("BACKUP_DAILY_AT", "02:00")
+
+
+def _ensure_partitions_job():
+    try:
+        ensure_partitions(engine)
+    except Exception as e:
+        print(f"[WARNING] Partition maintenance failed: {e}")
+
+
+def _stock_snapshot_job():
+    from app.stock.inventory.service import take_stock_snapshots
+
+    db = SessionLocal()
+    try:
+        take_stock_snapshots(db)
+    except Exception as e:
+        db.rollback()
+        print(f"[WARNING] Stock snapshot failed: {e}")
+    finally:
+        db.close()
+
+
+def _backup_job():
+    from backup.backup import run_auto_backup
+
+    # Same registry as manual backups, so the two never overlap
+    if not find_running("backup"):
+        submit_job("backup", run_auto_backup)
+
+
+def start_scheduler():
+    # Next months' partitions exist well before the first sale lands in them
+    scheduler.add_job(
+        _ensure_partitions_job,
+        "cron",
+        hour=1,
+        minute=0,
+        id="ensure_partitions",
+        replace_existing=True,
+    )
+    # Yesterday's closing stock per product, for GET /stock/inventory/as-of
+    scheduler.add_job(
+        _stock_snapshot_job,
+        "cron",
+        hour=0,
+        minute=30,
+        id="stock_snapshots",
+        replace_existing=True,
+    )
+    if BACKUP_DAILY_AT:
+        hour, minute = (int(part) for part in BACKUP_DAILY_AT.split(":"))
+        scheduler.add_job(
+            _backup_job,
+            "cron",
+            hour=hour,
+            minute=minute,
+            id="daily_backup",
+            replace_existing=True,
+        )
+
+    scheduler.start()
+
+    # Catch up immediately if the shop was closed over a month boundary
+    _ensure_partitions_job()
+
+
+def shutdown_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class Customer(Base):
+    __tablename__ = "customers"
+
+    __table_args__ = (
+        # One customer per phone (or per name when no phone) in a business
+        UniqueConstraint("business_id", "match_key", name="uq_customer_business_match_key"),
+        Index("idx_customer_business_phone", "business_id", "normalized_phone"),
+        # Substring search on names (pg_trgm)
+        Index(
+            "idx_customer_name_trgm",
+            "normalized_name",
+            postgresql_using="gin",
+            postgresql_ops={"normalized_name": "gin_trgm_ops"},
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # 🔑 Multi-tenant link
+    business_id = Column(
+        Integer,
+        ForeignKey("businesses.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+
+    # As last typed at the till
+    name = Column(String, nullable=False)
+    phone = Column(String, nullable=True)
+
+    # Lowercase / collapsed spaces, and digits only in local 0XXXXXXXXXX form
+    normalized_name = Column(String, nullable=False)
+    normalized_phone = Column(String, nullable=True)
+
+    # "p:<normalized_phone>" or "n:<normalized_name>"
+    match_key = Column(String, nullable=False)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    sales = relationship("Sale", back_populates="customer")
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date
+
+from app.database import get_db
+from app.customers import schemas, service
+from app.users.permissions import role_required
+from app.users.schemas import UserDisplaySchema
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[schemas.CustomerOut])
+def list_customers(
+    q: Optional[str] = Query(None, description="Part of a name or phone number"),
+    business_id: Optional[int] = Query(None, description="Super admin only"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: UserDisplaySchema = Depends(role_required(["user", "manager", "admin", "super_admin"]))
+):
+    """Customers of the business, optionally searched by name or phone."""
+    return service.list_customers(db, current_user, q, business_id, skip, limit)
+
+
+@router.get("/{customer_id}", response_model=schemas.CustomerOut)
+def get_customer(
+    customer_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserDisplaySchema = Depends(role_required(["user", "manager", "admin", "super_admin"]))
+):
+    return service.get_customer(db, customer_id, current_user)
+
+
+@router.get("/{customer_id}/ledger", response_model=schemas.CustomerLedgerOut)
+def get_customer_ledger(
+    customer_id: int,
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: UserDisplaySchema = Depends(role_required(["user", "manager", "admin", "super_admin"]))
+):
+    """
+    Sales (debit) and payments (credit) of one customer with a running balance.
+    The opening balance includes everything before start_date.
+    """
+    return service.get_customer_ledger(db, customer_id, current_user, start_date, end_date)
@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class CustomerOut(BaseModel):
+    id: int
+    business_id: int
+    name: str
+    phone: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class CustomerLedgerEntry(BaseModel):
+    entry_date: datetime
+    entry_type: str            # "sale" | "payment"
+    invoice_no: int
+    reference: Optional[str] = None
+    debit: float
+    credit: float
+    balance: float             # running: total sold minus total paid so far
+
+
+class CustomerLedgerOut(BaseModel):
+    customer: CustomerOut
+    opening_balance: float
+    total_debit: float
+    total_credit: float
+    closing_balance: float
+    entries: List[CustomerLedgerEntry]
@@ -0,0 +1,259 @@
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from fastapi import HTTPException
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.customers import models
+from app.users.schemas import UserDisplaySchema
+
+
+LAGOS_TZ = ZoneInfo("Africa/Lagos")
+
+WALK_IN_NAMES = {"walk-in", "walk in", "walkin"}
+
+
+# ============================================================
+# NORMALISATION
+# Same rules as the backfill in migrations/versions/0005_customers.py
+# ============================================================
+
+def normalize_name(name: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", (name or "").strip()).lower()
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Digits only; +234 / 234 numbers in local 0XXXXXXXXXX form."""
+    digits = re.sub(r"\D", "", phone or "")
+    if re.fullmatch(r"234\d{10}", digits):
+        digits = "0" + digits[3:]
+    return digits or None
+
+
+def match_key(normalized_name: str, normalized_phone: Optional[str]) -> str:
+    return f"p:{normalized_phone}" if normalized_phone else f"n:{normalized_name}"
+
+
+def get_or_create_customer_id(
+    db: Session,
+    business_id: int,
+    name: Optional[str],
+    phone: Optional[str] = None,
+) -> Optional[int]:
+    """
+    Customer id for a name/phone typed at the till; None for walk-ins.
+    Concurrent tills creating the same customer race on the unique key,
+    the loser reads the winner's row.
+    """
+    normalized_name = normalize_name(name)
+    if not normalized_name or normalized_name in WALK_IN_NAMES:
+        return None
+
+    normalized_phone = normalize_phone(phone)
+    key = match_key(normalized_name, normalized_phone)
+
+    customer_id = db.execute(
+        pg_insert(models.Customer)
+        .values(
+            business_id=business_id,
+            name=name.strip(),
+            phone=phone.strip() if phone and phone.strip() else None,
+            normalized_name=normalized_name,
+            normalized_phone=normalized_phone,
+            match_key=key,
+        )
+        .on_conflict_do_nothing(index_elements=["business_id", "match_key"])
+        .returning(models.Customer.id)
+    ).scalar()
+
+    if customer_id is None:
+        customer_id = db.execute(
+            select(models.Customer.id).where(
+                models.Customer.business_id == business_id,
+                models.Customer.match_key == key,
+            )
+        ).scalar_one()
+
+    return customer_id
+
+
+def customer_ids_matching(business_id: Optional[int], name: str):
+    """
+    Subquery of customer ids whose name contains `name`;
+    served by the trigram index instead of scanning sales.
+    """
+    query = select(models.Customer.id).where(
+        models.Customer.normalized_name.ilike(f"%{normalize_name(name)}%")
+    )
+    if business_id is not None:
+        query = query.where(models.Customer.business_id == business_id)
+    return query
+
+
+# ============================================================
+# LOOKUPS
+# ============================================================
+
+def _tenant_business_id(current_user: UserDisplaySchema, business_id: Optional[int]) -> Optional[int]:
+    if "super_admin" in current_user.roles:
+        return business_id
+
+    if not current_user.business_id:
+        raise HTTPException(status_code=403, detail="User does not belong to any business")
+    return current_user.business_id
+
+
+def list_customers(
+    db: Session,
+    current_user: UserDisplaySchema,
+    q: Optional[str] = None,
+    business_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 50,
+):
+    business_id = _tenant_business_id(current_user, business_id)
+
+    query = db.query(models.Customer)
+    if business_id is not None:
+        query = query.filter(models.Customer.business_id == business_id)
+
+    if q:
+        digits = normalize_phone(q)
+        if digits and len(digits) >= 4:
+            query = query.filter(models.Customer.normalized_phone.like(f"%{digits}%"))
+        else:
+            query = query.filter(models.Customer.normalized_name.ilike(f"%{normalize_name(q)}%"))
+
+    return query.order_by(models.Customer.name).offset(skip).limit(limit).all()
+
+
+def get_customer(db: Session, customer_id: int, current_user: UserDisplaySchema):
+    customer = db.query(models.Customer).filter(models.Customer.id == customer_id).first()
+
+    if not customer:
+        raise HTTPException(status_code=404, detail="Customer not found")
+
+    if "super_admin" not in current_user.roles and customer.business_id != current_user.business_id:
+        raise HTTPException(status_code=403, detail="Not authorized to view this customer")
+
+    return customer
+
+
+# ============================================================
+# LEDGER
+# ============================================================
+
+# Sales debit the customer, payments credit them. The running balance is
+# taken over the full history so the first row in range carries the
+# opening balance; the date filter is applied outside the window.
+LEDGER_SQL = text("""
+    WITH movements AS (
+        SELECT
+            s.sold_at          AS entry_date,
+            'sale'             AS entry_type,
+            0                  AS type_order,
+            s.invoice_no       AS invoice_no,
+            s.id               AS row_id,
+            s.ref_no           AS reference,
+            s.total_amount     AS debit,
+            0::float           AS credit
+        FROM sales s
+        WHERE s.business_id = :business_id
+          AND s.customer_id = :customer_id
+
+        UNION ALL
+
+        SELECT
+            p.created_at,
+            'payment',
+            1,
+            p.sale_invoice_no,
+            p.id,
+            coalesce(p.reference_no, p.payment_method),
+            0::float,
+            p.amount_paid
+        FROM payments p
+        WHERE p.business_id = :business_id
+          AND p.customer_id = :customer_id
+    ),
+    running AS (
+        SELECT
+            m.*,
+            sum(m.debit - m.credit) OVER (
+                ORDER BY m.entry_date, m.type_order, m.row_id
+                ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+            ) AS balance
+        FROM movements m
+    )
+    SELECT entry_date, entry_type, invoice_no, reference, debit, credit, balance
+    FROM running
+    WHERE (CAST(:start AS timestamptz) IS NULL OR entry_date >= :start)
+      AND (CAST(:end AS timestamptz) IS NULL OR entry_date < :end)
+    ORDER BY entry_date, type_order, row_id
+""")
+
+LEDGER_OPENING_SQL = text("""
+    SELECT
+        coalesce((SELECT sum(total_amount) FROM sales
+                  WHERE business_id = :business_id AND customer_id = :customer_id
+                    AND sold_at < :start), 0)
+      - coalesce((SELECT sum(amount_paid) FROM payments
+                  WHERE business_id = :business_id AND customer_id = :customer_id
+                    AND created_at < :start), 0)
+""")
+
+
+def get_customer_ledger(
+    db: Session,
+    customer_id: int,
+    current_user: UserDisplaySchema,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    customer = get_customer(db, customer_id, current_user)
+
+    start = datetime.combine(start_date, time.min, tzinfo=LAGOS_TZ) if start_date else None
+    end = datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=LAGOS_TZ) if end_date else None
+
+    params = {
+        "business_id": customer.business_id,
+        "customer_id": customer.id,
+        "start": start,
+        "end": end,
+    }
+    rows = db.execute(LEDGER_SQL, params).mappings().all()
+
+    if rows:
+        first = rows[0]
+        opening = float(first["balance"]) - float(first["debit"]) + float(first["credit"])
+    elif start is not None:
+        opening = float(db.execute(LEDGER_OPENING_SQL, params).scalar() or 0)
+    else:
+        opening = 0.0
+
+    total_debit = sum(float(r["debit"] or 0) for r in rows)
+    total_credit = sum(float(r["credit"] or 0) for r in rows)
+
+    return {
+        "customer": customer,
+        "opening_balance": round(opening, 2),
+        "total_debit": round(total_debit, 2),
+        "total_credit": round(total_credit, 2),
+        "closing_balance": round(opening + total_debit - total_credit, 2),
+        "entries": [
+            {
+                "entry_date": r["entry_date"],
+                "entry_type": r["entry_type"],
+                "invoice_no": r["invoice_no"],
+                "reference": r["reference"],
+                "debit": round(float(r["debit"] or 0), 2),
+                "credit": round(float(r["credit"] or 0), 2),
+                "balance": round(float(r["balance"] or 0), 2),
+            }
+            for r in rows
+        ],
+    }
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.core.jobs import get_job
+from app.jobs import schemas
+from app.users.schemas import UserDisplaySchema
+from app.users.permissions import role_required
+
+router = APIRouter()
+
+
+# ----------------------------------------
+# JOB STATUS (poll until succeeded / failed)
+# ----------------------------------------
+@router.get("/{job_id}", response_model=schemas.JobOut)
+def get_job_status(
+    job_id: str,
+    current_user: UserDisplaySchema = Depends(
+        role_required(["user", "manager", "admin", "super_admin"])
+    ),
+):
+    job = get_job(job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    # Only the submitter (or super admin) can see a job
+    if "super_admin" not in current_user.roles and job.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job
@@ -3,7 +3,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.routing import APIRoute
-from app.database import engine, Base
+from app.database import engine
+from app.core.migrations import check_schema_version
+from app.core.scheduler import start_scheduler, shutdown_scheduler
 
 from app.superadmin.router import router as superadmin_router
 from app.business.router import router as business_router
@@ -22,6 +24,8 @@ from app.stock.inventory.adjustments.router import router as adjustment_router
 from app.accounts.expenses.router import router as expenses_router
 from app.accounts.profit_loss.router import router as profit_loss_router
 from app.payments.router import router as payment_router
+from app.customers.router import router as customer_router
+from app.jobs.router import router as jobs_router
 
 
 
@@ -84,12 +88,14 @@ current_time = datetime.now(lagos_tz)
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-# Database startup
+# Database startup (schema is managed by Alembic: python -m app.scripts.migrate)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Application startup")
-    Base.metadata.create_all(bind=engine)
+    check_schema_version(engine)
+    start_scheduler()
     yield
+    shutdown_scheduler()
     print("Application shutdown")
 
 # Corrected single FastAPI instance
@@ -153,9 +159,11 @@ app.include_router(purchase_router, prefix="/purchase", tags=["Purchase"])
 
 app.include_router(sales_router, prefix="/sales", tags=["Sales"])
 app.include_router(payment_router, prefix="/payments", tags=["Payments"])
+app.include_router(customer_router, prefix="/customers", tags=["Customers"])
 app.include_router(adjustment_router, prefix="/stock/inventory/adjustments", tags=["StoreInventory - Adjustment"])
 app.include_router(expenses_router, prefix="/accounts/expenses", tags=["Accounts - Expenses"])
 app.include_router(profit_loss_router, prefix="/accounts/profit_loss", tags=["Accounts - Profit-Loss"])
+app.include_router(jobs_router, prefix="/jobs", tags=["Background Jobs"])
 
 
 
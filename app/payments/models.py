@@ -39,6 +39,13 @@ class Payment(Base):
         nullable=True
     )
 
+    # Copy of Sale.customer_id so a customer's payments need no join
+    customer_id = Column(
+        Integer,
+        ForeignKey("customers.id", ondelete="SET NULL"),
+        nullable=True
+    )
+
     reference_no = Column(String, nullable=True)
 
     balance_due = Column(Float, default=0.0)
@@ -101,4 +108,24 @@ class Payment(Base):
             "business_id",
             "status"
         ),
+
+        # Payments of an invoice (FK side of sales.invoice_no)
+        Index(
+            "idx_payment_invoice",
+            "sale_invoice_no"
+        ),
+
+        # Newest-first listing / keyset pagination
+        Index(
+            "idx_payment_business_created",
+            "business_id",
+            "created_at",
+            "id"
+        ),
+
+        # Customer ledger
+        Index(
+            "idx_payment_customer",
+            "customer_id"
+        ),
     )
@@ -11,6 +11,7 @@ from app.users.auth import get_current_user
 from app.users.schemas import UserDisplaySchema
 
 from app.users.permissions import role_required
+from app.core.exports import EXPORT_FORMATS, EXPORT_FORMAT_PATTERN
 
 router = APIRouter()
 
@@ -54,9 +55,9 @@ def create_payment_for_sale(
 
 
 
-@router.get("/", response_model=List[schemas.PaymentOut])
+@router.get("/", response_model=schemas.PaymentListResponse)
 def list_payments(
-    invoice_no: Optional[str] = Query(None, description="Filter by invoice number (partial match)"),
+    invoice_no: Optional[str] = Query(None, description="Invoice number, or its leading digits"),
     start_date: Optional[date] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="End date (YYYY-MM-DD)"),
     status: Optional[str] = Query(None, description="Filter by status: pending, part_paid, completed"),
@@ -66,6 +67,13 @@ def list_payments(
         None,
         description="Filter by specific business (super admin only)"
     ),
+    format: str = Query(
+        "json",
+        pattern=EXPORT_FORMAT_PATTERN,
+        description="json, or csv / xlsx download of every matching payment"
+    ),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(100, ge=1, le=500),
     db: Session = Depends(get_db),
     current_user: UserDisplaySchema = Depends(
         role_required(["user", "manager", "admin", "super_admin"])
@@ -76,7 +84,22 @@ def list_payments(
     
     - Regular users → only payments from their own business
     - Super admin → all payments or filtered by ?business_id=
+    - Newest first, `limit` per page; follow `next_cursor` for more
+    - `summary` totals cover every matching payment
     """
+    if format in EXPORT_FORMATS:
+        return service.export_payments(
+            current_user=current_user,
+            fmt=format,
+            invoice_no=invoice_no,
+            start_date=start_date,
+            end_date=end_date,
+            status=status,
+            bank_id=bank_id,
+            payment_method=payment_method,
+            business_id=business_id
+        )
+
     return service.list_payments(
         db=db,
         current_user=current_user,
@@ -86,9 +109,44 @@ def list_payments(
         status=status,
         bank_id=bank_id,
         payment_method=payment_method,
-        business_id=business_id
+        business_id=business_id,
+        cursor=cursor,
+        limit=limit
+    )
+
+
+
+@router.get("/cashup", response_model=schemas.CashupOut)
+def cashup(
+    date_: Optional[date] = Query(None, alias="date", description="Single day (YYYY-MM-DD); default today"),
+    start_date: Optional[date] = Query(None, description="Range start, e.g. month-end reconciliation"),
+    end_date: Optional[date] = Query(None, description="Range end (inclusive)"),
+    business_id: Optional[int] = Query(
+        None,
+        description="Business to cash up (required for super admin)"
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserDisplaySchema = Depends(
+        role_required(["user", "manager", "admin", "super_admin"])
     )
+):
+    """
+    End-of-day cash-up / bank reconciliation.
+
+    - Payments grouped by method and bank, and by staff member
+    - Expenses of the same period grouped by method and bank
+    - ?date= for one day, or ?start_date=&end_date= for a range
+    """
+    if date_ is not None:
+        start_date = end_date = date_
 
+    return service.cashup_report(
+        db=db,
+        current_user=current_user,
+        start_date=start_date,
+        end_date=end_date,
+        business_id=business_id
+    )
 
 
 @router.get(
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional
+from datetime import datetime, date
 from pydantic import Field
 import pytz
 
@@ -48,6 +48,20 @@ class PaymentOut(PaymentBase):
 
 
 
+class PaymentListSummary(BaseModel):
+    count: int
+    total_sales: float      # each invoice counted once
+    amount_paid: float
+    balance_due: float      # current balance of those invoices
+
+
+class PaymentListResponse(BaseModel):
+    payments: List[PaymentOut]
+    summary: PaymentListSummary
+    next_cursor: Optional[str] = None   # None → last page
+
+
+
 # -------------------------
 # Update Payment Schema
 # -------------------------
@@ -57,3 +71,42 @@ class PaymentUpdate(BaseModel):
     payment_method: Optional[str] = None  # cash / transfer / pos
     bank_id: Optional[int] = None
     payment_date: Optional[datetime] = None
+
+
+
+# -------------------------
+# End-of-day cash-up
+# -------------------------
+class CashupMethodTotal(BaseModel):
+    payment_method: str
+    bank_id: Optional[int] = None
+    bank_name: Optional[str] = None
+    count: int
+    amount: float
+
+
+class CashupStaffTotal(BaseModel):
+    staff_id: Optional[int] = None
+    staff_name: Optional[str] = None
+    payment_method: str
+    count: int
+    amount: float
+
+
+class CashupSummary(BaseModel):
+    payments_total: float
+    expenses_total: float
+    cash_received: float
+    cash_expenses: float
+    net_cash: float             # expected change in the till
+    net_bank: float             # transfer/pos in minus bank-paid expenses
+
+
+class CashupOut(BaseModel):
+    business_id: int
+    start_date: date
+    end_date: date
+    payments_by_method: List[CashupMethodTotal]
+    payments_by_staff: List[CashupStaffTotal]
+    expenses_by_method: List[CashupMethodTotal]
+    summary: CashupSummary
@@ -18,7 +18,8 @@ from datetime import datetime, date, time
 from typing import Optional, List
 
 from datetime import date
-from sqlalchemy import func
+from sqlalchemy import func, or_, select, tuple_
+import base64
 
 from sqlalchemy.orm import joinedload
 
@@ -26,6 +27,7 @@ from app.users.auth import get_current_user
 from app.users.schemas import UserDisplaySchema
 
 from app.users.permissions import role_required
+from app.core.exports import EXPORT_FETCH_SIZE, export_response
 
 
 
@@ -121,6 +123,7 @@ def create_payment(
     new_payment = models.Payment(
         business_id=target_business_id,
         sale_invoice_no=invoice_no,
+        customer_id=sale.customer_id,
         amount_paid=payment.amount_paid,
         payment_method=payment.payment_method,
         bank_id=payment.bank_id,
@@ -179,8 +182,35 @@ from zoneinfo import ZoneInfo
 
 LAGOS_TZ = ZoneInfo("Africa/Lagos")
 
-def list_payments(
-    db: Session,
+MAX_INVOICE_NO = 2 ** 31 - 1   # sales.invoice_no is an Integer
+
+
+def _invoice_no_filter(invoice_no: str):
+    """
+    Exact or leading-digits match on sale_invoice_no.
+    "12" → 12, 120-129, 1200-1299, ... : a handful of index range scans
+    on idx_payment_business_invoice instead of a cast + ILIKE.
+    """
+    value = invoice_no.strip()
+    if not value.isdigit():
+        raise HTTPException(
+            status_code=400,
+            detail="invoice_no must be a number or its leading digits"
+        )
+
+    prefix = int(value)
+    column = models.Payment.sale_invoice_no
+    ranges = [column == prefix]
+
+    scale = 10
+    while prefix and prefix * scale <= MAX_INVOICE_NO:
+        ranges.append(column.between(prefix * scale, (prefix + 1) * scale - 1))
+        scale *= 10
+
+    return or_(*ranges)
+
+
+def _payment_list_filters(
     current_user: UserDisplaySchema,
     invoice_no: Optional[str] = None,
     start_date: Optional[date] = None,
@@ -189,67 +219,117 @@ def list_payments(
     bank_id: Optional[int] = None,
     payment_method: Optional[str] = None,
     business_id: Optional[int] = None
-) -> List[schemas.PaymentOut]:
-    """
-    Tenant-aware list of payments with timezone-aware filtering.
-    Enriches each payment with bank_name, created_by_name, customer_name, total_amount.
-    """
+) -> list:
+    """Tenant isolation + filters shared by list_payments and export_payments."""
+    filters = []
 
-    # ─── 1. Base query with eager loading ─────────────────────────────
-    query = (
-        db.query(models.Payment)
-        .options(
-            joinedload(models.Payment.sale),
-            joinedload(models.Payment.user),
-            joinedload(models.Payment.bank)
-        )
-    )
-
-    # ─── 2. Tenant isolation ──────────────────────────────────────────
+    # ─── Tenant isolation ─────────────────────────────────────────────
     if "super_admin" in current_user.roles:
         if business_id is not None:
-            query = query.filter(models.Payment.business_id == business_id)
+            filters.append(models.Payment.business_id == business_id)
     else:
         if not current_user.business_id:
             raise HTTPException(
                 status_code=403,
                 detail="Current user does not belong to any business"
             )
-        query = query.filter(models.Payment.business_id == current_user.business_id)
+        filters.append(models.Payment.business_id == current_user.business_id)
 
-    # ─── 3. Apply filters ─────────────────────────────────────────────
+    # ─── Filters ──────────────────────────────────────────────────────
     if invoice_no:
-        query = query.filter(
-            cast(models.Payment.sale_invoice_no, String).ilike(f"%{invoice_no}%")
-        )
+        filters.append(_invoice_no_filter(invoice_no))
 
     if start_date:
         start_dt = datetime.combine(start_date, time.min, tzinfo=LAGOS_TZ)
-        query = query.filter(models.Payment.created_at >= start_dt)
+        filters.append(models.Payment.created_at >= start_dt)
 
     if end_date:
         end_dt = datetime.combine(end_date, time.max, tzinfo=LAGOS_TZ)
-        query = query.filter(models.Payment.created_at <= end_dt)
+        filters.append(models.Payment.created_at <= end_dt)
 
     if status:
-        query = query.filter(models.Payment.status == status.lower())
+        filters.append(models.Payment.status == status.lower())
 
     if bank_id:
-        query = query.filter(models.Payment.bank_id == bank_id)
+        filters.append(models.Payment.bank_id == bank_id)
 
     if payment_method:
-        query = query.filter(
+        filters.append(
             models.Payment.payment_method.ilike(f"%{payment_method.lower()}%")
         )
 
-    # ─── 4. Execute query (ordering optional) ────────────────────────
-    payments = query.offset(0).limit(1000).all()  # you can add pagination if needed
+    return filters
 
-    # ─── 5. Enrich response objects ───────────────────────────────────
-    result: List[schemas.PaymentOut] = []
 
-    for p in payments:
-        enriched = schemas.PaymentOut(
+def _encode_cursor(created_at: datetime, payment_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{payment_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        created_at, payment_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(payment_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def list_payments(
+    db: Session,
+    current_user: UserDisplaySchema,
+    invoice_no: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    status: Optional[str] = None,
+    bank_id: Optional[int] = None,
+    payment_method: Optional[str] = None,
+    business_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = 100
+) -> schemas.PaymentListResponse:
+    """
+    Tenant-aware page of payments, newest first (created_at, id).
+    Pass next_cursor back as ?cursor= for the following page.
+    The summary covers every payment matching the filters, not just the page.
+    """
+    filters = _payment_list_filters(
+        current_user, invoice_no, start_date, end_date,
+        status, bank_id, payment_method, business_id
+    )
+
+    # ─── 1. Page (keyset on idx_payment_business_created) ────────────
+    query = (
+        db.query(
+            models.Payment,
+            sales_models.Sale.customer_name,
+            sales_models.Sale.total_amount,
+            bank_models.Bank.name.label("bank_name"),
+            user_models.User.username,
+        )
+        .outerjoin(sales_models.Sale, sales_models.Sale.invoice_no == models.Payment.sale_invoice_no)
+        .outerjoin(bank_models.Bank, bank_models.Bank.id == models.Payment.bank_id)
+        .outerjoin(user_models.User, user_models.User.id == models.Payment.created_by)
+        .filter(*filters)
+    )
+
+    if cursor:
+        created_at, payment_id = _decode_cursor(cursor)
+        query = query.filter(
+            tuple_(models.Payment.created_at, models.Payment.id) < tuple_(created_at, payment_id)
+        )
+
+    rows = (
+        query
+        .order_by(models.Payment.created_at.desc(), models.Payment.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    payments = [
+        schemas.PaymentOut(
             id=p.id,
             invoice_no=p.sale_invoice_no,
             amount_paid=float(p.amount_paid or 0),
@@ -261,16 +341,115 @@ def list_payments(
             created_at=p.created_at.astimezone(LAGOS_TZ) if p.created_at else None,  # Lagos timezone
             balance_due=float(p.balance_due or 0),
             status=p.status,
+            bank_name=bank_name,
+            created_by_name=username,
+            total_amount=float(total_amount or 0) if total_amount is not None else None,
+            customer_name=customer_name or "Walk-in",
+        )
+        for p, customer_name, total_amount, bank_name, username in rows
+    ]
+
+    # ─── 2. Totals over the full filter ──────────────────────────────
+    # Sale totals / balances count each invoice once
+    matched = select(models.Payment.sale_invoice_no, models.Payment.amount_paid).where(*filters).cte("matched")
+
+    paid_per_sale = (
+        select(
+            models.Payment.sale_invoice_no,
+            func.sum(models.Payment.amount_paid).label("paid")
+        )
+        .where(models.Payment.sale_invoice_no.in_(select(matched.c.sale_invoice_no)))
+        .group_by(models.Payment.sale_invoice_no)
+        .subquery()
+    )
 
-            # Enriched fields – safe because of joinedload
-            bank_name=p.bank.name if p.bank else None,
-            created_by_name=p.user.username if p.user else None,
-            total_amount=float(p.sale.total_amount or 0) if p.sale else None,
-            customer_name=p.sale.customer_name or "Walk-in" if p.sale else None
+    sale_totals = (
+        select(
+            func.coalesce(func.sum(sales_models.Sale.total_amount), 0).label("total_sales"),
+            func.coalesce(
+                func.sum(sales_models.Sale.total_amount - paid_per_sale.c.paid), 0
+            ).label("balance_due"),
         )
-        result.append(enriched)
+        .join(paid_per_sale, paid_per_sale.c.sale_invoice_no == sales_models.Sale.invoice_no)
+        .subquery()
+    )
+
+    count, amount_paid, total_sales, balance_due = db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(matched.c.amount_paid), 0),
+            select(sale_totals.c.total_sales).scalar_subquery(),
+            select(sale_totals.c.balance_due).scalar_subquery(),
+        ).select_from(matched)
+    ).one()
+
+    return schemas.PaymentListResponse(
+        payments=payments,
+        summary=schemas.PaymentListSummary(
+            count=count,
+            total_sales=float(total_sales or 0),
+            amount_paid=float(amount_paid or 0),
+            balance_due=float(balance_due or 0),
+        ),
+        next_cursor=_encode_cursor(rows[-1][0].created_at, rows[-1][0].id) if has_more else None,
+    )
+
+
+PAYMENT_EXPORT_HEADERS = [
+    "Payment ID", "Invoice No", "Customer", "Sale Total", "Amount Paid",
+    "Payment Method", "Bank", "Reference No", "Balance Due", "Status",
+    "Payment Date", "Created By", "Created At",
+]
+
+
+def export_payments(
+    current_user: UserDisplaySchema,
+    fmt: str,
+    invoice_no: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    status: Optional[str] = None,
+    bank_id: Optional[int] = None,
+    payment_method: Optional[str] = None,
+    business_id: Optional[int] = None
+):
+    """Every payment matching the list_payments filters, streamed as csv / xlsx."""
+    filters = _payment_list_filters(
+        current_user, invoice_no, start_date, end_date,
+        status, bank_id, payment_method, business_id
+    )
 
-    return result
+    def build_rows(db: Session):
+        query = (
+            db.query(
+                models.Payment.id,
+                models.Payment.sale_invoice_no,
+                sales_models.Sale.customer_name,
+                sales_models.Sale.total_amount,
+                models.Payment.amount_paid,
+                models.Payment.payment_method,
+                bank_models.Bank.name,
+                models.Payment.reference_no,
+                models.Payment.balance_due,
+                models.Payment.status,
+                models.Payment.payment_date,
+                user_models.User.username,
+                models.Payment.created_at,
+            )
+            .outerjoin(sales_models.Sale, sales_models.Sale.invoice_no == models.Payment.sale_invoice_no)
+            .outerjoin(bank_models.Bank, bank_models.Bank.id == models.Payment.bank_id)
+            .outerjoin(user_models.User, user_models.User.id == models.Payment.created_by)
+            .filter(*filters)
+            .order_by(models.Payment.created_at.desc(), models.Payment.id.desc())
+            .yield_per(EXPORT_FETCH_SIZE)
+        )
+
+        for row in query:
+            row = list(row)
+            row[2] = row[2] or "Walk-in"
+            yield row
+
+    return export_response(fmt, "payments", PAYMENT_EXPORT_HEADERS, build_rows)
 
 
 
@@ -537,4 +716,144 @@ def delete_payment(
         raise HTTPException(
             status_code=500,
             detail=f"Failed to delete payment: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+
+# -------------------------
+# End-of-day cash-up
+# -------------------------
+from datetime import timedelta
+from app.accounts.expenses.models import Expense
+
+
+def cashup_report(
+    db: Session,
+    current_user: UserDisplaySchema,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    business_id: Optional[int] = None
+) -> schemas.CashupOut:
+    """
+    Payments and expenses of a day (or range) grouped by method/bank and
+    by staff. payment_date / expense_date hold Lagos wall time, so the
+    range filters the raw columns and uses the (business_id, date) indexes.
+    Defaults: end_date today, start_date = end_date.
+    """
+    if "super_admin" in current_user.roles:
+        if business_id is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Super admin must specify business_id"
+            )
+    else:
+        if not current_user.business_id:
+            raise HTTPException(
+                status_code=403,
+                detail="Current user does not belong to any business"
+            )
+        business_id = current_user.business_id
+
+    end_date = end_date or datetime.now(LAGOS_TZ).date()
+    start_date = start_date or end_date
+
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date is before start_date")
+
+    start_dt = datetime.combine(start_date, time.min)
+    end_dt = datetime.combine(end_date + timedelta(days=1), time.min)
+
+    payment_window = (
+        models.Payment.business_id == business_id,
+        models.Payment.payment_date >= start_dt,
+        models.Payment.payment_date < end_dt,
+    )
+    method = func.lower(models.Payment.payment_method)
+
+    # ─── 1. Payments by method and bank ──────────────────────────────
+    by_method = (
+        db.query(
+            method.label("payment_method"),
+            models.Payment.bank_id,
+            bank_models.Bank.name.label("bank_name"),
+            func.count(models.Payment.id).label("count"),
+            func.coalesce(func.sum(models.Payment.amount_paid), 0).label("amount"),
+        )
+        .outerjoin(bank_models.Bank, bank_models.Bank.id == models.Payment.bank_id)
+        .filter(*payment_window)
+        .group_by(method, models.Payment.bank_id, bank_models.Bank.name)
+        .order_by(method, bank_models.Bank.name)
+        .all()
+    )
+
+    # ─── 2. Payments by staff member and method ──────────────────────
+    by_staff = (
+        db.query(
+            models.Payment.created_by.label("staff_id"),
+            user_models.User.username.label("staff_name"),
+            method.label("payment_method"),
+            func.count(models.Payment.id).label("count"),
+            func.coalesce(func.sum(models.Payment.amount_paid), 0).label("amount"),
+        )
+        .outerjoin(user_models.User, user_models.User.id == models.Payment.created_by)
+        .filter(*payment_window)
+        .group_by(models.Payment.created_by, user_models.User.username, method)
+        .order_by(user_models.User.username, method)
+        .all()
+    )
+
+    # ─── 3. Expenses paid in the same window ─────────────────────────
+    expense_method = func.lower(Expense.payment_method)
+    expenses = (
+        db.query(
+            expense_method.label("payment_method"),
+            Expense.bank_id,
+            bank_models.Bank.name.label("bank_name"),
+            func.count(Expense.id).label("count"),
+            func.coalesce(func.sum(Expense.amount), 0).label("amount"),
+        )
+        .outerjoin(bank_models.Bank, bank_models.Bank.id == Expense.bank_id)
+        .filter(
+            Expense.business_id == business_id,
+            Expense.is_active == True,
+            Expense.expense_date >= start_dt,
+            Expense.expense_date < end_dt,
+        )
+        .group_by(expense_method, Expense.bank_id, bank_models.Bank.name)
+        .order_by(expense_method, bank_models.Bank.name)
+        .all()
+    )
+
+    # ─── 4. Summary ──────────────────────────────────────────────────
+    def _totals(rows):
+        cash = sum(float(r.amount) for r in rows if r.payment_method == "cash")
+        total = sum(float(r.amount) for r in rows)
+        return cash, total
+
+    cash_received, payments_total = _totals(by_method)
+    cash_expenses, expenses_total = _totals(expenses)
+
+    return schemas.CashupOut(
+        business_id=business_id,
+        start_date=start_date,
+        end_date=end_date,
+        payments_by_method=[
+            schemas.CashupMethodTotal(**r._asdict()) for r in by_method
+        ],
+        payments_by_staff=[
+            schemas.CashupStaffTotal(**r._asdict()) for r in by_staff
+        ],
+        expenses_by_method=[
+            schemas.CashupMethodTotal(**r._asdict()) for r in expenses
+        ],
+        summary=schemas.CashupSummary(
+            payments_total=round(payments_total, 2),
+            expenses_total=round(expenses_total, 2),
+            cash_received=round(cash_received, 2),
+            cash_expenses=round(cash_expenses, 2),
+            net_cash=round(cash_received - cash_expenses, 2),
+            net_bank=round(
+                (payments_total - cash_received) - (expenses_total - cash_expenses), 2
+            ),
+        ),
+    )
@@ -90,4 +90,5 @@ class PurchaseItem(Base):
     __table_args__ = (
         Index("idx_purchase_item_purchase_product", "purchase_id", "product_id"),
         Index("idx_purchase_item_business_created", "purchase_id", "created_at"),
+        Index("idx_purchase_item_product", "product_id", "created_at"),
     )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
@@ -12,6 +12,13 @@ from . import schemas, service as purchase_service
 from app.users.permissions import role_required
 from app.users.schemas import UserDisplaySchema
 from app.users.auth import get_current_user
+from app.core.exports import EXPORT_FORMATS, EXPORT_FORMAT_PATTERN
+from app.core.jobs import submit_job
+from app.jobs.schemas import JobOut
+from datetime import datetime
+import os
+import shutil
+import uuid
 
 
 
@@ -19,6 +26,9 @@ from typing import Any
 
 router = APIRouter()
 
+PURCHASE_IMPORT_DIR = os.path.join(os.getcwd(), "purchase_imports")
+os.makedirs(PURCHASE_IMPORT_DIR, exist_ok=True)
+
 
 @router.post(
     "/",
@@ -57,6 +67,60 @@ def create_purchase(
         current_user=current_user,
     )
 
+
+@router.post("/import", response_model=JobOut, status_code=202)
+def import_purchase_file(
+    file: UploadFile = File(...),
+    vendor_id: int = Form(...),
+    invoice_no: str = Form(...),
+    purchase_date: Optional[datetime] = Form(None),
+    create_missing: bool = Form(False, description="Create products for unmatched lines"),
+    category: Optional[str] = Form(None, description="Category for created products (default General)"),
+    business_id: Optional[int] = Form(None, description="Required for super admin"),
+    db: Session = Depends(get_db),
+    current_user: UserDisplaySchema = Depends(
+        role_required(["manager", "admin", "super_admin"])
+    ),
+):
+    """
+    One purchase from a supplier invoice (.xlsx / .csv with barcode, sku
+    or name plus quantity and cost columns). Runs in the background;
+    poll GET /jobs/{id} for the match report.
+    """
+    if "super_admin" not in current_user.roles:
+        business_id = current_user.business_id
+    if not business_id:
+        raise HTTPException(status_code=400, detail="Business ID is required")
+
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    if extension not in (".xlsx", ".csv"):
+        raise HTTPException(status_code=400, detail="Upload an .xlsx or .csv file (save .xls as .xlsx)")
+
+    vendor = db.query(vendor_models.Vendor).filter(
+        vendor_models.Vendor.id == vendor_id,
+        vendor_models.Vendor.business_id == business_id
+    ).first()
+    if not vendor:
+        raise HTTPException(status_code=404, detail="Vendor not found for this business")
+
+    path = os.path.join(PURCHASE_IMPORT_DIR, f"{uuid.uuid4().hex}{extension}")
+    with open(path, "wb") as out:
+        shutil.copyfileobj(file.file, out, 1024 * 1024)
+
+    return submit_job(
+        "purchase_import",
+        purchase_service.import_purchase_file,
+        path,
+        business_id,
+        vendor_id,
+        invoice_no,
+        purchase_date,
+        create_missing,
+        category,
+        owner_id=current_user.id,
+        business_id=business_id,
+    )
+
     
 
     
@@ -71,9 +135,23 @@ def list_purchases_route(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     business_id: Optional[int] = Query(None),
+    format: str = Query("json", pattern=EXPORT_FORMAT_PATTERN),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user),
 ):
+    # csv / xlsx: one row per purchase item, every matching purchase
+    if format in EXPORT_FORMATS:
+        return purchase_service.export_purchases(
+            current_user=current_user,
+            fmt=format,
+            invoice_no=invoice_no,
+            product_id=product_id,
+            vendor_id=vendor_id,
+            start_date=start_date,
+            end_date=end_date,
+            business_id=business_id,
+        )
+
     purchases, gross_total = purchase_service.list_purchases(
         db=db,
         current_user=current_user,
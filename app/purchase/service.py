@@ -11,11 +11,73 @@ from app.vendor import models as  vendor_models
 from sqlalchemy.orm import joinedload
 
 from datetime import datetime, timedelta
-from sqlalchemy import func
+from sqlalchemy import func, or_
 from zoneinfo import ZoneInfo
 
 
 from app.stock.products import models as product_models
+from app.stock.inventory.models import Inventory
+from app.core.exports import EXPORT_FETCH_SIZE, export_response
+from app.database import SessionLocal
+from app.stock.category import models as category_models
+
+import os
+from uuid import uuid4
+
+import pandas as pd
+
+
+def resolve_purchase_products(db: Session, business_id: int, items) -> list:
+    """
+    Products for purchase lines (by product_id, else barcode, else sku),
+    fetched with one query. Returns one product per line, in line order.
+    """
+    ids = {item.product_id for item in items if item.product_id}
+    barcodes = {item.barcode for item in items if not item.product_id and item.barcode}
+    skus = {item.sku for item in items if not item.product_id and not item.barcode and item.sku}
+
+    lookups = []
+    if ids:
+        lookups.append(product_models.Product.id.in_(ids))
+    if barcodes:
+        lookups.append(product_models.Product.barcode.in_(barcodes))
+    if skus:
+        lookups.append(product_models.Product.sku.in_(skus))
+
+    by_id, by_barcode, by_sku = {}, {}, {}
+    if lookups:
+        for product in db.query(product_models.Product).filter(
+            product_models.Product.business_id == business_id,
+            or_(*lookups)
+        ):
+            by_id[product.id] = product
+            if product.barcode:
+                by_barcode[product.barcode] = product
+            if product.sku:
+                by_sku[product.sku] = product
+
+    resolved = []
+    for item in items:
+        if item.product_id:
+            product = by_id.get(item.product_id)
+        elif item.barcode:
+            product = by_barcode.get(item.barcode)
+        elif item.sku:
+            product = by_sku.get(item.sku)
+        else:
+            product = None
+
+        if not product:
+            raise HTTPException(
+                status_code=404,
+                detail=(
+                    f"Product not found (id/barcode/sku): "
+                    f"{item.product_id or item.barcode or item.sku}"
+                )
+            )
+        resolved.append(product)
+
+    return resolved
 
 
 def create_purchase(db, purchase, current_user):
@@ -57,94 +119,50 @@ def create_purchase(db, purchase, current_user):
 
     vendor_name = vendor.business_name
 
+    # -------------------- Resolve Products (one query) --------------------
+    products = resolve_purchase_products(db, business_id, purchase.items)
+
     try:
-        # -------------------- 1️⃣ Create Purchase Header --------------------
+        # -------------------- 1️⃣ Purchase Header + Items --------------------
         db_purchase = purchase_models.Purchase(
             invoice_no=purchase.invoice_no,
             vendor_id=purchase.vendor_id,
             business_id=business_id,
             purchase_date=purchase.purchase_date or datetime.now(ZoneInfo("Africa/Lagos"))
         )
-        db.add(db_purchase)
-        db.flush()  # get db_purchase.id before adding items
 
         total_invoice_cost = 0
-        item_outputs = []
-
-        # -------------------- 2️⃣ Process Each Item --------------------
-        for item in purchase.items:
-            # Validate product
-            # -------------------- Resolve Product (ID / Barcode / SKU) --------------------
-            product = None
-
-            if item.product_id:
-                product = db.query(product_models.Product).filter(
-                    product_models.Product.id == item.product_id,
-                    product_models.Product.business_id == business_id
-                ).first()
-
-            elif item.barcode:
-                product = db.query(product_models.Product).filter(
-                    product_models.Product.barcode == item.barcode,
-                    product_models.Product.business_id == business_id
-                ).first()
-
-            elif item.sku:
-                product = db.query(product_models.Product).filter(
-                    product_models.Product.sku == item.sku,
-                    product_models.Product.business_id == business_id
-                ).first()
+        stock_in = {}       # product_id → quantity received
+        db_items = []
 
-            if not product:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Product not found (id/barcode/sku)"
-                )
-
-            if not product:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Product {item.product_id} not found for this business"
-                )
-
-            # Calculate total
+        for item, product in zip(purchase.items, products):
             item_total = item.quantity * item.cost_price
             total_invoice_cost += item_total
 
-            # Create PurchaseItem row
-            db_item = purchase_models.PurchaseItem(
-                purchase_id=db_purchase.id,
-                product_id=product.id,
-                quantity=item.quantity,
-                cost_price=item.cost_price,
-                total_cost=item_total
-            )
-            db.add(db_item)
-            db.flush()
-            db.refresh(db_item)
-
-            # Update inventory
-            inventory_service.add_stock(
-                db=db,
-                product_id=product.id,
-                quantity=item.quantity,
-                current_user=current_user,
-                commit=False
+            db_items.append(
+                purchase_models.PurchaseItem(
+                    product_id=product.id,
+                    quantity=item.quantity,
+                    cost_price=item.cost_price,
+                    total_cost=item_total
+                )
             )
+            stock_in[product.id] = stock_in.get(product.id, 0) + item.quantity
 
-            # Update product cost
+            # Update product cost (last line of a product wins)
             product.cost_price = item.cost_price
 
-            # Get updated stock
-            inventory = inventory_service.get_inventory_orm_by_product(
-                db=db,
-                product_id=item.product_id,
-                current_user=current_user
-            )
-            current_stock = inventory.current_stock if inventory else 0
+        db_purchase.items = db_items
+        db_purchase.total_cost = total_invoice_cost
+
+        db.add(db_purchase)
+        db.flush()  # header, all items (multi-row INSERT) and product costs
 
-            # Append item info for response
-            item_outputs.append({
+        # -------------------- 2️⃣ Stock In (one statement) --------------------
+        current_stock = inventory_service.add_stock_bulk(db, business_id, stock_in)
+
+        item_outputs = [
+            {
                 "id": db_item.id,
                 "product_id": product.id,
                 "product_name": product.name,
@@ -152,17 +170,14 @@ def create_purchase(db, purchase, current_user):
                 "sku": product.sku,  
                 "quantity": item.quantity,
                 "cost_price": item.cost_price,
-                "total_cost": item_total,
-                "current_stock": current_stock
-            })
-
-        # -------------------- 3️⃣ Update Purchase Total --------------------
-        if hasattr(db_purchase, "total_cost"):
-            db_purchase.total_cost = total_invoice_cost
+                "total_cost": db_item.total_cost,
+                "current_stock": current_stock.get(product.id, 0)
+            }
+            for item, product, db_item in zip(purchase.items, products, db_items)
+        ]
 
         # Commit everything
         db.commit()
-        db.refresh(db_purchase)
 
     except IntegrityError:
         db.rollback()
@@ -194,60 +209,300 @@ def create_purchase(db, purchase, current_user):
 
 
 
-def list_purchases(
-    db: Session,
+# ============================================================
+# SUPPLIER FILE IMPORT (POST /purchase/import, background job)
+# ============================================================
+IMPORT_COLUMN_ALIASES = {
+    "barcode": ("barcode", "ean", "upc"),
+    "sku": ("sku", "code", "item code", "part no", "part number"),
+    "name": ("name", "product", "product name", "description", "item"),
+    "quantity": ("quantity", "qty", "units"),
+    "cost_price": ("cost_price", "cost", "unit cost", "unit price", "price"),
+}
+
+
+def _cell_text(value) -> Optional[str]:
+    """Spreadsheet cell → trimmed text; Excel turns long barcodes into floats."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text_value = str(value).strip()
+    if text_value.endswith(".0") and text_value[:-2].isdigit():
+        text_value = text_value[:-2]
+    return text_value or None
+
+
+def _read_supplier_file(path: str) -> pd.DataFrame:
+    if path.lower().endswith(".csv"):
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    else:
+        df = pd.read_excel(path, dtype=object)
+
+    headers = {str(c).strip().lower().replace("_", " "): c for c in df.columns}
+    columns = {}
+    for field, aliases in IMPORT_COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias.replace("_", " ") in headers:
+                columns[field] = headers[alias.replace("_", " ")]
+                break
+
+    if "quantity" not in columns or "cost_price" not in columns:
+        raise ValueError("Supplier file needs quantity and cost columns")
+    if not {"barcode", "sku", "name"} & columns.keys():
+        raise ValueError("Supplier file needs a barcode, sku or name column")
+
+    return df[list(columns.values())].rename(columns={v: k for k, v in columns.items()})
+
+
+def _product_maps(db: Session, business_id: int):
+    """Every product identifier of the tenant, loaded once."""
+    by_barcode, by_sku, by_name = {}, {}, {}
+    rows = db.query(
+        product_models.Product.id,
+        product_models.Product.barcode,
+        product_models.Product.sku,
+        product_models.Product.name,
+    ).filter(product_models.Product.business_id == business_id)
+
+    for product_id, barcode, sku, name in rows:
+        if barcode:
+            by_barcode[barcode.strip()] = product_id
+        if sku:
+            by_sku[sku.strip().lower()] = product_id
+        if name:
+            # Same name in two categories → ambiguous (None)
+            key = name.strip().lower()
+            by_name[key] = None if key in by_name else product_id
+
+    return by_barcode, by_sku, by_name
+
+
+def import_purchase_file(
+    job,
+    path: str,
+    business_id: int,
+    vendor_id: int,
+    invoice_no: str,
+    purchase_date: Optional[datetime] = None,
+    create_missing: bool = False,
+    category_name: Optional[str] = None,
+) -> dict:
+    """
+    One Purchase from a supplier spreadsheet. Lines are matched on
+    barcode, then SKU, then product name; unmatched lines are created as
+    products (create_missing) or reported. `path` is deleted afterwards.
+    """
+    db = SessionLocal()
+    try:
+        job.update(progress=5, message="Reading file")
+        df = _read_supplier_file(path)
+
+        by_barcode, by_sku, by_name = _product_maps(db, business_id)
+        job.update(progress=20, message=f"Matching {len(df)} lines")
+
+        matched = {"barcode": 0, "sku": 0, "name": 0, "created": 0}
+        unmatched, rejected = [], []
+        lines = []          # (row number, product_id or new-product key, quantity, cost)
+        to_create = {}      # lower name → dict for new products
+
+        for position, record in enumerate(df.to_dict("records")):
+            row_no = position + 2   # header is row 1
+            barcode = _cell_text(record.get("barcode"))
+            sku = _cell_text(record.get("sku"))
+            name = _cell_text(record.get("name"))
+
+            try:
+                quantity = float(_cell_text(record.get("quantity")) or "")
+                cost_price = float((_cell_text(record.get("cost_price")) or "").replace(",", ""))
+            except ValueError:
+                rejected.append({"row": row_no, "reason": "quantity / cost is not a number"})
+                continue
+
+            if quantity <= 0 or not quantity.is_integer() or cost_price < 0:
+                rejected.append({"row": row_no, "reason": "quantity must be a positive whole number, cost >= 0"})
+                continue
+
+            product_id, method = None, None
+            if barcode and barcode in by_barcode:
+                product_id, method = by_barcode[barcode], "barcode"
+            elif sku and sku.lower() in by_sku:
+                product_id, method = by_sku[sku.lower()], "sku"
+            elif name and by_name.get(name.lower()):
+                product_id, method = by_name[name.lower()], "name"
+
+            if product_id is not None:
+                matched[method] += 1
+                lines.append((row_no, product_id, int(quantity), cost_price))
+                continue
+
+            reason = "ambiguous name" if name and name.lower() in by_name else "no matching product"
+            if create_missing and name and reason == "no matching product":
+                key = name.lower()
+                to_create.setdefault(key, {"name": name, "barcode": barcode, "sku": sku, "cost": cost_price})
+                matched["created"] += 1
+                lines.append((row_no, ("new", key), int(quantity), cost_price))
+                continue
+
+            unmatched.append({"row": row_no, "barcode": barcode, "sku": sku, "name": name, "reason": reason})
+
+        if not lines:
+            raise ValueError("No line of the file matched a product")
+
+        # ─── Missing products (one flush) ────────────────────────────
+        created_products = {}
+        if to_create:
+            job.update(progress=50, message=f"Creating {len(to_create)} products")
+            category_name = (category_name or "General").strip()
+            category = db.query(category_models.Category).filter(
+                category_models.Category.name == category_name,
+                category_models.Category.business_id == business_id,
+            ).first()
+            if not category:
+                category = category_models.Category(name=category_name, business_id=business_id)
+                db.add(category)
+
+            for key, spec in to_create.items():
+                created_products[key] = product_models.Product(
+                    name=spec["name"],
+                    category=category,
+                    business_id=business_id,
+                    barcode=spec["barcode"] if spec["barcode"] not in by_barcode else None,
+                    sku=spec["sku"] if spec["sku"] and spec["sku"].lower() not in by_sku else f"SKU-{uuid4().hex[:8]}",
+                    cost_price=spec["cost"],
+                    is_active=True,
+                )
+            db.add_all(created_products.values())
+            db.flush()
+
+        # ─── Purchase, items and stock ───────────────────────────────
+        job.update(progress=70, message=f"Saving {len(lines)} purchase lines")
+
+        items, stock_in, last_cost = [], {}, {}
+        for _row_no, ref, quantity, cost_price in lines:
+            product_id = created_products[ref[1]].id if isinstance(ref, tuple) else ref
+            items.append(
+                purchase_models.PurchaseItem(
+                    product_id=product_id,
+                    quantity=quantity,
+                    cost_price=cost_price,
+                    total_cost=quantity * cost_price,
+                )
+            )
+            stock_in[product_id] = stock_in.get(product_id, 0) + quantity
+            last_cost[product_id] = cost_price
+
+        db_purchase = purchase_models.Purchase(
+            invoice_no=invoice_no,
+            vendor_id=vendor_id,
+            business_id=business_id,
+            purchase_date=purchase_date or datetime.now(ZoneInfo("Africa/Lagos")),
+            total_cost=sum(item.total_cost for item in items),
+            items=items,
+        )
+        db.add(db_purchase)
+
+        for product in db.query(product_models.Product).filter(
+            product_models.Product.id.in_(last_cost)
+        ):
+            product.cost_price = last_cost[product.id]
+
+        db.flush()
+        inventory_service.add_stock_bulk(db, business_id, stock_in)
+        db.commit()
+
+        return {
+            "purchase_id": db_purchase.id,
+            "invoice_no": invoice_no,
+            "lines": len(items),
+            "total_cost": db_purchase.total_cost,
+            "matched": matched,
+            "created_products": [p.name for p in created_products.values()],
+            "unmatched": unmatched,
+            "rejected": rejected,
+        }
+
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+        os.remove(path)
+
+
+def _purchase_list_filters(
     current_user,
-    skip: int = 0,
-    limit: int = 100,
     invoice_no: Optional[str] = None,
-    product_id: Optional[int] = None,
     vendor_id: Optional[int] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     business_id: Optional[int] = None,
-):
-    # -------------------- BASE QUERY --------------------
-    query = db.query(purchase_models.Purchase).options(
-        joinedload(purchase_models.Purchase.items)
-        .joinedload(purchase_models.PurchaseItem.product),   # ✅ preload product (barcode, sku)
-        joinedload(purchase_models.Purchase.vendor)
-    )
+) -> list:
+    """Tenant isolation + header filters shared by list_purchases and export_purchases."""
+    filters = []
 
     # -------------------- TENANT ISOLATION --------------------
     roles = set(current_user.roles)
 
     if roles.intersection({"admin", "manager", "user"}):
-        query = query.filter(
+        filters.append(
             purchase_models.Purchase.business_id == current_user.business_id
         )
     elif business_id:
-        query = query.filter(
+        filters.append(
             purchase_models.Purchase.business_id == business_id
         )
 
     # -------------------- FILTERS --------------------
     if invoice_no:
-        query = query.filter(
+        filters.append(
             purchase_models.Purchase.invoice_no.ilike(f"%{invoice_no.strip()}%")
         )
 
     if vendor_id:
-        query = query.filter(
+        filters.append(
             purchase_models.Purchase.vendor_id == vendor_id
         )
 
     if start_date:
         start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-        query = query.filter(
+        filters.append(
             purchase_models.Purchase.purchase_date >= start_dt
         )
 
     if end_date:
         end_dt = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
-        query = query.filter(
+        filters.append(
             purchase_models.Purchase.purchase_date < end_dt
         )
 
+    return filters
+
+
+def list_purchases(
+    db: Session,
+    current_user,
+    skip: int = 0,
+    limit: int = 100,
+    invoice_no: Optional[str] = None,
+    product_id: Optional[int] = None,
+    vendor_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    business_id: Optional[int] = None,
+):
+    # -------------------- BASE QUERY --------------------
+    query = db.query(purchase_models.Purchase).options(
+        joinedload(purchase_models.Purchase.items)
+        .joinedload(purchase_models.PurchaseItem.product),   # ✅ preload product (barcode, sku)
+        joinedload(purchase_models.Purchase.vendor)
+    )
+
+    # -------------------- TENANT ISOLATION + FILTERS --------------------
+    query = query.filter(*_purchase_list_filters(
+        current_user, invoice_no, vendor_id, start_date, end_date, business_id
+    ))
+
     # -------------------- PRODUCT FILTER --------------------
     if product_id:
         query = query.join(
@@ -275,6 +530,75 @@ def list_purchases(
     return purchases, gross_total
 
 
+PURCHASE_EXPORT_HEADERS = [
+    "Purchase ID", "Invoice No", "Purchase Date", "Vendor", "Product ID",
+    "Product", "Barcode", "SKU", "Quantity", "Cost Price", "Line Total",
+    "Invoice Total",
+]
+
+
+def export_purchases(
+    current_user,
+    fmt: str,
+    invoice_no: Optional[str] = None,
+    product_id: Optional[int] = None,
+    vendor_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    business_id: Optional[int] = None,
+):
+    """
+    One row per purchase item of every matching purchase, streamed as
+    csv / xlsx. product_id keeps whole invoices that contain the product
+    (same as list_purchases).
+    """
+    filters = _purchase_list_filters(
+        current_user, invoice_no, vendor_id, start_date, end_date, business_id
+    )
+
+    def build_rows(db: Session):
+        Purchase = purchase_models.Purchase
+        PurchaseItem = purchase_models.PurchaseItem
+        Product = product_models.Product
+
+        query = (
+            db.query(
+                Purchase.id,
+                Purchase.invoice_no,
+                Purchase.purchase_date,
+                vendor_models.Vendor.business_name,
+                PurchaseItem.product_id,
+                Product.name,
+                Product.barcode,
+                Product.sku,
+                PurchaseItem.quantity,
+                PurchaseItem.cost_price,
+                PurchaseItem.total_cost,
+                Purchase.total_cost,
+            )
+            .join(PurchaseItem, PurchaseItem.purchase_id == Purchase.id)
+            .outerjoin(Product, Product.id == PurchaseItem.product_id)
+            .outerjoin(vendor_models.Vendor, vendor_models.Vendor.id == Purchase.vendor_id)
+            .filter(*filters)
+        )
+
+        if product_id:
+            query = query.filter(
+                Purchase.id.in_(
+                    db.query(PurchaseItem.purchase_id)
+                    .filter(PurchaseItem.product_id == product_id)
+                )
+            )
+
+        return (
+            query
+            .order_by(Purchase.purchase_date.desc(), Purchase.id, PurchaseItem.id)
+            .yield_per(EXPORT_FETCH_SIZE)
+        )
+
+    return export_response(fmt, "purchases", PURCHASE_EXPORT_HEADERS, build_rows)
+
+
 
 
 
@@ -351,8 +675,6 @@ def update_purchase(db, purchase_id, update_data, current_user):
         return None
 
     vendor_name = purchase.vendor.business_name if purchase.vendor else None
-    total_invoice_cost = 0
-
     # 2️⃣ Update Purchase Header
     if update_data.invoice_no is not None:
         purchase.invoice_no = update_data.invoice_no
@@ -367,25 +689,42 @@ def update_purchase(db, purchase_id, update_data, current_user):
         purchase.vendor_id = update_data.vendor_id
         vendor_name = vendor.business_name
 
-    # 3️⃣ Update Purchase Items
+    # 3️⃣ Update Purchase Items (diff against the stored lines)
     if update_data.items:
+        existing = {item.id: item for item in purchase.items}
+        stock_delta = {}    # product_id → net quantity change
+
+        # Products of changed / new lines, validated with one query
+        wanted_ids = {i.product_id for i in update_data.items if i.product_id}
+        products = {
+            p.id: p for p in db.query(product_models.Product).filter(
+                product_models.Product.id.in_(wanted_ids),
+                product_models.Product.business_id == purchase.business_id
+            )
+        } if wanted_ids else {}
+
         for item_update in update_data.items:
-            # Fetch existing item if it exists
-            item = None
+            product = products.get(item_update.product_id)
+            if not product:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Product {item_update.product_id} not found for this business"
+                )
+
             if item_update.id:
-                item = db.query(purchase_models.PurchaseItem).filter(
-                    purchase_models.PurchaseItem.id == item_update.id,
-                    purchase_models.PurchaseItem.purchase_id == purchase.id
-                ).first()
+                item = existing.get(item_update.id)
                 if not item:
                     raise HTTPException(status_code=404, detail=f"Purchase item {item_update.id} not found")
 
-                # Reverse previous stock
-                inventory_service.add_stock(
-                    db, item.product_id, -item.quantity, current_user, commit=False
-                )
+                if (
+                    item.product_id == item_update.product_id
+                    and item.quantity == item_update.quantity
+                    and item.cost_price == item_update.cost_price
+                ):
+                    continue  # untouched line
+
+                stock_delta[item.product_id] = stock_delta.get(item.product_id, 0) - item.quantity
 
-                # Update fields
                 item.product_id = item_update.product_id
                 item.quantity = item_update.quantity
                 item.cost_price = item_update.cost_price
@@ -393,33 +732,26 @@ def update_purchase(db, purchase_id, update_data, current_user):
 
             else:
                 # New item
-                item_total = item_update.quantity * item_update.cost_price
                 item = purchase_models.PurchaseItem(
-                    purchase_id=purchase.id,
                     product_id=item_update.product_id,
                     quantity=item_update.quantity,
                     cost_price=item_update.cost_price,
-                    total_cost=item_total
+                    total_cost=item_update.quantity * item_update.cost_price
                 )
-                db.add(item)
+                purchase.items.append(item)
 
-            # Apply new stock
-            inventory_service.add_stock(
-                db, item_update.product_id, item_update.quantity, current_user, commit=False
+            stock_delta[item_update.product_id] = (
+                stock_delta.get(item_update.product_id, 0) + item_update.quantity
             )
 
             # Update product cost
-            product = db.query(product_models.Product).filter(
-                product_models.Product.id == item_update.product_id,
-                product_models.Product.business_id == purchase.business_id
-            ).first()
-            if product:
-                product.cost_price = item_update.cost_price
+            product.cost_price = item_update.cost_price
 
-            total_invoice_cost += item.quantity * item.cost_price
+        # Net stock changes only, one statement
+        inventory_service.add_stock_bulk(db, purchase.business_id, stock_delta)
 
-        # Update purchase total
-        purchase.total_cost = total_invoice_cost
+        # Purchase total over every line, not just the edited ones
+        purchase.total_cost = sum(i.quantity * i.cost_price for i in purchase.items)
 
     # 4️⃣ Commit changes
     try:
@@ -432,11 +764,17 @@ def update_purchase(db, purchase_id, update_data, current_user):
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
-    # 5️⃣ Prepare response
+    # 5️⃣ Prepare response (stock of all lines in one query)
+    product_ids = {item.product_id for item in purchase.items}
+    stock = dict(
+        db.query(Inventory.product_id, Inventory.current_stock).filter(
+            Inventory.business_id == purchase.business_id,
+            Inventory.product_id.in_(product_ids)
+        )
+    ) if product_ids else {}
+
     item_outputs = []
     for item in purchase.items:
-        inventory = inventory_service.get_inventory_orm_by_product(db, item.product_id, current_user)
-        current_stock = inventory.current_stock if inventory else 0
         item_outputs.append({
             "id": item.id,
             "product_id": item.product_id,
@@ -446,7 +784,7 @@ def update_purchase(db, purchase_id, update_data, current_user):
             "quantity": item.quantity,
             "cost_price": item.cost_price,
             "total_cost": item.total_cost,
-            "current_stock": current_stock,
+            "current_stock": stock.get(item.product_id, 0),
         })
 
     return {
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Identity, Index
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Identity, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -13,6 +14,8 @@ class Sale(Base):
         Index("idx_sales_business_soldat", "business_id", "sold_at"),
         Index("idx_sales_business_invoice", "business_id", "invoice_no"),
         Index("idx_sales_business_date", "business_id", "invoice_date"),
+        Index("idx_sales_business_staff_soldat", "business_id", "sold_by", "sold_at"),
+        Index("idx_sales_business_customer_soldat", "business_id", "customer_id", "sold_at"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -43,6 +46,15 @@ class Sale(Base):
     customer_name = Column(String, nullable=True)
     customer_phone = Column(String, nullable=True)
 
+    # Normalised customer record (NULL for walk-in sales)
+    customer_id = Column(
+        Integer,
+        ForeignKey("customers.id", ondelete="SET NULL"),
+        nullable=True
+    )
+
+    customer = relationship("Customer", back_populates="sales")
+
     # Sale totals
     total_amount = Column(Float, default=0)
 
@@ -84,6 +96,8 @@ class SaleItem(Base):
     # ✅ Composite index for fast joins and product reports
     __table_args__ = (
         Index("idx_saleitems_invoice_product", "sale_invoice_no", "product_id"),
+        Index("idx_saleitems_product", "product_id"),
+        Index("idx_saleitems_soldat", "sold_at"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -116,6 +130,50 @@ class SaleItem(Base):
 
     net_amount = Column(Float, nullable=False)
 
+    # Copy of Sale.sold_at: partition key when sales/sale_items are partitioned
+    sold_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
     sale = relationship("Sale", back_populates="items")
 
     product = relationship("Product")
+
+
+
+class SaleIdempotencyKey(Base):
+    """
+    Client-generated key of a sale uploaded through POST /sales/batch.
+    A replayed key is answered from `result` instead of selling twice.
+    Separate table: a unique index on partitioned sales would have to
+    include sold_at, which a retry does not reproduce.
+    """
+    __tablename__ = "sale_idempotency_keys"
+
+    __table_args__ = (
+        UniqueConstraint("business_id", "idempotency_key", name="uq_sale_idempotency_business_key"),
+    )
+
+    id = Column(Integer, primary_key=True)
+
+    business_id = Column(
+        Integer,
+        ForeignKey("businesses.id", ondelete="CASCADE"),
+        nullable=False
+    )
+
+    idempotency_key = Column(String(100), nullable=False)
+
+    # No FK: sales.invoice_no is only unique together with sold_at once partitioned
+    sale_invoice_no = Column(Integer, nullable=False, index=True)
+
+    # Stored per-sale outcome returned to the till
+    result = Column(JSONB, nullable=False)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status,  Query
+from fastapi import APIRouter, Depends, HTTPException, status,  Query, Request
 from sqlalchemy.orm import Session
 from typing import List
-from datetime import date
+from datetime import date, datetime, timedelta
 from typing import Optional
+from zoneinfo import ZoneInfo
 from sqlalchemy import text
 
 from app.sales.schemas import SaleOut,  SaleOut2, SaleFullCreate, OutstandingSalesResponse, SalesListResponse, ItemSoldResponse
@@ -13,10 +14,16 @@ from app.database import get_db
 from . import schemas, service
 from app.users.schemas import UserDisplaySchema
 from app.users.permissions import role_required
+from app.core.report_cache import cached_report
+from app.core.jobs import submit_job, find_running
+from app.core.exports import EXPORT_FORMATS, EXPORT_FORMAT_PATTERN
+from app.jobs.schemas import JobOut
 import uuid
 
 from app.sales.service import get_sales_by_customer
 
+LAGOS_TZ = ZoneInfo("Africa/Lagos")
+
 
 
 
@@ -91,6 +98,31 @@ def create_sale(
     )
 
 
+@router.post("/batch", response_model=schemas.SaleBatchOut)
+def create_sales_batch(
+    batch: schemas.SaleBatchCreate,
+    business_id: int | None = Query(
+        None, description="Super admin can specify business"
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserDisplaySchema = Depends(
+        role_required(["user", "manager", "admin", "super_admin"])
+    ),
+):
+    """
+    Offline POS sync: upload many sales in one request.
+    Each sale has a client-generated idempotency_key; re-sending a key
+    returns the stored outcome instead of creating a second invoice.
+    Per-sale results: created | duplicate | rejected (+ stock warnings).
+    """
+    return service.create_sales_batch(
+        db=db,
+        batch=batch,
+        current_user=current_user,
+        business_id=business_id,
+    )
+
+
 
 # router.py
 @router.post("/items", response_model=schemas.SaleItemOut, status_code=201)
@@ -137,6 +169,11 @@ def list_sales(
         None,
         description="Filter by specific business (super admin only)"
     ),
+    format: str = Query(
+        "json",
+        pattern=EXPORT_FORMAT_PATTERN,
+        description="json (paginated) or csv / xlsx download of every matching sale"
+    ),
     db: Session = Depends(get_db),
     current_user: UserDisplaySchema = Depends(
         role_required(["user", "manager", "admin", "super_admin"])
@@ -147,6 +184,15 @@ def list_sales(
     Normal users see only their business.
     Super admin can see everything or filter by business_id.
     """
+    if format in EXPORT_FORMATS:
+        return service.export_sales(
+            current_user=current_user,
+            fmt=format,
+            start_date=start_date,
+            end_date=end_date,
+            business_id=business_id,
+        )
+
     sales_data = service.list_sales(
         db=db,
         current_user=current_user,
@@ -226,6 +272,7 @@ def get_sale_by_invoice(
     response_model=List[schemas.SaleOutStaff]
 )
 def staff_sales_report(
+    request: Request,
     staff_id: Optional[int] = Query(None, description="Filter by specific staff/user ID"),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
@@ -245,13 +292,21 @@ def staff_sales_report(
     - Super admin → all businesses or filtered by ?business_id=xxx
     Optional filters: staff_id, start_date, end_date
     """
-    return service.staff_sales_report(
-        db=db,
-        current_user=current_user,
-        staff_id=staff_id,
-        start_date=start_date,
-        end_date=end_date,
-        business_id=business_id
+    return cached_report(
+        request,
+        current_user,
+        report="staff_report",
+        params={"staff_id": staff_id, "start_date": start_date, "end_date": end_date},
+        business_id=business_id,
+        period_end=end_date,
+        compute=lambda: service.staff_sales_report(
+            db=db,
+            current_user=current_user,
+            staff_id=staff_id,
+            start_date=start_date,
+            end_date=end_date,
+            business_id=business_id
+        ),
     )
 
 
@@ -261,6 +316,7 @@ def staff_sales_report(
     response_model=schemas.OutstandingSalesResponse
 )
 def outstanding_sales(
+    request: Request,
     start_date: Optional[date] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="End date (YYYY-MM-DD)"),
     customer_name: Optional[str] = Query(None, description="Filter by customer name (partial match)"),
@@ -280,13 +336,62 @@ def outstanding_sales(
     - Super admin → all businesses or filtered by ?business_id=
     - Defaults to current month if no dates provided
     """
-    return service.outstanding_sales_service(
-        db=db,
-        current_user=current_user,
-        start_date=start_date,
-        end_date=end_date,
-        customer_name=customer_name,
-        business_id=business_id
+    return cached_report(
+        request,
+        current_user,
+        report="outstanding",
+        params={"start_date": start_date, "end_date": end_date, "customer_name": customer_name},
+        business_id=business_id,
+        period_end=end_date,
+        compute=lambda: service.outstanding_sales_service(
+            db=db,
+            current_user=current_user,
+            start_date=start_date,
+            end_date=end_date,
+            customer_name=customer_name,
+            business_id=business_id
+        ),
+    )
+
+
+
+
+@router.get(
+    "/receivables/aging",
+    response_model=schemas.ReceivablesAgingResponse
+)
+def receivables_aging(
+    request: Request,
+    as_of: Optional[date] = Query(None, description="Age balances as of this day (default today)"),
+    business_id: Optional[int] = Query(
+        None,
+        description="Business to report on (required for super admin)"
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserDisplaySchema = Depends(
+        role_required(["user", "manager", "admin", "super_admin"])
+    )
+):
+    """
+    Unpaid balances of all sales, grouped per customer and bucketed into
+    current, 1-30, 31-60, 61-90 and 90+ days old.
+    """
+    # Resolve the default here so the cache key names the actual day
+    as_of = as_of or datetime.now(LAGOS_TZ).date()
+
+    return cached_report(
+        request,
+        current_user,
+        report="receivables_aging",
+        params={"as_of": as_of},
+        business_id=business_id,
+        period_end=as_of,
+        compute=lambda: service.receivables_aging_service(
+            db=db,
+            current_user=current_user,
+            as_of=as_of,
+            business_id=business_id
+        ),
     )
 
 
@@ -416,6 +521,7 @@ def update_sale_header(
     response_model=schemas.SaleAnalysisOut
 )
 def sales_analysis(
+    request: Request,
     start_date: Optional[date] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="End date (YYYY-MM-DD)"),
     product_id: Optional[int] = Query(None, description="Filter by specific product"),
@@ -435,12 +541,149 @@ def sales_analysis(
     - Managers/Admins → only their own business
     - Super admin → all businesses or filtered by ?business_id=
     """
-    return service.sales_analysis(
+    return cached_report(
+        request,
+        current_user,
+        report="sales_analysis",
+        params={"start_date": start_date, "end_date": end_date, "product_id": product_id},
+        business_id=business_id,
+        period_end=end_date,
+        compute=lambda: service.sales_analysis(
+            db=db,
+            current_user=current_user,
+            start_date=start_date,
+            end_date=end_date,
+            product_id=product_id,
+            business_id=business_id
+        ),
+    )
+
+
+
+@router.get("/analysis/abc", response_model=schemas.AbcAnalysisOut)
+def abc_analysis(
+    request: Request,
+    start_date: Optional[date] = Query(None, description="Start date (YYYY-MM-DD); default all history"),
+    end_date: Optional[date] = Query(None, description="End date (YYYY-MM-DD); default today"),
+    a_share: float = Query(0.8, gt=0, lt=1, description="Cumulative share covered by class A"),
+    b_share: float = Query(0.95, gt=0, le=1, description="Cumulative share covered by classes A + B"),
+    business_id: Optional[int] = Query(
+        None,
+        description="Business to analyse (required for super admin)"
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserDisplaySchema = Depends(
+        role_required(["manager", "admin", "super_admin"])
+    )
+):
+    """
+    ABC / Pareto classification of products by net sales and by margin.
+
+    - Ranks, shares and cumulative shares are computed in SQL
+    - Each product gets a sales class and a margin class (A / B / C)
+    - Includes stock on hand, so slow C items with stock stand out
+    """
+    # Resolve the default here so the cache key names the actual day
+    end_date = end_date or datetime.now(LAGOS_TZ).date()
+
+    return cached_report(
+        request,
+        current_user,
+        report="abc_analysis",
+        params={"start_date": start_date, "end_date": end_date, "a_share": a_share, "b_share": b_share},
+        business_id=business_id,
+        period_end=end_date,
+        compute=lambda: service.abc_analysis(
+            db=db,
+            current_user=current_user,
+            start_date=start_date,
+            end_date=end_date,
+            a_share=a_share,
+            b_share=b_share,
+            business_id=business_id
+        ),
+    )
+
+
+@router.get("/heatmap", response_model=schemas.SalesHeatmapOut)
+def sales_heatmap(
+    request: Request,
+    start_date: Optional[date] = Query(None, description="Start date (YYYY-MM-DD); default 12 weeks back"),
+    end_date: Optional[date] = Query(None, description="End date (YYYY-MM-DD); default today"),
+    staff_id: Optional[int] = Query(None, description="Only sales made by this user"),
+    business_id: Optional[int] = Query(
+        None,
+        description="Business to analyse (required for super admin)"
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserDisplaySchema = Depends(
+        role_required(["manager", "admin", "super_admin"])
+    )
+):
+    """
+    Sales by Lagos weekday × hour of day, for staff scheduling.
+
+    - Count, net total and average sale for each of the 168 cells
+    - Weekday and hour totals plus the busiest cell
+    """
+    # Resolve the defaults here so the cache key names the actual window
+    end_date = end_date or datetime.now(LAGOS_TZ).date()
+    start_date = start_date or end_date - timedelta(weeks=12) + timedelta(days=1)
+
+    return cached_report(
+        request,
+        current_user,
+        report="sales_heatmap",
+        params={"start_date": start_date, "end_date": end_date, "staff_id": staff_id},
+        business_id=business_id,
+        period_end=end_date,
+        compute=lambda: service.sales_heatmap(
+            db=db,
+            current_user=current_user,
+            start_date=start_date,
+            end_date=end_date,
+            staff_id=staff_id,
+            business_id=business_id
+        ),
+    )
+
+
+@router.get("/cube", response_model=schemas.SalesCubeOut)
+def sales_cube(
+    dimensions: str = Query(
+        "product",
+        description="Comma separated: product, category, staff, day, week, month, payment_method"
+    ),
+    measures: str = Query(
+        "qty,gross,discount,net,cost,margin",
+        description="Comma separated: qty, gross, discount, net, cost, margin"
+    ),
+    mode: str = Query("rollup", description="rollup | cube | sets"),
+    start_date: Optional[date] = Query(None, description="Start date (YYYY-MM-DD), default: start of month"),
+    end_date: Optional[date] = Query(None, description="End date (YYYY-MM-DD), default: today"),
+    business_id: Optional[int] = Query(
+        None,
+        description="Filter by specific business (super admin only)"
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserDisplaySchema = Depends(
+        role_required(["manager", "admin", "super_admin"])
+    )
+):
+    """
+    Pivot-ready sales aggregates in one round trip.
+
+    Each row carries `grouped_by` (the dimensions it is broken down by);
+    subtotal rows and the grand total have fewer (or no) dimensions.
+    """
+    return service.sales_cube(
         db=db,
         current_user=current_user,
+        dimensions=[d.strip() for d in dimensions.split(",") if d.strip()],
+        measures=[m.strip() for m in measures.split(",") if m.strip()],
+        mode=mode,
         start_date=start_date,
         end_date=end_date,
-        product_id=product_id,
         business_id=business_id
     )
 
@@ -574,15 +817,15 @@ def delete_sale(
 
 
 
-@router.delete("/business/{business_id}/sales/all")
+@router.delete("/business/{business_id}/sales/all", response_model=JobOut, status_code=202)
 def delete_all_sales_of_business(
     business_id: int,
-    db: Session = Depends(get_db),
     current_user: UserDisplaySchema = Depends(role_required(["super_admin"]))
 ):
     """
     SUPER DANGEROUS – only super admin.
     Deletes ALL sales of ONE specific business and restores stock.
+    Runs in the background in batches; poll GET /jobs/{id}.
     """
     # Only super admin can run this
     if "super_admin" not in current_user.roles:
@@ -591,9 +834,15 @@ def delete_all_sales_of_business(
     # Optional: require confirmation token / second factor
     # if not confirmed: raise 400 "Confirmation required"
 
-    count = service.delete_all_sales_of_business(db, business_id)
+    # One wipe per business at a time (two would restore stock twice)
+    running = find_running(f"wipe_sales:{business_id}")
+    if running:
+        return running
 
-    return {
-        "message": f"All {count} sales of business {business_id} deleted and stock restored",
-        "deleted_count": count
-    }
\ No newline at end of file
+    return submit_job(
+        f"wipe_sales:{business_id}",
+        service.delete_all_sales_of_business,
+        business_id,
+        owner_id=current_user.id,
+        business_id=business_id,
+    )
\ No newline at end of file
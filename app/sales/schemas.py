@@ -1,6 +1,7 @@
-from pydantic import BaseModel, validator
-from typing import List, Optional
+from pydantic import BaseModel, Field, validator
+from typing import Any, Dict, List, Optional
 from datetime import datetime, date
+from zoneinfo import ZoneInfo
 
 from pydantic import BaseModel, computed_field
 
@@ -208,6 +209,74 @@ class SaleAnalysisOut(BaseModel):
     total_margin: float
 
 
+class AbcItem(BaseModel):
+    product_id: int
+    product_name: str
+    sku: Optional[str] = None
+    quantity_sold: float
+    net_sales: float
+    cost_of_sales: float
+    margin: float
+    sales_rank: int
+    margin_rank: int
+    sales_share: Optional[float] = None
+    cumulative_sales_share: Optional[float] = None
+    margin_share: Optional[float] = None            # of total positive margin
+    cumulative_margin_share: Optional[float] = None
+    sales_class: str                                # A / B / C
+    margin_class: str
+    stock_on_hand: float
+
+
+class AbcClassSummary(BaseModel):
+    abc_class: str
+    products_by_sales: int
+    net_sales: float
+    products_by_margin: int
+    margin: float
+
+
+class AbcAnalysisOut(BaseModel):
+    business_id: int
+    start_date: Optional[date] = None   # None → all history
+    end_date: date
+    a_share: float
+    b_share: float
+    total_sales: float
+    total_margin: float
+    classes: List[AbcClassSummary]
+    items: List[AbcItem]                # by net sales, highest first
+
+
+class HeatmapCell(BaseModel):
+    weekday: int            # 1 = Monday … 7 = Sunday (Lagos time)
+    weekday_name: str
+    hour: int               # 0–23
+    sales_count: int
+    net_total: float
+    average_sale: float
+
+
+class HeatmapTotal(BaseModel):
+    key: int
+    label: str
+    sales_count: int
+    net_total: float
+
+
+class SalesHeatmapOut(BaseModel):
+    business_id: int
+    start_date: date
+    end_date: date
+    staff_id: Optional[int] = None
+    total_sales: int
+    net_total: float
+    busiest: Optional[HeatmapCell] = None
+    cells: List[HeatmapCell]        # 7 × 24, Monday 00:00 first
+    by_weekday: List[HeatmapTotal]
+    by_hour: List[HeatmapTotal]
+
+
 class SaleUpdate(BaseModel):
     customer_name: Optional[str] = None
     customer_phone: Optional[str] = None
@@ -287,6 +356,29 @@ class OutstandingSalesResponse(BaseModel):
     summary: OutstandingSummary
 
 
+class AgingBuckets(BaseModel):
+    current: float          # sold on the as-of day
+    days_1_30: float
+    days_31_60: float
+    days_61_90: float
+    days_over_90: float
+    total: float
+
+
+class ReceivableAgingCustomer(AgingBuckets):
+    customer_id: Optional[int] = None   # None → walk-in / unnamed sales
+    customer_name: str
+    customer_phone: Optional[str] = None
+    invoices: int
+    oldest_sold_at: datetime
+
+
+class ReceivablesAgingResponse(BaseModel):
+    as_of: date
+    customers: List[ReceivableAgingCustomer]
+    totals: AgingBuckets
+
+
 
 
 class ItemSoldOut(BaseModel):
@@ -322,3 +414,54 @@ class ItemSoldSummary(BaseModel):
 class ItemSoldResponse(BaseModel):
     sales: List[SaleOut]   # 👈 NOT models.Sale
     summary: ItemSoldSummary
+
+
+
+# ---------- Sales Cube ----------
+class SalesCubeRow(BaseModel):
+    grouped_by: List[str]                     # dimensions this row is broken down by
+    dimensions: Dict[str, Any]                # e.g. {"product_id": 3, "product_name": "..."}
+    measures: Dict[str, float]
+
+
+class SalesCubeOut(BaseModel):
+    start_date: date
+    end_date: date
+    mode: str
+    dimensions: List[str]
+    measures: List[str]
+    rows: List[SalesCubeRow]
+
+
+
+# ---------- Offline POS batch upload ----------
+class SaleBatchEntry(SaleFullCreate):
+    idempotency_key: str = Field(..., min_length=8, max_length=100)  # generated by the till
+    sold_at: Optional[datetime] = None       # when the till rang it up (offline sales)
+
+    @validator("sold_at")
+    def sold_at_lagos(cls, v):
+        # Tills without a timezone send Lagos wall time
+        if v is not None and v.tzinfo is None:
+            return v.replace(tzinfo=ZoneInfo("Africa/Lagos"))
+        return v
+
+
+class SaleBatchCreate(BaseModel):
+    sales: List[SaleBatchEntry] = Field(..., min_length=1, max_length=500)
+
+
+class SaleBatchResult(BaseModel):
+    idempotency_key: str
+    status: str                               # created | duplicate | rejected
+    invoice_no: Optional[int] = None
+    sale: Optional[SaleOut] = None
+    warnings: List[str] = []
+    error: Optional[str] = None
+
+
+class SaleBatchOut(BaseModel):
+    created: int
+    duplicates: int
+    rejected: int
+    results: List[SaleBatchResult]
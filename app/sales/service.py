@@ -32,6 +32,7 @@ from sqlalchemy import text
 
 from app.purchase.models import Purchase
 from app.purchase import  models as purchase_models
+from app.customers.service import get_or_create_customer_id, customer_ids_matching
 
 from datetime import datetime, time
 from zoneinfo import ZoneInfo
@@ -41,6 +42,33 @@ LAGOS_TZ = ZoneInfo("Africa/Lagos")
 
 
 
+def _sale_business_id(current_user: UserDisplaySchema, business_id: int | None) -> int:
+    """Business a new sale belongs to (create_sale_full / create_sales_batch)."""
+    if "super_admin" in current_user.roles:
+
+        if not business_id:
+            raise HTTPException(
+                status_code=400,
+                detail="Super admin must provide business_id"
+            )
+
+        return business_id
+
+    if not current_user.business_id:
+        raise HTTPException(
+            status_code=403,
+            detail="User does not belong to any business"
+        )
+
+    if business_id and business_id != current_user.business_id:
+        raise HTTPException(
+            status_code=403,
+            detail="Cannot create sale for another business"
+        )
+
+    return current_user.business_id
+
+
 def create_sale_full(
     db: Session,
     sale_data: schemas.SaleFullCreate,
@@ -64,31 +92,7 @@ def create_sale_full(
     # 1️⃣ Determine Business (Tenant Safety)
     # ─────────────────────────────────────────
 
-    if "super_admin" in current_user.roles:
-
-        if not business_id:
-            raise HTTPException(
-                status_code=400,
-                detail="Super admin must provide business_id"
-            )
-
-        target_business_id = business_id
-
-    else:
-
-        if not current_user.business_id:
-            raise HTTPException(
-                status_code=403,
-                detail="User does not belong to any business"
-            )
-
-        target_business_id = current_user.business_id
-
-        if business_id and business_id != target_business_id:
-            raise HTTPException(
-                status_code=403,
-                detail="Cannot create sale for another business"
-            )
+    target_business_id = _sale_business_id(current_user, business_id)
 
     # ─────────────────────────────────────────
     # 2️⃣ Create Sale Header
@@ -100,6 +104,9 @@ def create_sale_full(
         customer_name=sale_data.customer_name.strip()
         if sale_data.customer_name else None,
         customer_phone=sale_data.customer_phone,
+        customer_id=get_or_create_customer_id(
+            db, target_business_id, sale_data.customer_name, sale_data.customer_phone
+        ),
         ref_no=sale_data.ref_no,
         sold_by=current_user.id,
         total_amount=0.0,
@@ -258,6 +265,7 @@ def create_sale_full(
             gross_amount=gross,
             discount=discount,
             net_amount=net,
+            sold_at=sale.sold_at,
         )
 
         db.add(sale_item)
@@ -301,6 +309,323 @@ def create_sale_full(
 
 
 
+# ============================================================
+# OFFLINE POS BATCH UPLOAD (idempotent, one transaction)
+# ============================================================
+from datetime import timedelta
+from app.stock.inventory.models import Inventory
+
+SALES_BATCH_LOCK = 36001          # pg_advisory_xact_lock class id
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+
+def _sale_out(sale: models.Sale, items: list, products: dict) -> schemas.SaleOut:
+    return schemas.SaleOut(
+        id=sale.id,
+        invoice_no=sale.invoice_no,
+        invoice_date=sale.invoice_date,
+        customer_name=sale.customer_name,
+        customer_phone=sale.customer_phone,
+        ref_no=sale.ref_no,
+        total_amount=sale.total_amount,
+        sold_by=sale.sold_by,
+        sold_at=sale.sold_at,
+        items=[
+            schemas.SaleItemOut(
+                id=item.id,
+                sale_invoice_no=item.sale_invoice_no,
+                product_id=item.product_id,
+                product_name=products[item.product_id].name,
+                sku=products[item.product_id].sku,
+                barcode=products[item.product_id].barcode,
+                quantity=item.quantity,
+                selling_price=item.selling_price,
+                gross_amount=item.gross_amount,
+                discount=item.discount,
+                net_amount=item.net_amount,
+            )
+            for item in items
+        ],
+    )
+
+
+def _load_batch_products(db: Session, business_id: int, entries: list) -> tuple:
+    """All products referenced by the batch: three queries, not three per item."""
+    ids, barcodes, skus = set(), set(), set()
+    for entry in entries:
+        for item in entry.items:
+            if item.product_id:
+                ids.add(item.product_id)
+            elif item.barcode:
+                barcodes.add(item.barcode)
+            elif item.sku:
+                skus.add(item.sku)
+
+    base = db.query(product_models.Product).filter(
+        product_models.Product.business_id == business_id,
+        product_models.Product.is_active == True
+    )
+    by_id = {p.id: p for p in base.filter(product_models.Product.id.in_(ids))} if ids else {}
+    by_barcode = {p.barcode: p for p in base.filter(product_models.Product.barcode.in_(barcodes))} if barcodes else {}
+    by_sku = {p.sku: p for p in base.filter(product_models.Product.sku.in_(skus))} if skus else {}
+    return by_id, by_barcode, by_sku
+
+
+def _resolve_batch_item(item, by_id: dict, by_barcode: dict, by_sku: dict):
+    """Same identification rules as create_sale_full; raises ValueError."""
+    if item.product_id:
+        product = by_id.get(item.product_id)
+        if not product:
+            raise ValueError(f"Product ID {item.product_id} not found")
+        if item.barcode and item.barcode != product.barcode:
+            raise ValueError(f"Barcode mismatch for product '{product.name}'")
+        if item.sku and item.sku != product.sku:
+            raise ValueError(f"SKU mismatch for product '{product.name}'")
+        return product
+
+    if item.barcode:
+        product = by_barcode.get(item.barcode)
+        if not product:
+            raise ValueError(f"Product with barcode '{item.barcode}' not found")
+        return product
+
+    if item.sku:
+        product = by_sku.get(item.sku)
+        if not product:
+            raise ValueError(f"Product with SKU '{item.sku}' not found")
+        return product
+
+    raise ValueError("Product identifier required (product_id, barcode, or sku)")
+
+
+def create_sales_batch(
+    db: Session,
+    batch: schemas.SaleBatchCreate,
+    current_user: UserDisplaySchema,
+    business_id: int | None = None,
+) -> schemas.SaleBatchOut:
+    """
+    Upload many sales at once (tills replaying an offline backlog).
+
+    - Every sale carries a client idempotency key; a key seen before is
+      answered from the stored result (status "duplicate").
+    - Invalid sales are "rejected" without writing anything; the rest are
+      created in ONE transaction.
+    - Products, latest purchase costs and inventory rows are loaded once
+      for the whole batch; stock is deducted in memory and flushed once.
+    """
+    target_business_id = _sale_business_id(current_user, business_id)
+
+    # Serialise batches per business: concurrent replays of the same key
+    # must not both pass the "seen before?" check.
+    db.execute(
+        text("SELECT pg_advisory_xact_lock(:lock_class, :business_id)"),
+        {"lock_class": SALES_BATCH_LOCK, "business_id": target_business_id}
+    )
+
+    keys = [entry.idempotency_key for entry in batch.sales]
+    stored = {
+        row.idempotency_key: row.result
+        for row in db.query(models.SaleIdempotencyKey).filter(
+            models.SaleIdempotencyKey.business_id == target_business_id,
+            models.SaleIdempotencyKey.idempotency_key.in_(keys)
+        )
+    }
+
+    results = {}        # position in batch → SaleBatchResult
+    pending = []        # (position, entry, [(item_data, product)])
+    seen = {}           # key → first position in this batch
+
+    by_id, by_barcode, by_sku = _load_batch_products(
+        db, target_business_id,
+        [e for e in batch.sales if e.idempotency_key not in stored]
+    )
+    now = datetime.now(LAGOS_TZ)
+
+    for position, entry in enumerate(batch.sales):
+        key = entry.idempotency_key
+
+        if key in stored:
+            results[position] = schemas.SaleBatchResult(**{**stored[key], "status": "duplicate"})
+            continue
+        if key in seen:
+            continue  # answered from the first occurrence below
+
+        seen[key] = position
+        try:
+            if entry.sold_at and entry.sold_at > now + MAX_CLOCK_SKEW:
+                raise ValueError("sold_at is in the future")
+            lines = [(item, _resolve_batch_item(item, by_id, by_barcode, by_sku)) for item in entry.items]
+            if not lines:
+                raise ValueError("Sale has no items")
+        except ValueError as e:
+            results[position] = schemas.SaleBatchResult(
+                idempotency_key=key, status="rejected", error=str(e)
+            )
+            continue
+
+        pending.append((position, entry, lines))
+
+    if pending:
+        products = {product.id: product for _, _, lines in pending for _, product in lines}
+        product_ids = set(products)
+
+        # Invoice numbers up front: one round trip, and items can reference
+        # their sale before anything is flushed
+        invoice_numbers = [
+            row[0] for row in db.execute(
+                text(
+                    "SELECT nextval(pg_get_serial_sequence('sales', 'invoice_no')) "
+                    "FROM generate_series(1, :n)"
+                ),
+                {"n": len(pending)}
+            )
+        ]
+
+        # Latest purchase cost per product (DISTINCT ON), falling back to product.cost_price
+        latest_costs = dict(
+            db.query(purchase_models.PurchaseItem.product_id, purchase_models.PurchaseItem.cost_price)
+            .join(purchase_models.Purchase)
+            .filter(
+                purchase_models.PurchaseItem.product_id.in_(product_ids),
+                purchase_models.Purchase.business_id == target_business_id
+            )
+            .distinct(purchase_models.PurchaseItem.product_id)
+            .order_by(purchase_models.PurchaseItem.product_id, purchase_models.PurchaseItem.id.desc())
+            .all()
+        )
+
+        # Lock inventory rows in id order (no deadlocks with other checkouts)
+        inventory = {
+            inv.product_id: inv
+            for inv in db.query(Inventory)
+            .filter(
+                Inventory.business_id == target_business_id,
+                Inventory.product_id.in_(product_ids)
+            )
+            .order_by(Inventory.id)
+            .with_for_update()
+        }
+
+        created = []    # (position, entry, sale, [SaleItem], warnings)
+        customer_ids = {}   # (name, phone) → customer id, one lookup per customer
+
+        for (position, entry, lines), invoice_no in zip(pending, invoice_numbers):
+            customer = (entry.customer_name, entry.customer_phone)
+            if customer not in customer_ids:
+                customer_ids[customer] = get_or_create_customer_id(db, target_business_id, *customer)
+
+            sale = models.Sale(
+                business_id=target_business_id,
+                invoice_no=invoice_no,
+                invoice_date=datetime.combine(entry.invoice_date, time.min),
+                customer_name=entry.customer_name.strip() if entry.customer_name else None,
+                customer_phone=entry.customer_phone,
+                customer_id=customer_ids[customer],
+                ref_no=entry.ref_no,
+                sold_by=current_user.id,
+                sold_at=entry.sold_at or now,
+                total_amount=0.0,
+            )
+            sale_items = []
+            warnings_list = []
+
+            for item_data, product in lines:
+                stock = inventory.get(product.id)
+                if stock is None:
+                    stock = Inventory(
+                        product_id=product.id,
+                        business_id=target_business_id,
+                        opening_stock=0,
+                        quantity_in=0,
+                        quantity_out=0,
+                        adjustment_total=0,
+                        current_stock=0,
+                    )
+                    db.add(stock)
+                    inventory[product.id] = stock
+
+                available = stock.current_stock or 0
+                if available < item_data.quantity:
+                    warnings_list.append(
+                        f"Low stock warning: {product.name} "
+                        f"(Available: {available}, Requested: {item_data.quantity})"
+                    )
+
+                stock.quantity_out = (stock.quantity_out or 0) + item_data.quantity
+                stock.current_stock = inventory_service.calculate_current_stock(stock)
+
+                selling_price = item_data.selling_price or product.selling_price
+                gross = item_data.quantity * selling_price
+                discount = item_data.discount or 0.0
+                net = gross - discount
+
+                sale_items.append(models.SaleItem(
+                    sale_invoice_no=invoice_no,
+                    product_id=product.id,
+                    quantity=item_data.quantity,
+                    selling_price=selling_price,
+                    cost_price=latest_costs.get(product.id, product.cost_price or 0.0),
+                    total_amount=net,
+                    gross_amount=gross,
+                    discount=discount,
+                    net_amount=net,
+                    sold_at=sale.sold_at,
+                ))
+                sale.total_amount += net
+
+            sale.items.extend(sale_items)
+            db.add(sale)
+            created.append((position, entry, sale, sale_items, warnings_list))
+
+        try:
+            db.flush()
+
+            for position, entry, sale, sale_items, warnings_list in created:
+                result = schemas.SaleBatchResult(
+                    idempotency_key=entry.idempotency_key,
+                    status="created",
+                    invoice_no=sale.invoice_no,
+                    sale=_sale_out(sale, sale_items, products),
+                    warnings=warnings_list,
+                )
+                results[position] = result
+                db.add(models.SaleIdempotencyKey(
+                    business_id=target_business_id,
+                    idempotency_key=entry.idempotency_key,
+                    sale_invoice_no=sale.invoice_no,
+                    result=result.model_dump(mode="json"),
+                ))
+
+            db.commit()
+
+        except IntegrityError as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail=f"Database error during batch upload: {str(e.orig)}"
+            )
+    else:
+        db.commit()  # release the advisory lock
+
+    # Repeats inside the same batch get the first occurrence's outcome
+    for position, entry in enumerate(batch.sales):
+        if position not in results:
+            first = results[seen[entry.idempotency_key]]
+            status = "rejected" if first.status == "rejected" else "duplicate"
+            results[position] = first.model_copy(update={"status": status})
+
+    ordered = [results[position] for position in range(len(batch.sales))]
+    return schemas.SaleBatchOut(
+        created=sum(1 for r in ordered if r.status == "created"),
+        duplicates=sum(1 for r in ordered if r.status == "duplicate"),
+        rejected=sum(1 for r in ordered if r.status == "rejected"),
+        results=ordered,
+    )
+
+
+
+
 # ============================================================
 # ADD SINGLE ITEM TO EXISTING SALE
 # ============================================================
@@ -407,6 +732,7 @@ def create_sale_item(
         discount=discount,
         net_amount=net_amount,
         total_amount=net_amount,  # net by default
+        sold_at=sale.sold_at,  # same partition as the sale header
     )
 
     db.add(sale_item)
@@ -693,24 +1019,14 @@ def get_sale_by_invoice_no(
 
 LAGOS_TZ = ZoneInfo("Africa/Lagos")
 
-def list_sales(
-    db: Session,
+def _sales_list_filters(
     current_user: UserDisplaySchema,
-    skip: int = 0,
-    limit: int = 100,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     business_id: Optional[int] = None,
-) -> schemas.SalesListResponse:
-
-    # ─── Base Query ──────────────────────────────────
-    query = (
-        db.query(models.Sale)
-        .options(
-            selectinload(models.Sale.items).selectinload(models.SaleItem.product),
-            selectinload(models.Sale.payments),
-        )
-    )
+) -> list:
+    """Tenant isolation + date range shared by list_sales and export_sales."""
+    filters = []
 
     # ─── Tenant Isolation ────────────────────────────
     if "super_admin" in current_user.roles:
@@ -721,7 +1037,7 @@ def list_sales(
                 detail="Super admin must specify business_id"
             )
 
-        query = query.filter(models.Sale.business_id == business_id)
+        filters.append(models.Sale.business_id == business_id)
 
     else:
         if not current_user.business_id:
@@ -730,16 +1046,39 @@ def list_sales(
                 detail="User does not belong to any business"
             )
 
-        query = query.filter(models.Sale.business_id == current_user.business_id)
+        filters.append(models.Sale.business_id == current_user.business_id)
 
     # ─── Date Filters ────────────────────────────────
     if start_date:
         start_datetime = datetime.combine(start_date, time.min, tzinfo=LAGOS_TZ)
-        query = query.filter(models.Sale.sold_at >= start_datetime)
+        filters.append(models.Sale.sold_at >= start_datetime)
 
     if end_date:
         end_datetime = datetime.combine(end_date, time.max, tzinfo=LAGOS_TZ)
-        query = query.filter(models.Sale.sold_at <= end_datetime)
+        filters.append(models.Sale.sold_at <= end_datetime)
+
+    return filters
+
+
+def list_sales(
+    db: Session,
+    current_user: UserDisplaySchema,
+    skip: int = 0,
+    limit: int = 100,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    business_id: Optional[int] = None,
+) -> schemas.SalesListResponse:
+
+    # ─── Base Query ──────────────────────────────────
+    query = (
+        db.query(models.Sale)
+        .options(
+            selectinload(models.Sale.items).selectinload(models.SaleItem.product),
+            selectinload(models.Sale.payments),
+        )
+        .filter(*_sales_list_filters(current_user, start_date, end_date, business_id))
+    )
 
     # ─── Order + Pagination ──────────────────────────
     query = query.order_by(models.Sale.sold_at.desc())
@@ -821,6 +1160,65 @@ def list_sales(
     )
 
 
+from app.core.exports import EXPORT_FETCH_SIZE, export_response
+
+SALES_EXPORT_HEADERS = [
+    "Invoice No", "Sold At", "Invoice Date", "Customer", "Customer Phone",
+    "Ref No", "Total Amount", "Total Paid", "Balance Due", "Payment Status",
+]
+
+
+def export_sales(
+    current_user: UserDisplaySchema,
+    fmt: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    business_id: Optional[int] = None,
+):
+    """Same rows as list_sales, unpaginated, streamed as csv / xlsx."""
+    filters = _sales_list_filters(current_user, start_date, end_date, business_id)
+
+    def build_rows(db: Session):
+        total_paid = (
+            db.query(func.coalesce(func.sum(Payment.amount_paid), 0))
+            .filter(Payment.sale_invoice_no == models.Sale.invoice_no)
+            .correlate(models.Sale)
+            .scalar_subquery()
+        )
+        query = (
+            db.query(
+                models.Sale.invoice_no,
+                models.Sale.sold_at,
+                models.Sale.invoice_date,
+                models.Sale.customer_name,
+                models.Sale.customer_phone,
+                models.Sale.ref_no,
+                models.Sale.total_amount,
+                total_paid,
+            )
+            .filter(*filters)
+            .order_by(models.Sale.sold_at.desc())
+            .yield_per(EXPORT_FETCH_SIZE)
+        )
+
+        for invoice_no, sold_at, invoice_date, customer, phone, ref_no, total, paid in query:
+            total = float(total or 0)
+            paid = float(paid or 0)
+            balance = total - paid
+
+            if paid == 0:
+                status = "pending"
+            elif balance > 0:
+                status = "part_paid"
+            else:
+                status = "completed"
+
+            yield [invoice_no, sold_at, invoice_date, customer or "Walk-in", phone,
+                   ref_no, total, paid, balance, status]
+
+    return export_response(fmt, "sales", SALES_EXPORT_HEADERS, build_rows)
+
+
 
 
 
@@ -871,6 +1269,15 @@ def update_sale(
             # Optional: log or warn about ignored fields
             pass
 
+    # Re-link to the customer record when the name or phone changed
+    if {"customer_name", "customer_phone"} & update_data.keys():
+        sale.customer_id = get_or_create_customer_id(
+            db, sale.business_id, sale.customer_name, sale.customer_phone
+        )
+        # Through the relationship, so the report cache only drops this tenant
+        for payment in sale.payments:
+            payment.customer_id = sale.customer_id
+
     # ─── 4. Recalculate totals from items (net_amount based) ─────────
     sale.total_amount = sum(float(item.net_amount or 0) for item in sale.items)
 
@@ -990,46 +1397,38 @@ def update_sale_item(
 
     # ─── 5. Freeze new historical cost price (if product changed) ─────
     if new_product_id != old_product_id:
-        latest_purchase = db.query(purchase_models.Purchase).filter(
-            purchase_models.Purchase.product_id == new_product_id,
-            purchase_models.Purchase.business_id == target_business_id,
-        ).order_by(purchase_models.Purchase.id.desc()).first()
-        item.cost_price = latest_purchase.cost_price if latest_purchase else 0.0
+        latest_cost = (
+            db.query(purchase_models.PurchaseItem.cost_price)
+            .join(purchase_models.Purchase, purchase_models.Purchase.id == purchase_models.PurchaseItem.purchase_id)
+            .filter(
+                purchase_models.PurchaseItem.product_id == new_product_id,
+                purchase_models.Purchase.business_id == target_business_id,
+            )
+            .order_by(purchase_models.PurchaseItem.id.desc())
+            .limit(1)
+            .scalar()
+        )
+        item.cost_price = latest_cost if latest_cost is not None else (product.cost_price or 0.0)
 
     # ─── 6. Recalculate item amounts ─────────────────────────────────
     item.gross_amount = item.quantity * item.selling_price
     item.net_amount = item.gross_amount - (item.discount or 0)
     item.total_amount = item.net_amount
 
-    # ─── 7. Stock adjustment (reverse old → apply new) ───────────────
-    # Reverse old quantity
-    if old_quantity != item.quantity or old_product_id != new_product_id:
-        inventory_service.add_stock(   # add = reverse removal
-            db,
-            product_id=old_product_id,
-            quantity=old_quantity,     # putting back
-            current_user=current_user,
-            commit=False
-        )
+    # ─── 7. Stock: net quantity change per product, one statement ───
+    # (price/discount-only edits touch no inventory at all)
+    stock_delta = {old_product_id: -old_quantity}
+    stock_delta[new_product_id] = stock_delta.get(new_product_id, 0) + item.quantity
+    inventory_service.remove_stock_bulk(db, target_business_id, stock_delta)
 
-    # Apply new quantity
-    inventory_service.remove_stock(
-        db,
-        product_id=item.product_id,
-        quantity=item.quantity,
-        current_user=current_user,
-        commit=False
+    # ─── 8. Update sale total in SQL (no load of every line) ─────────
+    db.flush()
+    sale.total_amount = float(
+        db.query(func.coalesce(func.sum(models.SaleItem.net_amount), 0))
+        .filter(models.SaleItem.sale_invoice_no == invoice_no)
+        .scalar()
     )
 
-    # ─── 8. Update sale totals ───────────────────────────────────────
-    sale.total_amount = sum(float(i.net_amount or 0) for i in sale.items)
-
-    total_paid = sum(float(p.amount_paid or 0) for p in (sale.payments or []))
-    balance_due = sale.total_amount - total_paid
-
-    # If Sale model has balance_due field:
-    # sale.balance_due = balance_due
-
     # ─── 9. Commit everything atomically ─────────────────────────────
     try:
         db.commit()
@@ -1223,9 +1622,9 @@ def outstanding_sales_service(
         end_dt = datetime.combine(end_date, time.max, tzinfo=LAGOS_TZ)
         query = query.filter(models.Sale.sold_at <= end_dt)
 
-    # ─── 4. Customer name filter ──────────────────────────────────────
+    # ─── 4. Customer name filter (trigram index on customers) ────────
     if customer_name:
-        query = query.filter(models.Sale.customer_name.ilike(f"%{customer_name}%"))
+        query = query.filter(models.Sale.customer_id.in_(customer_ids_matching(business_id, customer_name)))
 
     # ─── 5. Execute query ─────────────────────────────────────────────
     sales = query.all()
@@ -1295,6 +1694,114 @@ def outstanding_sales_service(
     )
 
 
+# ==============================
+# RECEIVABLES AGING
+# ==============================
+
+# Unpaid balance per sale as of a day (payments recorded after it do not
+# count), bucketed by age in Lagos days. ROLLUP adds the grand total row.
+RECEIVABLES_AGING_SQL = text("""
+    WITH paid AS (
+        SELECT p.sale_invoice_no, sum(p.amount_paid) AS paid
+        FROM payments p
+        WHERE p.business_id = :business_id
+          AND p.created_at < :cutoff
+        GROUP BY p.sale_invoice_no
+    ),
+    open_sales AS (
+        SELECT
+            s.customer_id,
+            s.sold_at,
+            s.total_amount - coalesce(paid.paid, 0) AS balance,
+            CAST(:as_of AS date) - CAST(s.sold_at AT TIME ZONE 'Africa/Lagos' AS date) AS age
+        FROM sales s
+        LEFT JOIN paid ON paid.sale_invoice_no = s.invoice_no
+        WHERE s.business_id = :business_id
+          AND s.sold_at < :cutoff
+          AND s.total_amount - coalesce(paid.paid, 0) > 0.005
+    )
+    SELECT
+        GROUPING(o.customer_id)                                   AS is_total,
+        o.customer_id,
+        c.name                                                    AS customer_name,
+        c.phone                                                   AS customer_phone,
+        count(*)                                                  AS invoices,
+        min(o.sold_at)                                            AS oldest_sold_at,
+        coalesce(sum(o.balance) FILTER (WHERE o.age <= 0), 0)              AS current,
+        coalesce(sum(o.balance) FILTER (WHERE o.age BETWEEN 1 AND 30), 0)  AS days_1_30,
+        coalesce(sum(o.balance) FILTER (WHERE o.age BETWEEN 31 AND 60), 0) AS days_31_60,
+        coalesce(sum(o.balance) FILTER (WHERE o.age BETWEEN 61 AND 90), 0) AS days_61_90,
+        coalesce(sum(o.balance) FILTER (WHERE o.age > 90), 0)              AS days_over_90,
+        sum(o.balance)                                            AS total
+    FROM open_sales o
+    LEFT JOIN customers c ON c.id = o.customer_id
+    GROUP BY ROLLUP ((o.customer_id, c.name, c.phone))
+    ORDER BY is_total, total DESC
+""")
+
+AGING_BUCKETS = ("current", "days_1_30", "days_31_60", "days_61_90", "days_over_90", "total")
+
+
+def receivables_aging_service(
+    db: Session,
+    current_user: UserDisplaySchema,
+    as_of: Optional[date] = None,
+    business_id: Optional[int] = None
+) -> schemas.ReceivablesAgingResponse:
+    """
+    Unpaid sale balances over the whole history, per customer,
+    in current / 1-30 / 31-60 / 61-90 / 90+ day buckets.
+    """
+    if "super_admin" in current_user.roles:
+        if business_id is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Super admin must specify business_id"
+            )
+    else:
+        if not current_user.business_id:
+            raise HTTPException(
+                status_code=403,
+                detail="Current user does not belong to any business"
+            )
+        business_id = current_user.business_id
+
+    as_of = as_of or datetime.now(LAGOS_TZ).date()
+    cutoff = datetime.combine(as_of + timedelta(days=1), time.min, tzinfo=LAGOS_TZ)
+
+    rows = db.execute(
+        RECEIVABLES_AGING_SQL,
+        {"business_id": business_id, "as_of": as_of, "cutoff": cutoff}
+    ).mappings().all()
+
+    customers = []
+    totals = {bucket: 0.0 for bucket in AGING_BUCKETS}
+
+    for row in rows:
+        buckets = {bucket: round(float(row[bucket] or 0), 2) for bucket in AGING_BUCKETS}
+
+        if row["is_total"]:
+            totals = buckets
+            continue
+
+        customers.append(
+            schemas.ReceivableAgingCustomer(
+                customer_id=row["customer_id"],
+                customer_name=row["customer_name"] or "Walk-in",
+                customer_phone=row["customer_phone"],
+                invoices=row["invoices"],
+                oldest_sold_at=row["oldest_sold_at"].astimezone(LAGOS_TZ),
+                **buckets
+            )
+        )
+
+    return schemas.ReceivablesAgingResponse(
+        as_of=as_of,
+        customers=customers,
+        totals=schemas.AgingBuckets(**totals)
+    )
+
+
 
 # ==============================
 # SERVICE
@@ -1352,13 +1859,20 @@ def sales_analysis(
         query = query.filter(models.Sale.business_id == current_user.business_id)
 
     # ─── 3. Date filters ──────────────────────────────────────────────
+    # SaleItem.sold_at repeats the bound so both sides prune partitions
     if start_date:
         start_dt = datetime.combine(start_date, time.min, tzinfo=LAGOS_TZ)
-        query = query.filter(models.Sale.sold_at >= start_dt)
+        query = query.filter(
+            models.Sale.sold_at >= start_dt,
+            models.SaleItem.sold_at >= start_dt
+        )
 
     if end_date:
         end_dt = datetime.combine(end_date, time.max, tzinfo=LAGOS_TZ)
-        query = query.filter(models.Sale.sold_at <= end_dt)
+        query = query.filter(
+            models.Sale.sold_at <= end_dt,
+            models.SaleItem.sold_at <= end_dt
+        )
 
     # ─── 4. Product filter ────────────────────────────────────────────
     if product_id:
@@ -1424,6 +1938,259 @@ def sales_analysis(
     )
 
 
+# ==============================
+# ABC / PARETO ANALYSIS
+# ==============================
+
+# One aggregate pass over the lines (both sides bounded on sold_at so
+# partitions prune), then window functions over the per-product rows.
+# A product's class comes from the cumulative share BEFORE it, so the
+# product that crosses the A threshold is still an A.
+ABC_ANALYSIS_SQL = text("""
+    WITH per_product AS (
+        SELECT si.product_id,
+               SUM(si.quantity) AS quantity_sold,
+               SUM(si.selling_price * si.quantity) - SUM(COALESCE(si.discount, 0)) AS net_sales,
+               SUM(si.cost_price * si.quantity) AS cost_of_sales
+        FROM sale_items si
+        JOIN sales s ON s.invoice_no = si.sale_invoice_no
+        WHERE s.business_id = :business_id
+          AND s.sold_at >= :start_dt AND si.sold_at >= :start_dt
+          AND s.sold_at < :end_dt AND si.sold_at < :end_dt
+        GROUP BY si.product_id
+        HAVING SUM(si.quantity) <> 0
+    ),
+    ranked AS (
+        SELECT pp.*,
+               pp.net_sales - pp.cost_of_sales AS margin,
+               ROW_NUMBER() OVER by_sales AS sales_rank,
+               ROW_NUMBER() OVER by_margin AS margin_rank,
+               SUM(pp.net_sales) OVER by_sales AS cum_sales,
+               SUM(pp.net_sales - pp.cost_of_sales) OVER by_margin AS cum_margin,
+               SUM(pp.net_sales) OVER () AS total_sales,
+               SUM(GREATEST(pp.net_sales - pp.cost_of_sales, 0)) OVER () AS total_margin
+        FROM per_product pp
+        WINDOW by_sales AS (ORDER BY pp.net_sales DESC, pp.product_id ROWS UNBOUNDED PRECEDING),
+               by_margin AS (ORDER BY pp.net_sales - pp.cost_of_sales DESC, pp.product_id ROWS UNBOUNDED PRECEDING)
+    )
+    SELECT r.product_id,
+           p.name AS product_name,
+           p.sku,
+           r.quantity_sold,
+           r.net_sales,
+           r.cost_of_sales,
+           r.margin,
+           r.sales_rank,
+           r.margin_rank,
+           r.net_sales / NULLIF(r.total_sales, 0) AS sales_share,
+           r.cum_sales / NULLIF(r.total_sales, 0) AS cumulative_sales_share,
+           r.margin / NULLIF(r.total_margin, 0) AS margin_share,
+           r.cum_margin / NULLIF(r.total_margin, 0) AS cumulative_margin_share,
+           CASE
+               WHEN r.net_sales <= 0 OR r.total_sales <= 0 THEN 'C'
+               WHEN (r.cum_sales - r.net_sales) / r.total_sales < :a_share THEN 'A'
+               WHEN (r.cum_sales - r.net_sales) / r.total_sales < :b_share THEN 'B'
+               ELSE 'C'
+           END AS sales_class,
+           CASE
+               WHEN r.margin <= 0 OR r.total_margin <= 0 THEN 'C'
+               WHEN (r.cum_margin - r.margin) / r.total_margin < :a_share THEN 'A'
+               WHEN (r.cum_margin - r.margin) / r.total_margin < :b_share THEN 'B'
+               ELSE 'C'
+           END AS margin_class,
+           COALESCE(i.current_stock, 0) AS stock_on_hand
+    FROM ranked r
+    JOIN products p ON p.id = r.product_id
+    LEFT JOIN inventory i ON i.business_id = :business_id AND i.product_id = r.product_id
+    ORDER BY r.sales_rank
+""")
+
+
+def abc_analysis(
+    db: Session,
+    current_user: UserDisplaySchema,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    a_share: float = 0.8,
+    b_share: float = 0.95,
+    business_id: Optional[int] = None
+) -> schemas.AbcAnalysisOut:
+    """
+    Products ranked by net sales and by margin with cumulative shares and
+    A/B/C classes: A up to `a_share` of the total, B up to `b_share`, C
+    the rest. No start_date → all history; no end_date → today.
+    """
+    if not 0 < a_share < b_share <= 1:
+        raise HTTPException(status_code=400, detail="Thresholds must satisfy 0 < a_share < b_share <= 1")
+
+    if "super_admin" in current_user.roles:
+        if not business_id:
+            raise HTTPException(status_code=400, detail="Super admin must specify a business_id")
+    else:
+        if not current_user.business_id:
+            raise HTTPException(
+                status_code=403,
+                detail="Current user does not belong to any business"
+            )
+        business_id = current_user.business_id
+
+    end_date = end_date or datetime.now(LAGOS_TZ).date()
+    start_dt = (
+        datetime.combine(start_date, time.min, tzinfo=LAGOS_TZ)
+        if start_date else datetime(2000, 1, 1, tzinfo=LAGOS_TZ)
+    )
+    end_dt = datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=LAGOS_TZ)
+
+    rows = db.execute(
+        ABC_ANALYSIS_SQL,
+        {
+            "business_id": business_id,
+            "start_dt": start_dt,
+            "end_dt": end_dt,
+            "a_share": a_share,
+            "b_share": b_share,
+        }
+    ).mappings().all()
+
+    items = [schemas.AbcItem(**row) for row in rows]
+
+    classes = []
+    for label in ("A", "B", "C"):
+        by_sales = [item for item in items if item.sales_class == label]
+        by_margin = [item for item in items if item.margin_class == label]
+        classes.append(
+            schemas.AbcClassSummary(
+                abc_class=label,
+                products_by_sales=len(by_sales),
+                net_sales=sum(item.net_sales for item in by_sales),
+                products_by_margin=len(by_margin),
+                margin=sum(item.margin for item in by_margin),
+            )
+        )
+
+    return schemas.AbcAnalysisOut(
+        business_id=business_id,
+        start_date=start_date,
+        end_date=end_date,
+        a_share=a_share,
+        b_share=b_share,
+        total_sales=sum(item.net_sales for item in items),
+        total_margin=sum(item.margin for item in items),
+        classes=classes,
+        items=items,
+    )
+
+
+# ==============================
+# WEEKDAY × HOUR HEATMAP
+# ==============================
+
+# One range scan of idx_sales_business_soldat (or the staff index when
+# filtered), bucketed in Lagos local time. ISODOW: 1 = Monday … 7 = Sunday.
+SALES_HEATMAP_SQL = text("""
+    SELECT EXTRACT(ISODOW FROM s.sold_at AT TIME ZONE 'Africa/Lagos')::int AS weekday,
+           EXTRACT(HOUR FROM s.sold_at AT TIME ZONE 'Africa/Lagos')::int AS hour,
+           COUNT(*) AS sales_count,
+           COALESCE(SUM(s.total_amount), 0) AS net_total
+    FROM sales s
+    WHERE s.business_id = :business_id
+      AND s.sold_at >= :start_dt
+      AND s.sold_at < :end_dt
+      AND (CAST(:staff_id AS integer) IS NULL OR s.sold_by = :staff_id)
+    GROUP BY 1, 2
+""")
+
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def sales_heatmap(
+    db: Session,
+    current_user: UserDisplaySchema,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    staff_id: Optional[int] = None,
+    business_id: Optional[int] = None
+) -> schemas.SalesHeatmapOut:
+    """
+    Sale count and net total per Lagos weekday × hour. Every one of the
+    168 cells is returned (zeros included). Defaults to the last 12 weeks.
+    """
+    if "super_admin" in current_user.roles:
+        if not business_id:
+            raise HTTPException(status_code=400, detail="Super admin must specify a business_id")
+    else:
+        if not current_user.business_id:
+            raise HTTPException(
+                status_code=403,
+                detail="Current user does not belong to any business"
+            )
+        business_id = current_user.business_id
+
+    end_date = end_date or datetime.now(LAGOS_TZ).date()
+    start_date = start_date or end_date - timedelta(weeks=12) + timedelta(days=1)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+
+    rows = db.execute(
+        SALES_HEATMAP_SQL,
+        {
+            "business_id": business_id,
+            "start_dt": datetime.combine(start_date, time.min, tzinfo=LAGOS_TZ),
+            "end_dt": datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=LAGOS_TZ),
+            "staff_id": staff_id,
+        }
+    ).all()
+    found = {(weekday, hour): (count, float(total)) for weekday, hour, count, total in rows}
+
+    cells = []
+    for weekday in range(1, 8):
+        for hour in range(24):
+            count, total = found.get((weekday, hour), (0, 0.0))
+            cells.append(
+                schemas.HeatmapCell(
+                    weekday=weekday,
+                    weekday_name=WEEKDAY_NAMES[weekday - 1],
+                    hour=hour,
+                    sales_count=count,
+                    net_total=total,
+                    average_sale=total / count if count else 0.0,
+                )
+            )
+
+    by_weekday = [
+        schemas.HeatmapTotal(
+            key=weekday,
+            label=WEEKDAY_NAMES[weekday - 1],
+            sales_count=sum(c.sales_count for c in cells if c.weekday == weekday),
+            net_total=sum(c.net_total for c in cells if c.weekday == weekday),
+        )
+        for weekday in range(1, 8)
+    ]
+    by_hour = [
+        schemas.HeatmapTotal(
+            key=hour,
+            label=f"{hour:02d}:00",
+            sales_count=sum(c.sales_count for c in cells if c.hour == hour),
+            net_total=sum(c.net_total for c in cells if c.hour == hour),
+        )
+        for hour in range(24)
+    ]
+    busiest = max(cells, key=lambda c: (c.sales_count, c.net_total))
+
+    return schemas.SalesHeatmapOut(
+        business_id=business_id,
+        start_date=start_date,
+        end_date=end_date,
+        staff_id=staff_id,
+        total_sales=sum(c.sales_count for c in cells),
+        net_total=sum(c.net_total for c in cells),
+        busiest=busiest if busiest.sales_count else None,
+        cells=cells,
+        by_weekday=by_weekday,
+        by_hour=by_hour,
+    )
+
+
 from datetime import datetime, time
 
 from sqlalchemy.orm import joinedload
@@ -1448,7 +2215,7 @@ def get_sales_by_customer(
             joinedload(models.Sale.items).joinedload(models.SaleItem.product),
             joinedload(models.Sale.payments)
         )
-        .filter(models.Sale.customer_name.ilike(f"%{customer_name}%"))
+        .filter(models.Sale.customer_id.in_(customer_ids_matching(business_id, customer_name)))
     )
 
     # ─── 2. Tenant isolation ──────────────────────────────────────────
@@ -1708,28 +2475,327 @@ def delete_sale(
 
 
 
-def delete_all_sales_of_business(db: Session, business_id: int) -> int:
-    sales = (
-        db.query(models.Sale)
-        .filter(models.Sale.business_id == business_id)
-        .all()
+# ============================================================
+# BULK WIPE (set-based, batched, runs as a background job)
+# ============================================================
+from app.core.report_cache import bump_data_version
+from app.database import SessionLocal
+
+WIPE_BATCH_SIZE = 5000
+
+RESTORE_STOCK_SQL = text("""
+    WITH sold AS (
+        SELECT product_id, SUM(quantity) AS qty
+        FROM sale_items
+        WHERE sale_invoice_no = ANY(:invoices) AND product_id IS NOT NULL
+        GROUP BY product_id
+    ),
+    updated AS (
+        UPDATE inventory i
+        SET quantity_in = COALESCE(i.quantity_in, 0) + sold.qty,
+            current_stock = COALESCE(i.opening_stock, 0) + COALESCE(i.quantity_in, 0) + sold.qty
+                            - COALESCE(i.quantity_out, 0) + COALESCE(i.adjustment_total, 0),
+            updated_at = now()
+        FROM sold
+        WHERE i.product_id = sold.product_id
+        RETURNING i.product_id
+    )
+    INSERT INTO inventory (
+        product_id, business_id, opening_stock, quantity_in,
+        quantity_out, adjustment_total, current_stock, created_at, updated_at
     )
+    SELECT sold.product_id, p.business_id, 0, sold.qty, 0, 0, sold.qty, now(), now()
+    FROM sold
+    JOIN products p ON p.id = sold.product_id
+    WHERE sold.product_id NOT IN (SELECT product_id FROM updated)
+""")
+
+
+def delete_sales_batch(db: Session, invoices: List[int], restore_stock: bool = True):
+    """Delete a set of sales (items, payments) with one statement per table."""
+    if restore_stock:
+        # Same effect as add_stock() per item, aggregated per product
+        db.execute(RESTORE_STOCK_SQL, {"invoices": invoices})
+
+    db.execute(text("DELETE FROM payments WHERE sale_invoice_no = ANY(:invoices)"), {"invoices": invoices})
+    db.execute(text("DELETE FROM sale_items WHERE sale_invoice_no = ANY(:invoices)"), {"invoices": invoices})
+    db.execute(text("DELETE FROM sales WHERE invoice_no = ANY(:invoices)"), {"invoices": invoices})
+
+
+def delete_all_sales_of_business(
+    job,
+    business_id: int,
+    restore_stock: bool = True,
+    batch_size: int = WIPE_BATCH_SIZE,
+) -> dict:
+    """
+    Delete ALL sales of one business and (optionally) put the stock back.
+    Each batch commits on its own with its stock restore, so a failure
+    part-way leaves consistent data and the job can simply be re-run.
+    """
+    db = SessionLocal()
+    try:
+        total = db.query(func.count(models.Sale.id)).filter(
+            models.Sale.business_id == business_id
+        ).scalar() or 0
+
+        deleted = 0
+        while True:
+            invoices = [
+                row[0] for row in db.query(models.Sale.invoice_no)
+                .filter(models.Sale.business_id == business_id)
+                .order_by(models.Sale.invoice_no)
+                .limit(batch_size)
+                .all()
+            ]
+            if not invoices:
+                break
+
+            delete_sales_batch(db, invoices, restore_stock)
+            db.commit()
+
+            deleted += len(invoices)
+            if job:
+                job.update(
+                    progress=100 * deleted / max(total, 1),
+                    message=f"Deleted {deleted} of {total} sales"
+                )
+    finally:
+        db.close()
 
-    deleted_count = 0
+    bump_data_version(business_id)
+    return {"business_id": business_id, "deleted_count": deleted}
 
-    for sale in sales:
-        # Restore stock
-        for item in sale.items:
-            inventory_service.add_stock(
-                db,
-                product_id=item.product_id,
-                quantity=item.quantity,
-                current_user=None,  # system action
-                commit=False
+
+
+
+# ============================================================
+# SALES CUBE (one GROUPING SETS query for any pivot)
+# ============================================================
+from sqlalchemy import Date, cast, literal_column, tuple_
+from app.stock.category import models as category_models
+
+CUBE_DIMENSIONS = ["product", "category", "staff", "day", "week", "month", "payment_method"]
+CUBE_MEASURES = ["qty", "gross", "discount", "net", "cost", "margin"]
+CUBE_MODES = ["rollup", "cube", "sets"]
+MAX_CUBE_DIMENSIONS = 4  # CUBE over n dimensions = 2^n grouping sets
+
+
+def _lagos_bucket(unit: str):
+    """
+    Calendar bucket of sold_at in Lagos time (not the server's UTC day).
+    Inline literals so the SELECT and GROUP BY expressions are identical.
+    """
+    return cast(
+        func.date_trunc(
+            literal_column(f"'{unit}'"),
+            func.timezone(literal_column("'Africa/Lagos'"), models.Sale.sold_at)
+        ),
+        Date
+    )
+
+
+def sales_cube(
+    db: Session,
+    current_user: UserDisplaySchema,
+    dimensions: List[str],
+    measures: List[str],
+    mode: str = "rollup",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    business_id: Optional[int] = None,
+) -> schemas.SalesCubeOut:
+    """
+    Aggregate sale lines over the chosen dimensions in a single statement.
+
+    - rollup → ROLLUP(d1, d2, ...)  : hierarchy subtotals + grand total
+    - cube   → CUBE(d1, d2, ...)    : every combination
+    - sets   → GROUPING SETS((d1), (d2), ..., ()) : each dimension alone + total
+    """
+    # ─── 1. Validate request ─────────────────────────────────────────
+    unknown = [d for d in dimensions if d not in CUBE_DIMENSIONS]
+    if unknown or not dimensions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"dimensions must be chosen from {CUBE_DIMENSIONS}"
+        )
+
+    unknown = [m for m in measures if m not in CUBE_MEASURES]
+    if unknown or not measures:
+        raise HTTPException(
+            status_code=400,
+            detail=f"measures must be chosen from {CUBE_MEASURES}"
+        )
+
+    if mode not in CUBE_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {CUBE_MODES}")
+
+    if mode == "cube" and len(dimensions) > MAX_CUBE_DIMENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"cube mode supports at most {MAX_CUBE_DIMENSIONS} dimensions"
+        )
+
+    # Default → current month (Lagos)
+    today = datetime.now(LAGOS_TZ).date()
+    start_date = start_date or today.replace(day=1)
+    end_date = end_date or today
+
+    start_dt = datetime.combine(start_date, time.min, tzinfo=LAGOS_TZ)
+    end_dt = datetime.combine(end_date, time.max, tzinfo=LAGOS_TZ)
+
+    # ─── 2. Tenant isolation ─────────────────────────────────────────
+    tenant_id = None
+    if "super_admin" in current_user.roles:
+        tenant_id = business_id
+    else:
+        if not current_user.business_id:
+            raise HTTPException(
+                status_code=403,
+                detail="Current user does not belong to any business"
             )
+        tenant_id = current_user.business_id
 
-        db.delete(sale)
-        deleted_count += 1
+    # ─── 3. Latest payment method per invoice (DISTINCT ON) ──────────
+    latest_payment = (
+        db.query(
+            Payment.sale_invoice_no.label("invoice_no"),
+            Payment.payment_method.label("payment_method"),
+        )
+        .distinct(Payment.sale_invoice_no)
+        .order_by(
+            Payment.sale_invoice_no,
+            Payment.payment_date.desc(),
+            Payment.id.desc()
+        )
+    )
+    if tenant_id is not None:
+        latest_payment = latest_payment.filter(Payment.business_id == tenant_id)
+    latest_payment = latest_payment.subquery()
+
+    # ─── 4. Dimension → (key column, label column) ───────────────────
+    dimension_columns = {
+        "product": [
+            models.SaleItem.product_id.label("product_id"),
+            product_models.Product.name.label("product_name"),
+        ],
+        "category": [
+            category_models.Category.id.label("category_id"),
+            category_models.Category.name.label("category_name"),
+        ],
+        "staff": [
+            models.Sale.sold_by.label("staff_id"),
+            users_models.User.username.label("staff_name"),
+        ],
+        "day": [_lagos_bucket("day").label("day")],
+        "week": [_lagos_bucket("week").label("week")],
+        "month": [_lagos_bucket("month").label("month")],
+        "payment_method": [
+            func.coalesce(
+                latest_payment.c.payment_method, literal_column("'unpaid'")
+            ).label("payment_method")
+        ],
+    }
+
+    # ─── 5. Measures (historical cost from SaleItem) ─────────────────
+    gross = func.coalesce(func.sum(models.SaleItem.selling_price * models.SaleItem.quantity), 0)
+    discount = func.coalesce(func.sum(models.SaleItem.discount), 0)
+    cost = func.coalesce(func.sum(models.SaleItem.cost_price * models.SaleItem.quantity), 0)
+
+    measure_columns = {
+        "qty": func.coalesce(func.sum(models.SaleItem.quantity), 0).label("qty"),
+        "gross": gross.label("gross"),
+        "discount": discount.label("discount"),
+        "net": (gross - discount).label("net"),
+        "cost": cost.label("cost"),
+        "margin": (gross - discount - cost).label("margin"),
+    }
 
-    db.commit()
-    return deleted_count
+    selected_dims = [c for d in dimensions for c in dimension_columns[d]]
+    grouping_flags = [
+        func.grouping(dimension_columns[d][0]).label(f"grouping_{d}")
+        for d in dimensions
+    ]
+
+    query = (
+        db.query(*selected_dims, *grouping_flags, *(measure_columns[m] for m in measures))
+        .select_from(models.SaleItem)
+        .join(models.Sale, models.Sale.invoice_no == models.SaleItem.sale_invoice_no)
+        .filter(
+            models.Sale.sold_at >= start_dt,
+            models.Sale.sold_at <= end_dt,
+            models.SaleItem.sold_at >= start_dt,
+            models.SaleItem.sold_at <= end_dt,
+        )
+    )
+
+    if tenant_id is not None:
+        query = query.filter(models.Sale.business_id == tenant_id)
+
+    if "product" in dimensions or "category" in dimensions:
+        query = query.outerjoin(
+            product_models.Product,
+            product_models.Product.id == models.SaleItem.product_id
+        )
+    if "category" in dimensions:
+        query = query.outerjoin(
+            category_models.Category,
+            category_models.Category.id == product_models.Product.category_id
+        )
+    if "staff" in dimensions:
+        query = query.outerjoin(
+            users_models.User,
+            users_models.User.id == models.Sale.sold_by
+        )
+    if "payment_method" in dimensions:
+        query = query.outerjoin(
+            latest_payment,
+            latest_payment.c.invoice_no == models.Sale.invoice_no
+        )
+
+    # ─── 6. GROUPING SETS / ROLLUP / CUBE ────────────────────────────
+    # Multi-column dimensions (id + name) are grouped as one unit
+    group_units = [
+        tuple_(*dimension_columns[d]) if len(dimension_columns[d]) > 1
+        else dimension_columns[d][0]
+        for d in dimensions
+    ]
+
+    if mode == "rollup":
+        query = query.group_by(func.rollup(*group_units))
+    elif mode == "cube":
+        query = query.group_by(func.cube(*group_units))
+    else:
+        query = query.group_by(
+            func.grouping_sets(*group_units, tuple_())
+        )
+
+    query = query.order_by(*grouping_flags, *selected_dims)
+
+    # ─── 7. Shape rows ───────────────────────────────────────────────
+    rows = []
+    for row in query.all():
+        mapping = row._mapping
+        grouped_by = [d for d in dimensions if mapping[f"grouping_{d}"] == 0]
+
+        dims = {}
+        for d in grouped_by:
+            for column in dimension_columns[d]:
+                dims[column.name] = mapping[column.name]
+
+        rows.append(
+            schemas.SalesCubeRow(
+                grouped_by=grouped_by,
+                dimensions=dims,
+                measures={m: float(mapping[m] or 0) for m in measures},
+            )
+        )
+
+    return schemas.SalesCubeOut(
+        start_date=start_date,
+        end_date=end_date,
+        mode=mode,
+        dimensions=dimensions,
+        measures=measures,
+        rows=rows,
+    )
@@ -0,0 +1,138 @@
+"""
+Compare the indexes declared on the models with what Postgres actually has.
+
+    python -m app.scripts.index_audit
+
+Reports:
+- MISSING     declared on a model (Index, index=True, unique, PK) but not in pg_indexes
+- UNEXPECTED  in pg_indexes but not declared anywhere (manual hotfixes, old leftovers)
+- REDUNDANT   a plain btree whose columns are a leading prefix of another index on
+              the same table (the longer one already serves those lookups)
+
+Exit code is 1 when anything is MISSING, so it can gate a deploy.
+"""
+import re
+import sys
+from collections import defaultdict
+
+from sqlalchemy import text
+
+from app.core.migrations import import_all_models
+from app.database import engine
+
+
+INDEXDEF_RE = re.compile(
+    r"^CREATE (?P<unique>UNIQUE )?INDEX (?P<name>\S+) ON \S+ USING (?P<method>\w+) "
+    r"\((?P<columns>.*?)\)(?P<rest>.*)$"
+)
+
+
+def declared_indexes(metadata):
+    """{table: {column tuple: name}} for every index the models imply."""
+    declared = defaultdict(dict)
+
+    for table in metadata.sorted_tables:
+        pk_cols = tuple(c.name for c in table.primary_key.columns)
+        if pk_cols:
+            declared[table.name][pk_cols] = f"{table.name}_pkey"
+
+        for index in table.indexes:
+            cols = tuple(c.name for c in index.columns)
+            declared[table.name][cols] = index.name
+
+        for constraint in table.constraints:
+            if constraint.__class__.__name__ == "UniqueConstraint":
+                cols = tuple(c.name for c in constraint.columns)
+                declared[table.name][cols] = constraint.name or f"{table.name}_{'_'.join(cols)}_key"
+
+        # Column(unique=True) without index=True -> <table>_<col>_key
+        for column in table.columns:
+            if column.unique and not column.index:
+                declared[table.name].setdefault((column.name,), f"{table.name}_{column.name}_key")
+
+    return declared
+
+
+def database_indexes(conn, tables):
+    """{table: [(name, column tuple, method, is_partial)]} from pg_indexes."""
+    rows = conn.execute(
+        text("""
+            SELECT tablename, indexname, indexdef
+            FROM pg_indexes
+            WHERE schemaname = current_schema()
+              AND tablename = ANY(:tables)
+        """),
+        {"tables": list(tables)},
+    ).all()
+
+    found = defaultdict(list)
+    for table, name, indexdef in rows:
+        match = INDEXDEF_RE.match(indexdef)
+        if not match:
+            found[table].append((name, (), "unknown", False))
+            continue
+        cols = tuple(
+            c.strip().strip('"').split(" ")[0]
+            for c in match.group("columns").split(",")
+        )
+        found[table].append(
+            (name, cols, match.group("method"), "WHERE" in match.group("rest"))
+        )
+    return found
+
+
+def main():
+    metadata = import_all_models()
+    declared = declared_indexes(metadata)
+
+    with engine.connect() as conn:
+        actual = database_indexes(conn, declared.keys())
+
+    missing, unexpected, redundant = [], [], []
+
+    for table in sorted(declared):
+        actual_cols = {cols for _, cols, _, _ in actual.get(table, [])}
+        actual_names = {name for name, _, _, _ in actual.get(table, [])}
+
+        for cols, name in declared[table].items():
+            if cols not in actual_cols and name not in actual_names:
+                missing.append(f"{table}.{name} ({', '.join(cols)})")
+
+        declared_names = set(declared[table].values())
+        declared_cols = set(declared[table].keys())
+        for name, cols, _, _ in actual.get(table, []):
+            if name not in declared_names and cols not in declared_cols:
+                unexpected.append(f"{table}.{name} ({', '.join(cols)})")
+
+        plain = [
+            (name, cols) for name, cols, method, partial in actual.get(table, [])
+            if method == "btree" and not partial
+        ]
+        for name, cols in plain:
+            for other_name, other_cols in plain:
+                if (
+                    other_name != name
+                    and len(other_cols) > len(cols)
+                    and other_cols[:len(cols)] == cols
+                    and not name.endswith(("_pkey", "_key"))
+                    and not name.startswith("uq_")
+                ):
+                    redundant.append(
+                        f"{table}.{name} ({', '.join(cols)}) covered by {other_name}"
+                    )
+                    break
+
+    for label, items in (("MISSING", missing), ("UNEXPECTED", unexpected), ("REDUNDANT", redundant)):
+        print(f"\n{label} ({len(items)})")
+        for item in items:
+            print(f"  - {item}")
+
+    if missing:
+        print("\n[WARNING] Indexes missing. Run: python -m app.scripts.migrate")
+        sys.exit(1)
+
+    print("\n[INFO] All declared indexes present")
+
+
+if __name__ == "__main__":
+    main()
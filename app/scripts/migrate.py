@@ -0,0 +1,36 @@
+"""
+Bring the database to the latest schema revision.
+
+    python -m app.scripts.migrate
+
+- Empty database: runs every revision from 0001_baseline.
+- Database built by the old create_all startup (tables present, no
+  alembic_version): stamped at 0001_baseline first, then upgraded.
+"""
+from alembic import command
+from sqlalchemy import inspect
+
+from app.core.migrations import (
+    BASELINE_REVISION,
+    get_alembic_config,
+    get_current_revisions,
+)
+from app.database import engine
+
+
+def main():
+    cfg = get_alembic_config()
+
+    current = get_current_revisions(engine)
+    if not current:
+        tables = set(inspect(engine).get_table_names())
+        if "businesses" in tables:
+            print(f"[INFO] Existing schema without version table, stamping {BASELINE_REVISION}")
+            command.stamp(cfg, BASELINE_REVISION)
+
+    command.upgrade(cfg, "head")
+    print(f"[INFO] Database schema at revision {', '.join(sorted(get_current_revisions(engine)))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Monthly partitioning of sales, sale_items and payments.
+
+    python -m app.scripts.partitions convert [--months-ahead 3]
+    python -m app.scripts.partitions ensure [--months-ahead 3]
+    python -m app.scripts.partitions detach --keep-months 24 [--archive-dir DIR]
+    python -m app.scripts.partitions check-pruning --business-id 1 --from 2026-01-01 --to 2026-01-31
+
+`convert` is a one-off, run in a maintenance window after a backup.
+`ensure` also runs nightly inside the API (app/core/scheduler.py).
+"""
+import argparse
+import sys
+from datetime import date, datetime, time
+
+from app.core.partitions import (
+    LAGOS_TZ,
+    check_pruning,
+    convert_to_partitioned,
+    detach_old_partitions,
+    ensure_partitions,
+)
+from app.database import engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage monthly partitions")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser("convert", help="Rebuild tables as partitioned")
+    convert.add_argument("--months-ahead", type=int, default=3)
+
+    ensure = commands.add_parser("ensure", help="Create upcoming partitions")
+    ensure.add_argument("--months-ahead", type=int, default=3)
+
+    detach = commands.add_parser("detach", help="Detach (and optionally archive) old partitions")
+    detach.add_argument("--keep-months", type=int, required=True)
+    detach.add_argument("--archive-dir", default=None)
+
+    pruning = commands.add_parser("check-pruning", help="EXPLAIN report queries")
+    pruning.add_argument("--business-id", type=int, required=True)
+    pruning.add_argument("--from", dest="start", type=date.fromisoformat, required=True)
+    pruning.add_argument("--to", dest="end", type=date.fromisoformat, required=True)
+
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        convert_to_partitioned(engine, months_ahead=args.months_ahead)
+    elif args.command == "ensure":
+        ensure_partitions(engine, months_ahead=args.months_ahead)
+    elif args.command == "detach":
+        detach_old_partitions(engine, keep_months=args.keep_months, archive_dir=args.archive_dir)
+    elif args.command == "check-pruning":
+        start_dt = datetime.combine(args.start, time.min, tzinfo=LAGOS_TZ)
+        end_dt = datetime.combine(args.end, time.max, tzinfo=LAGOS_TZ)
+        if not check_pruning(engine, args.business_id, start_dt, end_dt):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
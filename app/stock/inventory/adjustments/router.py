@@ -45,6 +45,28 @@ def create_adjustment(
     return created
 
 
+@router.post("/stock-take", response_model=schemas.StockTakeOut, status_code=201)
+def create_stock_take(
+    stock_take_in: schemas.StockTakeCreate,
+    db: Session = Depends(get_db),
+    current_user: UserDisplaySchema = Depends(
+        role_required(["manager", "admin", "super_admin"])
+    )
+):
+    """
+    Bulk stock-take: counted quantities for many products in one request.
+
+    - Variance = counted - current stock, adjusted in one transaction
+    - Products whose count matches are left untouched
+    - Returns the variance summary valued at latest purchase cost
+    """
+    return service.stock_take(
+        db=db,
+        stock_take_in=stock_take_in,
+        current_user=current_user
+    )
+
+
 
 
 @router.get("/", response_model=List[schemas.StockAdjustmentOut])
@@ -1,6 +1,6 @@
 # app/stock/inventory/adjustments/schemas.py
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -31,3 +31,39 @@ class StockAdjustmentOut(BaseModel):
     class Config:
         from_attributes = True
 
+
+
+# -------------------------
+# Stock-take (bulk count)
+# -------------------------
+class StockCount(BaseModel):
+    product_id: int
+    counted_quantity: float = Field(..., ge=0)
+
+
+class StockTakeCreate(BaseModel):
+    counts: List[StockCount] = Field(..., min_length=1)
+    reason: str = "Stock take"
+    business_id: Optional[int] = None   # super admin only
+
+
+class StockTakeLine(BaseModel):
+    product_id: int
+    product_name: Optional[str] = None
+    system_quantity: float
+    counted_quantity: float
+    variance: float             # counted - system
+    unit_cost: float            # latest purchase cost, else product cost
+    variance_value: float
+
+
+class StockTakeOut(BaseModel):
+    business_id: int
+    products_counted: int
+    products_adjusted: int
+    surplus_quantity: float
+    shortage_quantity: float
+    surplus_value: float
+    shortage_value: float
+    net_variance_value: float
+    lines: List[StockTakeLine]  # adjusted products only
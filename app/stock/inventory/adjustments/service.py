@@ -3,7 +3,7 @@ from datetime import datetime, timedelta
 from sqlalchemy.exc import IntegrityError
 
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from sqlalchemy import func, text
 from datetime import datetime, date, time
 from typing import Optional, List
 
@@ -21,6 +21,7 @@ from app.users import models as user_models
 from app.users.permissions import role_required
 from app.users.schemas import UserDisplaySchema
 from app.users.auth import get_current_user
+from app.core.report_cache import bump_data_version
 
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -292,3 +293,165 @@ def delete_adjustment(
             status_code=500,
             detail=f"Failed to delete stock adjustment: {str(e)}"
         )   
+
+
+
+# ============================================================
+# STOCK-TAKE: many counted quantities, one transaction
+# ============================================================
+# Inventory rows for counted products that have none yet (stock 0)
+STOCK_TAKE_ENSURE_SQL = text("""
+    INSERT INTO inventory (
+        product_id, business_id, opening_stock, quantity_in,
+        quantity_out, adjustment_total, current_stock, created_at, updated_at
+    )
+    SELECT p.id, p.business_id, 0, 0, 0, 0, 0, now(), now()
+    FROM products p
+    WHERE p.business_id = :business_id
+      AND p.id = ANY(CAST(:product_ids AS integer[]))
+    ON CONFLICT (business_id, product_id) DO NOTHING
+""")
+
+# Variance per product against the (locked) current stock; the inventory
+# update and the adjustment rows are written from the same CTE.
+STOCK_TAKE_SQL = text("""
+    WITH counts AS (
+        SELECT t.product_id, t.counted
+        FROM unnest(CAST(:product_ids AS integer[]), CAST(:counted AS double precision[]))
+             AS t(product_id, counted)
+    ),
+    variances AS (
+        SELECT i.id AS inventory_id,
+               i.product_id,
+               COALESCE(i.current_stock, 0) AS system_qty,
+               c.counted,
+               c.counted - COALESCE(i.current_stock, 0) AS variance
+        FROM inventory i
+        JOIN counts c ON c.product_id = i.product_id
+        WHERE i.business_id = :business_id
+        FOR UPDATE OF i
+    ),
+    updated AS (
+        UPDATE inventory i
+        SET adjustment_total = COALESCE(i.adjustment_total, 0) + v.variance,
+            current_stock = v.counted,
+            updated_at = now()
+        FROM variances v
+        WHERE i.id = v.inventory_id
+          AND v.variance <> 0
+        RETURNING i.id
+    ),
+    adjusted AS (
+        INSERT INTO stock_adjustments (
+            business_id, product_id, inventory_id, quantity, reason, adjusted_by, adjusted_at
+        )
+        SELECT :business_id, v.product_id, v.inventory_id, v.variance, :reason, :adjusted_by, now()
+        FROM variances v
+        WHERE v.variance <> 0
+        RETURNING id
+    )
+    SELECT v.product_id,
+           p.name,
+           v.system_qty,
+           v.counted,
+           v.variance,
+           COALESCE(lc.cost_price, p.cost_price, 0) AS unit_cost
+    FROM variances v
+    JOIN products p ON p.id = v.product_id
+    LEFT JOIN LATERAL (
+        SELECT pi.cost_price
+        FROM purchase_items pi
+        JOIN purchases pu ON pu.id = pi.purchase_id
+        WHERE pi.product_id = v.product_id
+          AND pu.business_id = :business_id
+        ORDER BY pi.id DESC
+        LIMIT 1
+    ) lc ON true
+    ORDER BY p.name
+""")
+
+
+def stock_take(
+    db: Session,
+    stock_take_in: schemas.StockTakeCreate,
+    current_user: UserDisplaySchema
+) -> schemas.StockTakeOut:
+    """
+    Set counted quantities for many products at once. Every product whose
+    count differs from current_stock gets a StockAdjustment for the
+    variance; nothing is written unless all products belong to the business.
+    Counts of the same product (e.g. shop floor + store room) are added.
+    """
+    if "super_admin" in current_user.roles:
+        business_id = stock_take_in.business_id
+        if not business_id:
+            raise HTTPException(status_code=400, detail="Super admin must specify a business_id")
+    else:
+        if not current_user.business_id:
+            raise HTTPException(status_code=403, detail="User does not belong to any business")
+        business_id = current_user.business_id
+
+    counted = {}
+    for count in stock_take_in.counts:
+        counted[count.product_id] = counted.get(count.product_id, 0) + count.counted_quantity
+    product_ids = list(counted)
+
+    found = {
+        product_id for (product_id,) in db.query(product_models.Product.id).filter(
+            product_models.Product.business_id == business_id,
+            product_models.Product.id.in_(product_ids)
+        )
+    }
+    missing = [pid for pid in product_ids if pid not in found]
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Products not found in this business: {missing[:20]}"
+        )
+
+    try:
+        db.execute(STOCK_TAKE_ENSURE_SQL, {"business_id": business_id, "product_ids": product_ids})
+        rows = db.execute(
+            STOCK_TAKE_SQL,
+            {
+                "business_id": business_id,
+                "product_ids": product_ids,
+                "counted": [float(counted[pid]) for pid in product_ids],
+                "reason": stock_take_in.reason,
+                "adjusted_by": current_user.id,
+            }
+        ).all()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Stock take failed: {str(e)}")
+
+    bump_data_version(business_id)
+
+    lines = [
+        schemas.StockTakeLine(
+            product_id=product_id,
+            product_name=name,
+            system_quantity=float(system_qty),
+            counted_quantity=float(counted_qty),
+            variance=float(variance),
+            unit_cost=float(unit_cost),
+            variance_value=round(float(variance) * float(unit_cost), 2),
+        )
+        for product_id, name, system_qty, counted_qty, variance, unit_cost in rows
+        if variance != 0
+    ]
+    surplus = [line for line in lines if line.variance > 0]
+    shortage = [line for line in lines if line.variance < 0]
+
+    return schemas.StockTakeOut(
+        business_id=business_id,
+        products_counted=len(rows),
+        products_adjusted=len(lines),
+        surplus_quantity=sum(line.variance for line in surplus),
+        shortage_quantity=-sum(line.variance for line in shortage),
+        surplus_value=round(sum(line.variance_value for line in surplus), 2),
+        shortage_value=round(-sum(line.variance_value for line in shortage), 2),
+        net_variance_value=round(sum(line.variance_value for line in lines), 2),
+        lines=lines,
+    )
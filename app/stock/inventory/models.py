@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Index
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Date, ForeignKey, DateTime, Index, UniqueConstraint, func
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -39,7 +39,49 @@ class Inventory(Base):
     )
 
     __table_args__ = (
-        Index("idx_inventory_business_product", "business_id", "product_id"),
+        # One inventory row per product per tenant (stock updates upsert on it)
+        Index("uq_inventory_business_product", "business_id", "product_id", unique=True),
         Index("idx_inventory_business_created", "business_id", "created_at"),
         Index("idx_inventory_business_updated", "business_id", "updated_at"),
     )
+
+
+class StockMovement(Base):
+    """
+    Append-only stock ledger: one row per change of inventory.current_stock.
+
+    Rows are written by the trg_inventory_stock_movement trigger (migration
+    0008), so add_stock, remove_stock, adjust_stock, the revert functions
+    and the set-based SQL paths all land here without extra code.
+    """
+    __tablename__ = "stock_movements"
+
+    id = Column(BigInteger, primary_key=True)
+    business_id = Column(Integer, ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+
+    movement_type = Column(String(20), nullable=False)   # opening / in / out / adjustment / correction
+    quantity = Column(Float, nullable=False)             # signed change of current_stock
+    stock_after = Column(Float, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("idx_stock_movement_business_created", "business_id", "created_at"),
+        Index("idx_stock_movement_product_created", "product_id", "created_at"),
+    )
+
+
+class StockSnapshot(Base):
+    """Stock per product at the end of snapshot_date (Lagos), taken nightly."""
+    __tablename__ = "stock_snapshots"
+
+    id = Column(BigInteger, primary_key=True)
+    business_id = Column(Integer, ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    snapshot_date = Column(Date, nullable=False)
+    quantity = Column(Float, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("business_id", "snapshot_date", "product_id", name="uq_stock_snapshot_business_date_product"),
+    )
@@ -0,0 +1,199 @@
+"""
+Inventory drift detection and repair.
+
+Inventory.current_stock is a running counter kept in step by every sale,
+purchase and adjustment path. Here it is recomputed from the source tables:
+
+    expected = opening_stock + purchased - sold + adjusted
+
+per product, with one set-based statement per business. Businesses run in
+parallel on separate pooled connections; the work is inside Postgres, so
+threads are enough to keep RECONCILE_WORKERS backends busy.
+
+Repair rewrites the counters from the same aggregates, after locking the
+business's inventory rows so no sale lands between the sums and the write.
+The stock_movements trigger records each correction.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.core.report_cache import bump_data_version
+from app.database import engine
+
+
+RECONCILE_WORKERS = int(os.getenv("RECONCILE_WORKERS", "4"))
+
+# Differences smaller than this are float noise, not drift
+TOLERANCE = 0.0001
+
+# Discrepancies listed in the job result (all are counted)
+MAX_REPORTED = 500
+
+
+DRIFT_CTE = """
+    WITH purchased AS (
+        SELECT pi.product_id, SUM(pi.quantity) AS qty
+        FROM purchase_items pi
+        JOIN purchases p ON p.id = pi.purchase_id
+        WHERE p.business_id = :business_id
+        GROUP BY pi.product_id
+    ),
+    sold AS (
+        SELECT si.product_id, SUM(si.quantity) AS qty
+        FROM sale_items si
+        JOIN sales s ON s.invoice_no = si.sale_invoice_no
+        WHERE s.business_id = :business_id
+        GROUP BY si.product_id
+    ),
+    adjusted AS (
+        SELECT product_id, SUM(quantity) AS qty
+        FROM stock_adjustments
+        WHERE business_id = :business_id
+        GROUP BY product_id
+    ),
+    expected AS (
+        SELECT p.id AS product_id,
+               p.name,
+               i.id AS inventory_id,
+               COALESCE(i.opening_stock, 0) AS opening,
+               COALESCE(pu.qty, 0) AS purchased,
+               COALESCE(so.qty, 0) AS sold,
+               COALESCE(ad.qty, 0) AS adjusted,
+               COALESCE(i.current_stock, 0) AS current_stock,
+               COALESCE(i.opening_stock, 0) + COALESCE(pu.qty, 0)
+                   - COALESCE(so.qty, 0) + COALESCE(ad.qty, 0) AS expected_stock
+        FROM products p
+        LEFT JOIN inventory i ON i.business_id = p.business_id AND i.product_id = p.id
+        LEFT JOIN purchased pu ON pu.product_id = p.id
+        LEFT JOIN sold so ON so.product_id = p.id
+        LEFT JOIN adjusted ad ON ad.product_id = p.id
+        WHERE p.business_id = :business_id
+    ),
+    drift AS (
+        SELECT *
+        FROM expected
+        WHERE ABS(expected_stock - current_stock) > :tolerance
+    )
+"""
+
+# Drifted products only; the LEFT JOIN keeps one row when there are
+# none, so the product count always comes back
+DRIFT_SQL = text(DRIFT_CTE + """
+    SELECT (SELECT COUNT(*) FROM expected) AS checked,
+           d.product_id, d.name, d.inventory_id, d.opening, d.purchased,
+           d.sold, d.adjusted, d.current_stock, d.expected_stock
+    FROM (SELECT 1) one
+    LEFT JOIN drift d ON true
+    ORDER BY d.name
+""")
+
+LOCK_INVENTORY_SQL = text("""
+    SELECT id FROM inventory WHERE business_id = :business_id FOR UPDATE
+""")
+
+REPAIR_SQL = text(DRIFT_CTE + """
+    INSERT INTO inventory (
+        product_id, business_id, opening_stock, quantity_in,
+        quantity_out, adjustment_total, current_stock, created_at, updated_at
+    )
+    SELECT product_id, :business_id, opening, purchased, sold, adjusted, expected_stock, now(), now()
+    FROM drift
+    ON CONFLICT (business_id, product_id) DO UPDATE
+    SET quantity_in = EXCLUDED.quantity_in,
+        quantity_out = EXCLUDED.quantity_out,
+        adjustment_total = EXCLUDED.adjustment_total,
+        current_stock = EXCLUDED.current_stock,
+        updated_at = now()
+""")
+
+
+def reconcile_business(business_id: int, repair: bool = False) -> dict:
+    """Drift of one business; with repair=True the counters are fixed too."""
+    params = {"business_id": business_id, "tolerance": TOLERANCE}
+
+    with engine.begin() as conn:
+        if repair:
+            conn.execute(LOCK_INVENTORY_SQL, params)
+
+        rows = conn.execute(DRIFT_SQL, params).mappings().all()
+        discrepancies = [
+            {
+                "business_id": business_id,
+                "product_id": row["product_id"],
+                "product_name": row["name"],
+                "has_inventory_row": row["inventory_id"] is not None,
+                "opening_stock": row["opening"],
+                "purchased": row["purchased"],
+                "sold": row["sold"],
+                "adjusted": row["adjusted"],
+                "current_stock": row["current_stock"],
+                "expected_stock": row["expected_stock"],
+                "difference": row["current_stock"] - row["expected_stock"],
+            }
+            for row in rows
+            if row["product_id"] is not None
+        ]
+
+        if repair and discrepancies:
+            conn.execute(REPAIR_SQL, params)
+
+    if repair and discrepancies:
+        bump_data_version(business_id)
+
+    return {
+        "business_id": business_id,
+        "checked": rows[0]["checked"] if rows else 0,
+        "discrepancies": discrepancies,
+    }
+
+
+def reconcile_stock(
+    job,
+    business_id: Optional[int] = None,
+    repair: bool = False,
+    workers: int = RECONCILE_WORKERS,
+) -> dict:
+    """
+    Background job: check one business, or every business in parallel.
+    The result lists up to MAX_REPORTED discrepancies, largest first.
+    """
+    if business_id:
+        business_ids = [business_id]
+    else:
+        with engine.connect() as conn:
+            business_ids = [row[0] for row in conn.execute(text("SELECT id FROM businesses ORDER BY id"))]
+
+    checked = 0
+    discrepancies = []
+    failed = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="reconcile") as pool:
+        futures = {pool.submit(reconcile_business, bid, repair): bid for bid in business_ids}
+        for done, future in enumerate(as_completed(futures), start=1):
+            bid = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                failed[bid] = str(e)
+            else:
+                checked += outcome["checked"]
+                discrepancies.extend(outcome["discrepancies"])
+
+            job.update(
+                progress=100 * done / len(futures),
+                message=f"{done}/{len(futures)} businesses, {len(discrepancies)} discrepancies"
+            )
+
+    discrepancies.sort(key=lambda d: abs(d["difference"]), reverse=True)
+
+    return {
+        "businesses": len(business_ids),
+        "products_checked": checked,
+        "discrepancy_count": len(discrepancies),
+        "repaired": repair,
+        "failed_businesses": failed,
+        "discrepancies": discrepancies[:MAX_REPORTED],
+    }
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 from typing import List
 from typing import Optional
+from datetime import date, datetime
 from fastapi import Depends
 
 from app.users.permissions import role_required
@@ -14,6 +15,11 @@ from app.users.auth import get_current_user
 
 from app.database import get_db
 from app.stock.inventory import schemas, service
+from app.core.exports import EXPORT_FORMATS, EXPORT_FORMAT_PATTERN
+from app.core.jobs import submit_job, find_running
+from app.core.report_cache import cached_report
+from app.jobs.schemas import JobOut
+from app.stock.inventory.reconcile import reconcile_stock
 
 router = APIRouter()
 
@@ -26,6 +32,7 @@ def list_inventory(
     limit: int = 100,
     product_id: Optional[int] = None,
     product_name: Optional[str] = None,
+    format: str = Query("json", pattern=EXPORT_FORMAT_PATTERN),
     db: Session = Depends(get_db),
     current_user: UserDisplaySchema = Depends(
         role_required(["user","manager","admin","super_admin"])
@@ -35,7 +42,16 @@ def list_inventory(
     SaaS-safe inventory list:
     - Admin/Manager/User → only their business inventory
     - Super admin → all businesses
+    - format=csv|xlsx → download of every matching row
     """
+    if format in EXPORT_FORMATS:
+        return service.export_inventory(
+            current_user=current_user,
+            fmt=format,
+            product_id=product_id,
+            product_name=product_name,
+        )
+
     return service.list_inventory(
         db=db,
         current_user=current_user,
@@ -44,3 +60,103 @@ def list_inventory(
         product_id=product_id,
         product_name=product_name,
     )
+
+
+@router.get("/as-of", response_model=schemas.StockAsOfOut)
+def stock_as_of(
+    date_: date = Query(..., alias="date", description="Stock at the end of this day (YYYY-MM-DD)"),
+    business_id: Optional[int] = Query(None, description="Required for super admin"),
+    db: Session = Depends(get_db),
+    current_user: UserDisplaySchema = Depends(
+        role_required(["manager", "admin", "super_admin"])
+    ),
+):
+    """
+    Point-in-time stock and valuation: the nightly snapshot at or before
+    the date plus the stock movements after it.
+    """
+    return service.stock_as_of(
+        db=db,
+        current_user=current_user,
+        as_of=date_,
+        business_id=business_id,
+    )
+
+
+@router.get("/reorder", response_model=schemas.ReorderOut)
+def reorder_advice(
+    request: Request,
+    window_days: int = Query(30, ge=7, le=365, description="Days of sales history"),
+    half_life_days: float = Query(7, gt=0, le=90, description="Recent days weigh more; weight halves every N days"),
+    lead_time_days: int = Query(7, ge=0, le=180, description="Days from order to delivery"),
+    cover_days: int = Query(30, ge=1, le=365, description="Days of stock to hold after delivery"),
+    only_reorder: bool = Query(True, description="Only products at or below their reorder point"),
+    business_id: Optional[int] = Query(None, description="Required for super admin"),
+    db: Session = Depends(get_db),
+    current_user: UserDisplaySchema = Depends(
+        role_required(["user", "manager", "admin", "super_admin"])
+    ),
+):
+    """
+    Low-stock advisor: sales velocity, days of cover and a suggested
+    order quantity per product, lowest cover first. Cached per business
+    until the next sale, purchase or stock change.
+    """
+    return cached_report(
+        request,
+        current_user,
+        report="stock_reorder",
+        params={
+            "window_days": window_days,
+            "half_life_days": half_life_days,
+            "lead_time_days": lead_time_days,
+            "cover_days": cover_days,
+            "only_reorder": only_reorder,
+            # the window moves at midnight even without new writes
+            "day": datetime.now(service.LAGOS_TZ).date(),
+        },
+        business_id=business_id,
+        compute=lambda: service.reorder_report(
+            db=db,
+            current_user=current_user,
+            window_days=window_days,
+            half_life_days=half_life_days,
+            lead_time_days=lead_time_days,
+            cover_days=cover_days,
+            only_reorder=only_reorder,
+            business_id=business_id,
+        ),
+    )
+
+
+@router.post("/reconcile", response_model=JobOut, status_code=202)
+def reconcile_inventory(
+    repair: bool = Query(False, description="Rewrite drifted counters from source tables"),
+    business_id: Optional[int] = Query(None, description="Super admin: one business instead of all"),
+    current_user: UserDisplaySchema = Depends(
+        role_required(["admin", "super_admin"])
+    ),
+):
+    """
+    Recompute expected stock (opening + purchased - sold + adjusted) for
+    every product and report where current_stock differs. Super admin
+    without business_id checks all businesses in parallel. Poll GET /jobs/{id}.
+    """
+    if "super_admin" not in current_user.roles:
+        if not current_user.business_id:
+            raise HTTPException(status_code=403, detail="User does not belong to any business")
+        business_id = current_user.business_id
+
+    kind = f"stock_reconcile:{business_id or 'all'}"
+    running = find_running(kind)
+    if running:
+        return running
+
+    return submit_job(
+        kind,
+        reconcile_stock,
+        business_id,
+        repair,
+        owner_id=current_user.id,
+        business_id=business_id,
+    )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 
@@ -29,4 +29,41 @@ class InventoryListOut(BaseModel):
     grand_total: float  # ✅ Total valuation of all inventory
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class StockAsOfItem(BaseModel):
+    product_id: int
+    product_name: str
+    quantity: float
+    unit_cost: float        # latest purchase cost up to the date
+    value: float
+
+
+class StockAsOfOut(BaseModel):
+    business_id: int
+    as_of: date
+    ledger_start: Optional[datetime] = None   # earliest movement; older dates read as 0
+    total_quantity: float
+    total_value: float
+    items: list[StockAsOfItem]
+
+
+class ReorderItem(BaseModel):
+    product_id: int
+    product_name: str
+    sku: Optional[str] = None
+    current_stock: float
+    units_sold: float               # in the window
+    daily_velocity: float           # weighted moving average, units/day
+    days_of_cover: Optional[float]  # None when nothing sold
+    reorder_point: float            # velocity × lead time
+    suggested_order_qty: int
+    needs_reorder: bool
+
+
+class ReorderOut(BaseModel):
+    business_id: int
+    window_days: int
+    lead_time_days: int
+    cover_days: int
+    items: list[ReorderItem]
@@ -7,14 +7,58 @@ from app.stock.inventory.models import Inventory
 from app.stock.products.models import  Product
 
 from app.purchase.models import  Purchase, PurchaseItem
-from datetime import datetime, date, time
+from datetime import datetime, date, time, timedelta
 from zoneinfo import ZoneInfo
+from sqlalchemy import func, text
+
+import numpy as np
+
+from app.core.exports import EXPORT_FETCH_SIZE, export_response
+from app.core.report_cache import mark_written
 
 
 LAGOS_TZ = ZoneInfo("Africa/Lagos")
 
 
 
+def _inventory_list_filters(
+    current_user,
+    product_id: int | None = None,
+    product_name: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> list:
+    """Tenant filter + optional filters shared by list_inventory and export_inventory."""
+    filters = []
+
+    # Tenant Filter
+    roles = getattr(current_user, "roles", [])
+    if "super_admin" not in roles:
+        user_business_id = getattr(current_user, "business_id", None)
+        if not user_business_id:
+            raise HTTPException(
+                status_code=400,
+                detail="User does not belong to any business"
+            )
+        filters.append(Inventory.business_id == user_business_id)
+
+    # Optional filters
+    if product_id is not None:
+        filters.append(Inventory.product_id == product_id)
+    if product_name:
+        filters.append(Product.name.ilike(f"%{product_name}%"))
+
+    # Date filters (timezone-aware)
+    if start_date:
+        start_dt = datetime.combine(start_date, time.min, tzinfo=LAGOS_TZ)
+        filters.append(Inventory.created_at >= start_dt)
+    if end_date:
+        end_dt = datetime.combine(end_date, time.max, tzinfo=LAGOS_TZ)
+        filters.append(Inventory.created_at <= end_dt)
+
+    return filters
+
+
 def list_inventory(
     db: Session,
     current_user,
@@ -42,34 +86,10 @@ def list_inventory(
             Inventory.business_id
         )
         .join(Product, Product.id == Inventory.product_id)
+        .filter(*_inventory_list_filters(current_user, product_id, product_name, start_date, end_date))
         .order_by(Inventory.id.asc())  # column.asc() is safe
     )
 
-    # Tenant Filter
-    roles = getattr(current_user, "roles", [])
-    if "super_admin" not in roles:
-        user_business_id = getattr(current_user, "business_id", None)
-        if not user_business_id:
-            raise HTTPException(
-                status_code=400,
-                detail="User does not belong to any business"
-            )
-        query = query.filter(Inventory.business_id == user_business_id)
-
-    # Optional filters
-    if product_id is not None:
-        query = query.filter(Inventory.product_id == product_id)
-    if product_name:
-        query = query.filter(Product.name.ilike(f"%{product_name}%"))
-
-    # Date filters (timezone-aware)
-    if start_date:
-        start_dt = datetime.combine(start_date, time.min, tzinfo=LAGOS_TZ)
-        query = query.filter(Inventory.created_at >= start_dt)
-    if end_date:
-        end_dt = datetime.combine(end_date, time.max, tzinfo=LAGOS_TZ)
-        query = query.filter(Inventory.created_at <= end_dt)
-
     inventory_list = query.offset(skip).limit(limit).all()
 
     result = []
@@ -122,6 +142,68 @@ def list_inventory(
     }
 
 
+INVENTORY_EXPORT_HEADERS = [
+    "ID", "Product ID", "Product", "Opening Stock", "Quantity In", "Quantity Out",
+    "Adjustments", "Current Stock", "Latest Cost", "Inventory Value",
+    "Business ID", "Created At", "Updated At",
+]
+
+
+def export_inventory(
+    current_user,
+    fmt: str,
+    product_id: int | None = None,
+    product_name: str | None = None,
+):
+    """Every inventory row (list_inventory columns), streamed as csv / xlsx."""
+    filters = _inventory_list_filters(current_user, product_id, product_name)
+
+    def build_rows(db: Session):
+        # Latest purchase cost per row in SQL instead of one query per product
+        latest_cost = func.coalesce(
+            db.query(PurchaseItem.cost_price)
+            .join(Purchase, Purchase.id == PurchaseItem.purchase_id)
+            .filter(
+                PurchaseItem.product_id == Inventory.product_id,
+                Purchase.business_id == Inventory.business_id
+            )
+            .order_by(PurchaseItem.id.desc())
+            .limit(1)
+            .correlate(Inventory)
+            .scalar_subquery(),
+            Product.cost_price,
+            0
+        )
+
+        query = (
+            db.query(
+                Inventory.id,
+                Inventory.product_id,
+                Product.name,
+                Inventory.opening_stock,
+                Inventory.quantity_in,
+                Inventory.quantity_out,
+                Inventory.adjustment_total,
+                Inventory.current_stock,
+                latest_cost,
+                Inventory.business_id,
+                Inventory.created_at,
+                Inventory.updated_at,
+            )
+            .join(Product, Product.id == Inventory.product_id)
+            .filter(*filters)
+            .order_by(Inventory.id.asc())
+            .yield_per(EXPORT_FETCH_SIZE)
+        )
+
+        for (inv_id, prod_id, name, opening, qty_in, qty_out, adjustments,
+             current, cost, business_id, created_at, updated_at) in query:
+            yield [inv_id, prod_id, name, opening, qty_in, qty_out, adjustments, current,
+                   cost, (current or 0) * (cost or 0), business_id, created_at, updated_at]
+
+    return export_response(fmt, "inventory", INVENTORY_EXPORT_HEADERS, build_rows)
+
+
 
 # --------------------------
 # ORM helper: get inventory for a product in the current business
@@ -209,6 +291,107 @@ def add_stock(
     return inventory
 
 
+# One statement for many products. Existing rows take the signed quantity
+# (a lowered purchase line gives stock back; quantity_in floors at 0);
+# products without a row get one, where a negative quantity has nothing to
+# take back, as in add_stock(). The new levels come back.
+ADD_STOCK_BULK_SQL = text("""
+    WITH t AS (
+        SELECT product_id, qty
+        FROM unnest(CAST(:product_ids AS integer[]), CAST(:quantities AS double precision[])) AS t(product_id, qty)
+    ),
+    updated AS (
+        UPDATE inventory
+        SET quantity_in = GREATEST(COALESCE(inventory.quantity_in, 0) + t.qty, 0),
+            current_stock = COALESCE(inventory.opening_stock, 0)
+                            + GREATEST(COALESCE(inventory.quantity_in, 0) + t.qty, 0)
+                            - COALESCE(inventory.quantity_out, 0)
+                            + COALESCE(inventory.adjustment_total, 0),
+            updated_at = now()
+        FROM t
+        WHERE inventory.business_id = :business_id
+          AND inventory.product_id = t.product_id
+        RETURNING inventory.product_id, inventory.current_stock
+    ),
+    inserted AS (
+        INSERT INTO inventory (
+            product_id, business_id, opening_stock, quantity_in,
+            quantity_out, adjustment_total, current_stock, created_at, updated_at
+        )
+        SELECT t.product_id, :business_id, 0, GREATEST(t.qty, 0), 0, 0, GREATEST(t.qty, 0), now(), now()
+        FROM t
+        WHERE t.product_id NOT IN (SELECT product_id FROM updated)
+        -- row created by a concurrent transaction after this statement started
+        ON CONFLICT (business_id, product_id) DO UPDATE
+        SET quantity_in = GREATEST(COALESCE(inventory.quantity_in, 0) + EXCLUDED.quantity_in, 0),
+            current_stock = COALESCE(inventory.opening_stock, 0)
+                            + GREATEST(COALESCE(inventory.quantity_in, 0) + EXCLUDED.quantity_in, 0)
+                            - COALESCE(inventory.quantity_out, 0)
+                            + COALESCE(inventory.adjustment_total, 0),
+            updated_at = now()
+        RETURNING product_id, current_stock
+    )
+    SELECT product_id, current_stock FROM updated
+    UNION ALL
+    SELECT product_id, current_stock FROM inserted
+""")
+
+
+REMOVE_STOCK_BULK_SQL = text("""
+    INSERT INTO inventory (
+        product_id, business_id, opening_stock, quantity_in,
+        quantity_out, adjustment_total, current_stock, created_at, updated_at
+    )
+    SELECT t.product_id, :business_id, 0, 0, t.qty, 0, -t.qty, now(), now()
+    FROM unnest(CAST(:product_ids AS integer[]), CAST(:quantities AS double precision[])) AS t(product_id, qty)
+    ON CONFLICT (business_id, product_id) DO UPDATE
+    SET quantity_out = COALESCE(inventory.quantity_out, 0) + EXCLUDED.quantity_out,
+        current_stock = COALESCE(inventory.opening_stock, 0)
+                        + COALESCE(inventory.quantity_in, 0)
+                        - (COALESCE(inventory.quantity_out, 0) + EXCLUDED.quantity_out)
+                        + COALESCE(inventory.adjustment_total, 0),
+        updated_at = now()
+    RETURNING product_id, current_stock
+""")
+
+
+def _apply_stock_bulk(db: Session, statement, business_id: int, quantities: dict) -> dict:
+    quantities = {pid: qty for pid, qty in quantities.items() if pid is not None and qty}
+    if not quantities:
+        return {}
+
+    product_ids = list(quantities)
+    rows = db.execute(
+        statement,
+        {
+            "business_id": business_id,
+            "product_ids": product_ids,
+            "quantities": [float(quantities[pid]) for pid in product_ids],
+        }
+    )
+    # Raw SQL skips the ORM flush hooks; stock-reading reports must refresh
+    mark_written(db, business_id, "inventory")
+    return {product_id: current_stock for product_id, current_stock in rows}
+
+
+def add_stock_bulk(db: Session, business_id: int, quantities: dict) -> dict:
+    """
+    Set-based add_stock() for {product_id: quantity} of one business;
+    a negative quantity takes stock back (purchase edits).
+    Zero quantities are skipped. Returns {product_id: current_stock}
+    for the rows touched. Does not commit.
+    """
+    return _apply_stock_bulk(db, ADD_STOCK_BULK_SQL, business_id, quantities)
+
+
+def remove_stock_bulk(db: Session, business_id: int, quantities: dict) -> dict:
+    """
+    Set-based remove_stock(): {product_id: quantity sold}; a negative
+    quantity gives stock back. Same return value as add_stock_bulk.
+    """
+    return _apply_stock_bulk(db, REMOVE_STOCK_BULK_SQL, business_id, quantities)
+
+
 # --------------------------
 # Internal: remove stock (Sale)
 # --------------------------
@@ -353,4 +536,276 @@ def revert_sale_stock(
     )
 
     db.flush()
-    db.refresh(inventory)
\ No newline at end of file
+    db.refresh(inventory)
+
+# ============================================================
+# POINT-IN-TIME STOCK (stock_movements + stock_snapshots)
+# ============================================================
+# Lower bound for movements when no snapshot precedes the date
+LEDGER_EPOCH = datetime(2000, 1, 1, tzinfo=LAGOS_TZ)
+
+
+def _end_of_day(day: date) -> datetime:
+    """First instant after `day` in Lagos: the cutoff for that day's stock."""
+    return datetime.combine(day, time.min, tzinfo=LAGOS_TZ) + timedelta(days=1)
+
+
+# Latest snapshot at or before the date + movements after it, per product
+STOCK_AS_OF_SQL = text("""
+    WITH snap AS (
+        SELECT product_id, quantity
+        FROM stock_snapshots
+        WHERE business_id = :business_id
+          AND snapshot_date = :snapshot_date
+    ),
+    moves AS (
+        SELECT product_id, SUM(quantity) AS quantity
+        FROM stock_movements
+        WHERE business_id = :business_id
+          AND created_at >= :moves_from
+          AND created_at < :cutoff
+        GROUP BY product_id
+    )
+    SELECT COALESCE(s.product_id, m.product_id) AS product_id,
+           COALESCE(s.quantity, 0) + COALESCE(m.quantity, 0) AS quantity
+    FROM snap s
+    FULL OUTER JOIN moves m ON m.product_id = s.product_id
+""")
+
+
+def _stock_as_of(db: Session, business_id: int, as_of: date) -> list:
+    """[(product_id, quantity)] at the end of `as_of`, non-zero only."""
+    snapshot_date = db.query(func.max(models.StockSnapshot.snapshot_date)).filter(
+        models.StockSnapshot.business_id == business_id,
+        models.StockSnapshot.snapshot_date <= as_of
+    ).scalar()
+
+    rows = db.execute(
+        STOCK_AS_OF_SQL,
+        {
+            "business_id": business_id,
+            "snapshot_date": snapshot_date,
+            "moves_from": _end_of_day(snapshot_date) if snapshot_date else LEDGER_EPOCH,
+            "cutoff": _end_of_day(as_of),
+        }
+    ).all()
+    return [(product_id, quantity) for product_id, quantity in rows if quantity]
+
+
+def take_stock_snapshots(db: Session, snapshot_date: date = None) -> int:
+    """
+    Store every business's stock at the end of `snapshot_date` (default
+    yesterday). Re-running a date overwrites it. Returns rows written.
+    """
+    snapshot_date = snapshot_date or (datetime.now(LAGOS_TZ).date() - timedelta(days=1))
+    written = 0
+
+    business_ids = [business_id for (business_id,) in db.execute(text("SELECT id FROM businesses"))]
+    for business_id in business_ids:
+        rows = _stock_as_of(db, business_id, snapshot_date)
+        db.query(models.StockSnapshot).filter(
+            models.StockSnapshot.business_id == business_id,
+            models.StockSnapshot.snapshot_date == snapshot_date
+        ).delete(synchronize_session=False)
+        db.bulk_insert_mappings(
+            models.StockSnapshot,
+            [
+                {
+                    "business_id": business_id,
+                    "product_id": product_id,
+                    "snapshot_date": snapshot_date,
+                    "quantity": quantity,
+                }
+                for product_id, quantity in rows
+            ]
+        )
+        db.commit()
+        written += len(rows)
+
+    return written
+
+
+def stock_as_of(db: Session, current_user, as_of: date, business_id: int = None) -> dict:
+    """
+    Stock and valuation per product at the end of `as_of` (Lagos). Each
+    product is valued at its latest purchase cost up to that day, falling
+    back to the product's cost_price.
+    """
+    if "super_admin" in current_user.roles:
+        if not business_id:
+            raise HTTPException(status_code=400, detail="Super admin must specify a business_id")
+    else:
+        if not current_user.business_id:
+            raise HTTPException(status_code=403, detail="User does not belong to any business")
+        business_id = current_user.business_id
+
+    ledger_start = db.query(func.min(models.StockMovement.created_at)).filter(
+        models.StockMovement.business_id == business_id
+    ).scalar()
+
+    stock = dict(_stock_as_of(db, business_id, as_of))
+    items = []
+
+    if stock:
+        product_ids = list(stock)
+        cutoff = _end_of_day(as_of)
+
+        latest_costs = dict(
+            db.query(PurchaseItem.product_id, PurchaseItem.cost_price)
+            .join(Purchase)
+            .filter(
+                PurchaseItem.product_id.in_(product_ids),
+                Purchase.business_id == business_id,
+                PurchaseItem.created_at < cutoff
+            )
+            .distinct(PurchaseItem.product_id)
+            .order_by(PurchaseItem.product_id, PurchaseItem.created_at.desc(), PurchaseItem.id.desc())
+            .all()
+        )
+        products = db.query(Product.id, Product.name, Product.cost_price).filter(
+            Product.id.in_(product_ids)
+        ).order_by(Product.name)
+
+        for product_id, name, cost_price in products:
+            quantity = float(stock[product_id])
+            unit_cost = float(latest_costs.get(product_id, cost_price or 0) or 0)
+            items.append({
+                "product_id": product_id,
+                "product_name": name,
+                "quantity": quantity,
+                "unit_cost": unit_cost,
+                "value": round(quantity * unit_cost, 2),
+            })
+
+    return {
+        "business_id": business_id,
+        "as_of": as_of,
+        "ledger_start": ledger_start,
+        "total_quantity": sum(item["quantity"] for item in items),
+        "total_value": round(sum(item["value"] for item in items), 2),
+        "items": items,
+    }
+
+
+# ============================================================
+# REORDER ADVISOR (sales velocity → days of cover → order qty)
+# ============================================================
+REORDER_DAILY_SALES_SQL = text("""
+    SELECT si.product_id,
+           ((si.sold_at AT TIME ZONE 'Africa/Lagos')::date - CAST(:start_day AS date)) AS day_index,
+           SUM(si.quantity) AS qty
+    FROM sale_items si
+    JOIN sales s ON s.invoice_no = si.sale_invoice_no
+    WHERE s.business_id = :business_id
+      AND s.sold_at >= :start_dt
+      AND si.sold_at >= :start_dt
+    GROUP BY si.product_id, day_index
+""")
+
+
+def reorder_report(
+    db: Session,
+    current_user,
+    window_days: int = 30,
+    half_life_days: float = 7,
+    lead_time_days: int = 7,
+    cover_days: int = 30,
+    only_reorder: bool = True,
+    business_id: int = None,
+) -> dict:
+    """
+    Per product: daily sales velocity as an exponentially weighted moving
+    average over the last `window_days` (today included), days of cover at
+    that rate, and the quantity to order so stock lasts lead time + cover
+    days. One query for daily sales, one for stock; the maths is NumPy.
+    """
+    if "super_admin" in current_user.roles:
+        if not business_id:
+            raise HTTPException(status_code=400, detail="Super admin must specify a business_id")
+    else:
+        if not current_user.business_id:
+            raise HTTPException(status_code=403, detail="User does not belong to any business")
+        business_id = current_user.business_id
+
+    today = datetime.now(LAGOS_TZ).date()
+    start_day = today - timedelta(days=window_days - 1)
+
+    products = (
+        db.query(Product.id, Product.name, Product.sku, func.coalesce(Inventory.current_stock, 0))
+        .outerjoin(
+            Inventory,
+            (Inventory.product_id == Product.id) & (Inventory.business_id == Product.business_id)
+        )
+        .filter(Product.business_id == business_id, Product.is_active.is_(True))
+        .all()
+    )
+    if not products:
+        return {
+            "business_id": business_id,
+            "window_days": window_days,
+            "lead_time_days": lead_time_days,
+            "cover_days": cover_days,
+            "items": [],
+        }
+
+    product_ids = np.array([row[0] for row in products])
+    stock = np.array([float(row[3]) for row in products])
+    position = {product_id: index for index, product_id in enumerate(product_ids.tolist())}
+
+    # products × days matrix of units sold
+    daily = np.zeros((len(products), window_days))
+    rows = db.execute(
+        REORDER_DAILY_SALES_SQL,
+        {
+            "business_id": business_id,
+            "start_day": start_day,
+            "start_dt": datetime.combine(start_day, time.min, tzinfo=LAGOS_TZ),
+        }
+    ).all()
+    if rows:
+        sold = np.array(
+            [(position[pid], day, qty) for pid, day, qty in rows if pid in position and 0 <= day < window_days],
+            dtype=float,
+        ).reshape(-1, 3)
+        np.add.at(daily, (sold[:, 0].astype(int), sold[:, 1].astype(int)), sold[:, 2])
+
+    # Weight halves every half_life_days going back from today
+    age = np.arange(window_days - 1, -1, -1)
+    weights = 0.5 ** (age / half_life_days)
+    velocity = daily @ weights / weights.sum()
+    units_sold = daily.sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        days_of_cover = np.where(velocity > 0, np.maximum(stock, 0) / velocity, np.inf)
+
+    reorder_point = velocity * lead_time_days
+    suggested = np.ceil(np.maximum(velocity * (lead_time_days + cover_days) - stock, 0))
+    needs_reorder = (velocity > 0) & (stock <= reorder_point)
+
+    order = np.lexsort((-velocity, days_of_cover))
+    if only_reorder:
+        order = order[needs_reorder[order]]
+
+    items = [
+        {
+            "product_id": int(product_ids[i]),
+            "product_name": products[i][1],
+            "sku": products[i][2],
+            "current_stock": float(stock[i]),
+            "units_sold": float(units_sold[i]),
+            "daily_velocity": round(float(velocity[i]), 3),
+            "days_of_cover": None if np.isinf(days_of_cover[i]) else round(float(days_of_cover[i]), 1),
+            "reorder_point": round(float(reorder_point[i]), 2),
+            "suggested_order_qty": int(suggested[i]),
+            "needs_reorder": bool(needs_reorder[i]),
+        }
+        for i in order
+    ]
+
+    return {
+        "business_id": business_id,
+        "window_days": window_days,
+        "lead_time_days": lead_time_days,
+        "cover_days": cover_days,
+        "items": items,
+    }
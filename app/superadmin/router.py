@@ -1,16 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from passlib.hash import argon2
+from datetime import datetime
+from typing import Optional
 import os
+import shutil
+import uuid
 
 from app.users.schemas import SuperAdminUpdate 
 from app.database import get_db
 from app.users import models
 from app.users.schemas import SuperAdminCreate
 from app.users.auth import get_password_hash
+from app.users.permissions import role_required
+from app.users.schemas import UserDisplaySchema
+from app.business.models import Business
+from app.core.jobs import submit_job
+from app.jobs.schemas import JobOut
+from app.superadmin.tenant_transfer import export_business_stream, import_business
 
 router = APIRouter()
 
+TENANT_IMPORT_DIR = os.path.join(os.getcwd(), "tenant_imports")
+os.makedirs(TENANT_IMPORT_DIR, exist_ok=True)
+
 
 def verify_admin_license_password(plain_password: str) -> bool:
     stored_hash = os.getenv("ADMIN_LICENSE_PASSWORD_HASH")
@@ -123,3 +137,43 @@ def update_super_admin_password(
     db.refresh(super_admin)
 
     return {"message": f"Password for Super Admin '{data.username}' updated successfully"}
+
+
+# ---------------- TENANT EXPORT / IMPORT ----------------
+@router.get("/businesses/{business_id}/export")
+def export_business(
+    business_id: int,
+    db: Session = Depends(get_db),
+    current_user: UserDisplaySchema = Depends(role_required(["super_admin"], bypass_admin=False))
+):
+    """
+    Download one business as gzip-compressed NDJSON (every tenant table).
+    Streamed straight from a server-side cursor.
+    """
+    business = db.query(Business).filter(Business.id == business_id).first()
+    if not business:
+        raise HTTPException(status_code=404, detail="Business not found")
+
+    filename = f"business_{business_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson.gz"
+    return StreamingResponse(
+        export_business_stream(business_id),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/businesses/import", response_model=JobOut, status_code=202)
+def import_business_file(
+    file: UploadFile = File(...),
+    name: Optional[str] = Form(None, description="Name for the imported business"),
+    current_user: UserDisplaySchema = Depends(role_required(["super_admin"], bypass_admin=False))
+):
+    """
+    Upload an export from GET /businesses/{id}/export and load it as a
+    NEW business with fresh ids. Poll GET /jobs/{id}.
+    """
+    path = os.path.join(TENANT_IMPORT_DIR, f"{uuid.uuid4().hex}.ndjson.gz")
+    with open(path, "wb") as out:
+        shutil.copyfileobj(file.file, out, 1024 * 1024)
+
+    return submit_job("tenant_import", import_business, path, name, owner_id=current_user.id)
@@ -0,0 +1,404 @@
+"""
+Logical export / import of ONE business (tenant).
+
+Export format: gzip-compressed NDJSON, one record per line
+
+    {"type": "header", "format": "shopman-tenant", "version": 1, "schema_revision": ..., "business_id": ...}
+    {"type": "row", "table": "products", "row": {"id": 7, "name": "...", ...}}
+    ...
+
+Tables are written parents-first (EXPORT_TABLES order) and read back in
+that order. Rows are streamed with a server-side cursor on export and fed
+to COPY on import, so memory stays flat whatever the tenant size.
+
+Import remaps every generated key: each staging table gets a
+new_<key> column defaulting to nextval() of the real sequence. FK
+columns of later tables are rewritten through the resulting
+(old → new) maps. Usernames and the business name are globally unique;
+clashes get a suffix and are reported in the job result.
+License keys are not exported: issue one on the target server.
+"""
+import gzip
+import io
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterator, Optional
+
+from sqlalchemy import select, text
+
+from app.core.migrations import get_current_revisions, import_all_models
+from app.core.report_cache import bump_data_version
+from app.database import engine
+
+
+FORMAT_NAME = "shopman-tenant"
+FORMAT_VERSION = 1
+FETCH_SIZE = 2000
+
+# Parents first: every FK points at a table earlier in the list
+EXPORT_TABLES = [
+    "businesses",
+    "accounts",
+    "banks",
+    "vendors",
+    "categories",
+    "users",
+    "products",
+    "inventory",
+    "stock_movements",
+    "stock_snapshots",
+    "stock_adjustments",
+    "purchases",
+    "purchase_items",
+    "customers",
+    "sales",
+    "sale_items",
+    "payments",
+    "expenses",
+]
+
+# Child tables without business_id: scoped through their parent
+PARENT_SCOPE = {
+    "purchase_items": ("purchase_id", "purchases", "id"),
+    "sale_items": ("sale_invoice_no", "sales", "invoice_no"),
+}
+
+# Columns filled from a sequence in the target database
+GENERATED_KEYS = {
+    "sales": ["id", "invoice_no"],
+}
+
+
+def _generated_keys(table: str) -> list:
+    return GENERATED_KEYS.get(table, ["id"])
+
+
+# ============================================================
+# EXPORT
+# ============================================================
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _scope(tables, name: str, business_id: int):
+    table = tables[name]
+
+    if name == "businesses":
+        return table.c.id == business_id
+
+    if name in PARENT_SCOPE:
+        column, parent_name, parent_column = PARENT_SCOPE[name]
+        parent = tables[parent_name]
+        return table.c[column].in_(
+            select(parent.c[parent_column]).where(parent.c.business_id == business_id)
+        )
+
+    return table.c.business_id == business_id
+
+
+def _export_lines(business_id: int) -> Iterator[str]:
+    tables = import_all_models().tables
+
+    header = {
+        "type": "header",
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "schema_revision": sorted(get_current_revisions(engine)),
+        "business_id": business_id,
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+        "tables": EXPORT_TABLES,
+    }
+    yield json.dumps(header) + "\n"
+
+    with engine.connect() as conn:
+        # One snapshot for every table: rows written during the export
+        # never reference parents that were not exported
+        conn = conn.execution_options(
+            isolation_level="REPEATABLE READ",
+            postgresql_readonly=True,
+            stream_results=True,
+            yield_per=FETCH_SIZE,
+        )
+
+        for name in EXPORT_TABLES:
+            table = tables[name]
+            query = (
+                select(table)
+                .where(_scope(tables, name, business_id))
+                .order_by(*table.primary_key.columns)
+            )
+            for row in conn.execute(query):
+                yield json.dumps(
+                    {"type": "row", "table": name, "row": dict(row._mapping)},
+                    default=_json_default,
+                    separators=(",", ":"),
+                ) + "\n"
+
+
+def export_business_stream(business_id: int, chunk_size: int = 256 * 1024) -> Iterator[bytes]:
+    """Gzip-compressed NDJSON for one business, produced incrementally."""
+    buffer = io.BytesIO()
+    gz = gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=6)
+
+    for line in _export_lines(business_id):
+        gz.write(line.encode("utf-8"))
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    gz.close()
+    yield buffer.getvalue()
+
+
+# ============================================================
+# IMPORT
+# ============================================================
+
+def _csv_field(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        value = "true" if value else "false"
+    elif isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+class _RowReader:
+    """Peekable reader over the NDJSON records of an export file."""
+
+    def __init__(self, path: str):
+        self._file = io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8")
+        self._next = None
+        self.lines = 0
+
+    def header(self) -> dict:
+        record = json.loads(self._file.readline() or "{}")
+        if record.get("type") != "header" or record.get("format") != FORMAT_NAME:
+            raise ValueError("Not a ShopMan tenant export")
+        return record
+
+    def peek(self) -> Optional[dict]:
+        if self._next is None:
+            line = self._file.readline()
+            if not line:
+                return None
+            self._next = json.loads(line)
+            self.lines += 1
+        return self._next
+
+    def take(self) -> dict:
+        record = self.peek()
+        self._next = None
+        return record
+
+    def close(self):
+        self._file.close()
+
+
+class _CopySource:
+    """File-like object COPY reads from: CSV for one table's rows."""
+
+    def __init__(self, reader: _RowReader, table: str, columns: list):
+        self.reader = reader
+        self.table = table
+        self.columns = columns
+        self.count = 0
+        self._pending = ""
+
+    def _fill(self, size: int):
+        parts = [self._pending]
+        length = len(self._pending)
+        while length < size:
+            record = self.reader.peek()
+            if record is None or record.get("table") != self.table:
+                break
+            row = self.reader.take()["row"]
+            line = ",".join(_csv_field(row.get(c)) for c in self.columns) + "\n"
+            parts.append(line)
+            length += len(line)
+            self.count += 1
+        self._pending = "".join(parts)
+
+    def read(self, size: int = 65536) -> str:
+        size = size if size and size > 0 else 65536
+        self._fill(size)
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+
+def _sequence_for(cursor, table: str, column: str) -> str:
+    cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", (table, column))
+    sequence = cursor.fetchone()[0]
+    if not sequence:
+        raise RuntimeError(f"No sequence behind {table}.{column}")
+    return sequence
+
+
+def _import_table(cursor, reader: _RowReader, metadata_table, export_columns: list, before_insert=None):
+    """
+    COPY one table's records into a staging table, remap keys and FKs,
+    then INSERT into the real table. Returns (row count, before_insert result).
+    """
+    name = metadata_table.name
+    stage = f"imp_stage_{name}"
+    keys = _generated_keys(name)
+    columns = [c.name for c in metadata_table.columns if c.name in export_columns]
+
+    cursor.execute(f"CREATE TEMP TABLE {stage} (LIKE {name}) ON COMMIT DROP")
+    for key in keys:
+        sequence = _sequence_for(cursor, name, key)
+        cursor.execute(
+            f"ALTER TABLE {stage} ADD COLUMN new_{key} bigint DEFAULT nextval('{sequence}')"
+        )
+
+    source = _CopySource(reader, name, columns)
+    cursor.copy_expert(
+        f"COPY {stage} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+        source,
+    )
+
+    # Point FKs at the rows created earlier in this import
+    for fk in metadata_table.foreign_keys:
+        referred = fk.column.table.name
+        if referred not in EXPORT_TABLES or fk.parent.name not in columns:
+            continue
+        column = fk.parent.name
+        cursor.execute(
+            f"UPDATE {stage} s SET {column} = "
+            f"(SELECT m.new_id FROM imp_map_{referred}_{fk.column.name} m WHERE m.old_id = s.{column}) "
+            f"WHERE s.{column} IS NOT NULL"
+        )
+
+    for key in keys:
+        cursor.execute(
+            f"CREATE TEMP TABLE imp_map_{name}_{key} ON COMMIT DROP AS "
+            f"SELECT {key} AS old_id, new_{key} AS new_id FROM {stage}"
+        )
+        cursor.execute(f"CREATE INDEX ON imp_map_{name}_{key} (old_id)")
+
+    hooked = before_insert(cursor) if before_insert else None
+
+    select_list = ", ".join(f"new_{c}" if c in keys else c for c in columns)
+    cursor.execute(f"INSERT INTO {name} ({', '.join(columns)}) SELECT {select_list} FROM {stage}")
+    cursor.execute(f"DROP TABLE {stage}")
+
+    return source.count, hooked
+
+
+def _resolve_business_name(cursor, new_name: Optional[str]):
+    stage = "imp_stage_businesses"
+    if new_name:
+        cursor.execute(f"UPDATE {stage} SET name = %s", (new_name,))
+    cursor.execute(
+        f"UPDATE {stage} s SET name = s.name || ' (imported ' || to_char(now(), 'YYYY-MM-DD HH24:MI') || ')' "
+        f"WHERE EXISTS (SELECT 1 FROM businesses b WHERE b.name = s.name)"
+    )
+
+
+def _resolve_usernames(cursor) -> dict:
+    """Rename usernames that already exist on this server: name_<new business id>."""
+    cursor.execute(
+        "UPDATE imp_stage_users s SET username = s.username || '_' || s.business_id "
+        "WHERE EXISTS (SELECT 1 FROM users u WHERE u.username = s.username) "
+        "RETURNING s.username"
+    )
+    renamed = {}
+    for (username,) in cursor.fetchall():
+        original = username.rsplit("_", 1)[0]
+        renamed[original] = username
+    return renamed
+
+
+def import_business(job, path: str, new_name: Optional[str] = None) -> dict:
+    """
+    Load an export file as a NEW business. Runs as a background job;
+    the whole import is one transaction and `path` is deleted afterwards.
+    """
+    metadata = import_all_models()
+    reader = _RowReader(path)
+
+    try:
+        header = reader.header()
+        current = sorted(get_current_revisions(engine))
+        if header.get("schema_revision") != current:
+            raise ValueError(
+                f"Export schema {header.get('schema_revision')} does not match "
+                f"this database ({current}); migrate one side first"
+            )
+
+        first = reader.peek()
+        if first is None or first.get("table") != "businesses":
+            raise ValueError("Export does not start with the business record")
+
+        raw = engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            # stock_movements are copied from the file; the inventory
+            # trigger would add a second 'opening' movement per product
+            cursor.execute("SET LOCAL shopman.stock_ledger = 'off'")
+            counts = {}
+            renamed_users = {}
+            hooks = {
+                "businesses": lambda c: _resolve_business_name(c, new_name),
+                "users": _resolve_usernames,
+            }
+
+            for index, name in enumerate(EXPORT_TABLES):
+                record = reader.peek()
+                if record is None or record.get("table") != name:
+                    counts[name] = 0
+                    continue
+
+                export_columns = list(record["row"].keys())
+                job.update(
+                    progress=100 * index / len(EXPORT_TABLES),
+                    message=f"Importing {name}"
+                )
+
+                counts[name], hooked = _import_table(
+                    cursor, reader, metadata.tables[name], export_columns, hooks.get(name)
+                )
+                if name == "users":
+                    renamed_users = hooked
+
+            leftover = reader.peek()
+            if leftover is not None:
+                raise ValueError(f"Unexpected record for table {leftover.get('table')!r}; file order is wrong")
+
+            cursor.execute("SELECT new_id FROM imp_map_businesses_id")
+            new_business_id = cursor.fetchone()[0]
+
+            for old, new in renamed_users.items():
+                cursor.execute(
+                    "UPDATE businesses SET owner_username = %s WHERE id = %s AND owner_username = %s",
+                    (new, new_business_id, old),
+                )
+
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+    finally:
+        reader.close()
+        os.remove(path)
+
+    bump_data_version(new_business_id)
+
+    return {
+        "business_id": new_business_id,
+        "source_business_id": header.get("business_id"),
+        "rows": counts,
+        "renamed_users": renamed_users,
+    }
+
@@ -1,11 +1,20 @@
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import FileResponse
+from fastapi.responses import StreamingResponse
+import hashlib
+import json
 import os
+import re
+import shutil
 import subprocess
-from datetime import datetime, timedelta
+import tarfile
+from datetime import datetime
 from dotenv import load_dotenv
+from urllib.parse import urlparse
 
+from app.core.jobs import submit_job, find_running
+from app.jobs.schemas import JobOut
 from app.users.permissions import role_required
+from app.users.schemas import UserDisplaySchema
 
 # ---------------- LOAD ENV ----------------
 load_dotenv()
@@ -21,6 +30,19 @@ router = APIRouter(
 DB_URL = os.getenv("DB_URL3")
 PG_DUMP_PATH = os.getenv("PG_DUMP_PATH", "pg_dump")
 
+# Parallel workers (-j) and compression (-Z: 0-9, or e.g. "zstd:3" on PG16+)
+BACKUP_JOBS = int(os.getenv("BACKUP_JOBS", str(max(1, min(os.cpu_count() or 1, 8)))))
+BACKUP_COMPRESSION = os.getenv("BACKUP_COMPRESSION", "6")
+
+# Retention tiers: newest backup per day / ISO week / month is kept
+KEEP_DAILY = int(os.getenv("BACKUP_KEEP_DAILY", "7"))
+KEEP_WEEKLY = int(os.getenv("BACKUP_KEEP_WEEKLY", "4"))
+KEEP_MONTHLY = int(os.getenv("BACKUP_KEEP_MONTHLY", "12"))
+
+MANIFEST_NAME = "manifest.json"
+BACKUP_NAME_RE = re.compile(r"^database_backup_(\d{8}_\d{6})(\.backup)?$")
+TABLE_PROGRESS_RE = re.compile(r'(?:dumping contents of table|TABLE DATA(?: \S+)?)\s+("?[\w."]+"?)')
+
 if not DB_URL:
     raise ValueError("❌ DB_URL3 is not set")
 
@@ -31,129 +53,315 @@ if DB_URL.startswith("postgresql+psycopg2://"):
 elif DB_URL.startswith("postgres://"):
     DB_URL = DB_URL.replace("postgres://", "postgresql://", 1)
 
-print(f"🔍 Normalized DB_URL: {DB_URL}")
+print(f"🔍 Backup target: {DB_URL.split('@')[-1]}")
 
 # ---------------- BACKUP DIR ----------------
 BACKUP_DIR = os.path.join(os.getcwd(), "backup_files")
 os.makedirs(BACKUP_DIR, exist_ok=True)
 
-# ---------------- CLEANUP OLD BACKUPS ----------------
-def cleanup_old_backups(days: int = 7):
-    now = datetime.now()
 
-    for file in os.listdir(BACKUP_DIR):
-        path = os.path.join(BACKUP_DIR, file)
+def pg_env():
+    env = os.environ.copy()
 
-        if os.path.isfile(path):
-            file_time = datetime.fromtimestamp(os.path.getmtime(path))
+    # ✅ Enable SSL only for remote DB
+    if "localhost" not in DB_URL and "127.0.0.1" not in DB_URL:
+        env["PGSSLMODE"] = "require"
 
-            if now - file_time > timedelta(days=days):
-                try:
-                    os.remove(path)
-                    print(f"🗑️ Deleted old backup: {file}")
-                except Exception as e:
-                    print(f"⚠️ Failed to delete {file}: {str(e)}")
+    return env
 
-# ---------------- RUN BACKUP ----------------
-def run_auto_backup():
-    try:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"database_backup_{timestamp}.backup"
-        filepath = os.path.join(BACKUP_DIR, filename)
-
-        # ✅ Best practice: use full DB URL
-        pg_dump_cmd = [
-            PG_DUMP_PATH,
-            "--dbname", DB_URL,
-            "-F", "c",
-            "-f", filepath,
-            "--no-owner",
-            "--no-privileges"
-        ]
-
-        env = os.environ.copy()
-
-        # ✅ Enable SSL only for remote DB
-        if "localhost" not in DB_URL and "127.0.0.1" not in DB_URL:
-            env["PGSSLMODE"] = "require"
-            print("🔐 SSL enabled (remote DB)")
-        else:
-            print("⚠️ SSL disabled (local DB)")
-
-        print("🚀 Running pg_dump...")
-
-        result = subprocess.run(
-            pg_dump_cmd,
-            env=env,
-            capture_output=True,
-            text=True
+
+# ---------------- MANIFEST ----------------
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_manifest(backup_path: str) -> dict:
+    files = {}
+    for name in sorted(os.listdir(backup_path)):
+        path = os.path.join(backup_path, name)
+        if name == MANIFEST_NAME or not os.path.isfile(path):
+            continue
+        files[name] = {"size": os.path.getsize(path), "sha256": sha256_file(path)}
+
+    parsed = urlparse(DB_URL)
+    manifest = {
+        "format": "directory",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "database": parsed.path.lstrip("/"),
+        "host": parsed.hostname,
+        "jobs": BACKUP_JOBS,
+        "compression": BACKUP_COMPRESSION,
+        "total_size": sum(f["size"] for f in files.values()),
+        "files": files,
+    }
+
+    with open(os.path.join(backup_path, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def verify_manifest(backup_path: str) -> dict:
+    """Raise ValueError if any file is missing, extra or altered."""
+    manifest_path = os.path.join(backup_path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        raise ValueError("Backup has no manifest.json")
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    present = {
+        name for name in os.listdir(backup_path)
+        if name != MANIFEST_NAME and os.path.isfile(os.path.join(backup_path, name))
+    }
+    expected = set(manifest["files"])
+
+    if present != expected:
+        raise ValueError(
+            f"Backup file list does not match manifest "
+            f"(missing: {sorted(expected - present)}, unexpected: {sorted(present - expected)})"
         )
 
-        if result.returncode != 0:
-            print("❌ pg_dump failed")
-            print("STDOUT:", result.stdout)
-            print("STDERR:", result.stderr)
-            return None
+    for name, meta in manifest["files"].items():
+        if sha256_file(os.path.join(backup_path, name)) != meta["sha256"]:
+            raise ValueError(f"Checksum mismatch for {name}")
 
-        if not os.path.exists(filepath):
-            print("❌ Backup file not created")
-            return None
+    return manifest
 
-        cleanup_old_backups()
 
-        print(f"✅ Backup created: {filename}")
-        return filepath
+# ---------------- RETENTION TIERS ----------------
+def list_backups():
+    """[(timestamp, name)] newest first; includes legacy .backup files."""
+    backups = []
+    for name in os.listdir(BACKUP_DIR):
+        match = BACKUP_NAME_RE.match(name)
+        if match:
+            backups.append((datetime.strptime(match.group(1), "%Y%m%d_%H%M%S"), name))
+    backups.sort(reverse=True)
+    return backups
 
-    except FileNotFoundError:
-        print("❌ pg_dump not found. Install PostgreSQL client.")
-        return None
 
-    except Exception as e:
-        print(f"❌ Backup error: {str(e)}")
-        return None
+def backups_to_keep(backups) -> set:
+    keep = set()
+    tiers = (
+        (KEEP_DAILY, lambda ts: ts.date()),
+        (KEEP_WEEKLY, lambda ts: ts.isocalendar()[:2]),
+        (KEEP_MONTHLY, lambda ts: (ts.year, ts.month)),
+    )
+
+    for limit, bucket_of in tiers:
+        seen = []
+        for ts, name in backups:  # newest first → first hit per bucket wins
+            bucket = bucket_of(ts)
+            if bucket in seen:
+                continue
+            if len(seen) == limit:
+                break
+            seen.append(bucket)
+            keep.add(name)
+
+    return keep
 
-# ---------------- GET LATEST BACKUP ----------------
-def get_latest_backup():
-    try:
-        files = [
-            os.path.join(BACKUP_DIR, f)
-            for f in os.listdir(BACKUP_DIR)
-            if os.path.isfile(os.path.join(BACKUP_DIR, f))
-        ]
 
-        if not files:
-            return None
+def cleanup_old_backups():
+    backups = list_backups()
+    keep = backups_to_keep(backups)
 
-        files.sort(key=os.path.getmtime, reverse=True)
-        return files[0]
+    for _, name in backups:
+        if name in keep:
+            continue
 
-    except Exception as e:
-        print(f"❌ Error getting latest backup: {str(e)}")
-        return None
+        path = os.path.join(BACKUP_DIR, name)
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+            print(f"🗑️ Deleted old backup: {name}")
+        except Exception as e:
+            print(f"⚠️ Failed to delete {name}: {str(e)}")
 
-# ---------------- MANUAL BACKUP ENDPOINT ----------------
-@router.get("/db")
-def backup_database():
+
+# ---------------- RUN BACKUP ----------------
+def _count_tables() -> int:
+    from sqlalchemy import text
+    from app.database import engine
+
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT count(*) FROM pg_tables "
+            "WHERE schemaname NOT IN ('pg_catalog', 'information_schema')"
+        )).scalar() or 1
+
+
+def run_auto_backup(job=None) -> dict:
     """
-    Trigger a manual backup and download the latest file.
-    Only accessible by super admin.
+    Directory-format, parallel pg_dump into backup_files/database_backup_<ts>/
+    with a SHA-256 manifest. `job` (app.core.jobs.Job) receives progress.
     """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    name = f"database_backup_{timestamp}"
+    backup_path = os.path.join(BACKUP_DIR, name)
+
+    pg_dump_cmd = [
+        PG_DUMP_PATH,
+        "--dbname", DB_URL,
+        "-F", "d",
+        "-j", str(BACKUP_JOBS),
+        "-Z", BACKUP_COMPRESSION,
+        "-f", backup_path,
+        "--no-owner",
+        "--no-privileges",
+        "-v",
+    ]
+
+    total_tables = _count_tables()
+    dumped = set()
+    stderr_tail = []
+
+    print(f"🚀 Running pg_dump ({BACKUP_JOBS} jobs)...")
 
-    filepath = run_auto_backup()
+    try:
+        proc = subprocess.Popen(
+            pg_dump_cmd,
+            env=pg_env(),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+    except FileNotFoundError:
+        raise RuntimeError("pg_dump not found. Install PostgreSQL client.")
+
+    # -v reports each table's data as it is dumped (leader and workers
+    # word it differently, so count distinct table names)
+    for line in proc.stderr:
+        stderr_tail = (stderr_tail + [line.rstrip()])[-20:]
+        match = TABLE_PROGRESS_RE.search(line)
+        if match:
+            dumped.add(match.group(1).strip('"').split(".")[-1].strip('"'))
+            if job:
+                job.update(
+                    progress=min(90.0, 90.0 * len(dumped) / total_tables),
+                    message=f"Dumped {len(dumped)} of {total_tables} tables"
+                )
+
+    if proc.wait() != 0:
+        shutil.rmtree(backup_path, ignore_errors=True)
+        print("❌ pg_dump failed")
+        print("\n".join(stderr_tail))
+        raise RuntimeError("pg_dump failed: " + (stderr_tail[-1] if stderr_tail else "unknown error"))
+
+    if job:
+        job.update(progress=92.0, message="Writing checksums")
+    manifest = write_manifest(backup_path)
+
+    cleanup_old_backups()
+
+    print(f"✅ Backup created: {name}")
+    return {
+        "backup": name,
+        "size": manifest["total_size"],
+        "files": len(manifest["files"]),
+        "download_url": f"/backup/files/{name}",
+    }
+
+
+# ---------------- STREAMED DOWNLOAD ----------------
+def _tar_stream(backup_path: str, chunk_size: int = 1024 * 1024):
+    """
+    Uncompressed tar of a backup directory, generated on the fly
+    (data files are already compressed by pg_dump).
+    """
+    root = os.path.basename(backup_path)
 
-    # fallback if new backup failed
-    if not filepath:
-        print("⚠️ Using latest available backup...")
-        filepath = get_latest_backup()
+    for name in sorted(os.listdir(backup_path)):
+        path = os.path.join(backup_path, name)
+        if not os.path.isfile(path):
+            continue
 
-    if not filepath or not os.path.exists(filepath):
-        raise HTTPException(
-            status_code=500,
-            detail="Backup failed or file not found"
+        info = tarfile.TarInfo(f"{root}/{name}")
+        info.size = os.path.getsize(path)
+        info.mtime = int(os.path.getmtime(path))
+        yield info.tobuf(format=tarfile.PAX_FORMAT)
+
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                yield chunk
+
+        remainder = info.size % tarfile.BLOCKSIZE
+        if remainder:
+            yield tarfile.NUL * (tarfile.BLOCKSIZE - remainder)
+
+    yield tarfile.NUL * (tarfile.BLOCKSIZE * 2)
+
+
+def resolve_backup(name: str) -> str:
+    if not BACKUP_NAME_RE.match(name):
+        raise HTTPException(status_code=404, detail="Backup not found")
+
+    path = os.path.join(BACKUP_DIR, name)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Backup not found")
+    return path
+
+
+# ---------------- ENDPOINTS ----------------
+@router.post("/db", response_model=JobOut, status_code=202)
+def backup_database(
+    current_user: UserDisplaySchema = Depends(role_required(["super_admin"], bypass_admin=False))
+):
+    """
+    Start a backup in the background.
+    Poll GET /jobs/{id}; result.download_url points at the finished backup.
+    """
+    running = find_running("backup")
+    if running:
+        return running
+
+    return submit_job("backup", run_auto_backup, owner_id=current_user.id)
+
+
+@router.get("/files")
+def list_backup_files():
+    """Available backups, newest first."""
+    files = []
+    for ts, name in list_backups():
+        path = os.path.join(BACKUP_DIR, name)
+        manifest_path = os.path.join(path, MANIFEST_NAME)
+
+        size = os.path.getsize(path) if os.path.isfile(path) else None
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                size = json.load(f).get("total_size")
+
+        files.append({
+            "name": name,
+            "created_at": ts,
+            "format": "directory" if os.path.isdir(path) else "custom",
+            "size": size,
+            "download_url": f"/backup/files/{name}",
+        })
+    return files
+
+
+@router.get("/files/{name}")
+def download_backup(name: str):
+    path = resolve_backup(name)
+
+    # Legacy single-file custom-format backups
+    if os.path.isfile(path):
+        return StreamingResponse(
+            open(path, "rb"),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{name}"'}
         )
 
-    return FileResponse(
-        path=filepath,
-        filename=os.path.basename(filepath),
-        media_type="application/octet-stream"
+    return StreamingResponse(
+        _tar_stream(path),
+        media_type="application/x-tar",
+        headers={"Content-Disposition": f'attachment; filename="{name}.tar"'}
     )
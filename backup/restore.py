@@ -1,76 +1,183 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+import hashlib
 import os
+import re
+import shutil
 import subprocess
-from urllib.parse import urlparse
+import tarfile
+import uuid
+from typing import Optional
 
-router = APIRouter()
+from app.core.jobs import submit_job, find_running
+from app.core.report_cache import invalidate_all
+from app.jobs.schemas import JobOut
+from app.users.permissions import role_required
+from app.users.schemas import UserDisplaySchema
+from backup.backup import BACKUP_JOBS, DB_URL, MANIFEST_NAME, pg_env, verify_manifest
 
-DB_URL = os.getenv("DB_URL3")
+router = APIRouter(
+    dependencies=[Depends(role_required(["super_admin"], bypass_admin=False))]
+)
+
+PG_RESTORE_PATH = os.getenv("PG_RESTORE_PATH", "pg_restore")
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 RESTORE_DIR = os.path.join(os.getcwd(), "restore_files")
 os.makedirs(RESTORE_DIR, exist_ok=True)
 
+RESTORE_PROGRESS_RE = re.compile(r"(finished item|processing item|creating|processing data for table)")
+
+
+# ---------------- UPLOAD (chunked, straight to disk) ----------------
+def _save_upload(file: UploadFile, target_dir: str) -> tuple:
+    """
+    Stream the upload to disk and return (archive path, sha256 of upload).
+
+    - custom-format dump (starts with PGDMP)   → saved as-is
+    - tar of a directory-format backup           → extracted member by member
+    """
+    header = file.file.read(5)
+    file.file.seek(0)
+    digest = hashlib.sha256()
 
-@router.post("/restore/db")
-def restore_database(file: UploadFile = File(...)):
+    if header == b"PGDMP":
+        path = os.path.join(target_dir, "database.backup")
+        with open(path, "wb") as out:
+            for chunk in iter(lambda: file.file.read(UPLOAD_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+        return path, digest.hexdigest()
 
-    if not DB_URL or not DB_URL.startswith("postgresql://"):
+    class _HashingReader:
+        def read(self, size=-1):
+            chunk = file.file.read(size)
+            digest.update(chunk)
+            return chunk
+
+    root = None
+    try:
+        with tarfile.open(fileobj=_HashingReader(), mode="r|") as tar:
+            for member in tar:
+                name = os.path.normpath(member.name)
+                if not member.isfile() or name.startswith(("..", "/")) or os.path.isabs(name):
+                    raise HTTPException(status_code=400, detail=f"Unsafe entry in archive: {member.name}")
+
+                parts = name.split(os.sep)
+                root = root or (parts[0] if len(parts) > 1 else "")
+                destination = os.path.join(target_dir, name)
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+
+                source = tar.extractfile(member)
+                with open(destination, "wb") as out:
+                    shutil.copyfileobj(source, out, UPLOAD_CHUNK_SIZE)
+    except tarfile.TarError:
         raise HTTPException(
             status_code=400,
-            detail="Only PostgreSQL restores are supported."
+            detail="Upload is neither a pg_dump custom-format file nor a backup .tar"
         )
 
-    try:
+    return os.path.join(target_dir, root or ""), digest.hexdigest()
 
-        filepath = os.path.join(RESTORE_DIR, file.filename)
 
-        with open(filepath, "wb") as f:
-            f.write(file.file.read())
+# ---------------- RESTORE JOB ----------------
+def _count_toc_entries(archive: str) -> int:
+    result = subprocess.run(
+        [PG_RESTORE_PATH, "-l", archive],
+        env=pg_env(),
+        capture_output=True,
+        text=True,
+    )
+    entries = [line for line in result.stdout.splitlines() if line and not line.startswith(";")]
+    return max(len(entries), 1)
 
-        parsed = urlparse(DB_URL)
 
-        db_user = parsed.username or "postgres"
-        db_password = parsed.password or ""
-        db_host = parsed.hostname or "localhost"
-        db_port = str(parsed.port or 5432)
-        db_name = parsed.path.lstrip("/")
+def run_restore(job, archive: str, work_dir: str) -> dict:
+    try:
+        if os.path.isdir(archive):
+            job.update(progress=2, message="Verifying checksums")
+            verify_manifest(archive)
+
+        total = _count_toc_entries(archive)
 
+        # Directory and custom formats both support parallel restore
         pg_restore_cmd = [
-            "pg_restore",
-            "-U", db_user,
-            "-h", db_host,
-            "-p", db_port,
-            "-d", db_name,
+            PG_RESTORE_PATH,
+            "--dbname", DB_URL,
+            "-j", str(BACKUP_JOBS),
             "--clean",
             "--if-exists",
             "--no-owner",
             "--no-privileges",
             "-v",
-            filepath
+            archive,
         ]
 
-        env = os.environ.copy()
-        env["PGPASSWORD"] = db_password
-
-        result = subprocess.run(
-            pg_restore_cmd,
-            env=env,
-            capture_output=True,
-            text=True
-        )
+        print(f"🚀 Running pg_restore ({BACKUP_JOBS} jobs)...")
 
-        if result.returncode not in (0, 1):
-            raise HTTPException(
-                status_code=500,
-                detail="Database restore failed."
+        try:
+            proc = subprocess.Popen(
+                pg_restore_cmd,
+                env=pg_env(),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
             )
+        except FileNotFoundError:
+            raise RuntimeError("pg_restore not found. Install PostgreSQL client.")
+
+        done = 0
+        errors = []
+        for line in proc.stderr:
+            if RESTORE_PROGRESS_RE.search(line):
+                done += 1
+                job.update(
+                    progress=5 + 90 * min(done, total) / total,
+                    message=line.split(":", 1)[-1].strip()[:200]
+                )
+            elif "error" in line.lower():
+                errors.append(line.strip())
+
+        # pg_restore exits 1 for ignorable errors (e.g. --clean on missing objects)
+        if proc.wait() not in (0, 1):
+            raise RuntimeError("Database restore failed: " + (errors[-1] if errors else "unknown error"))
+
+        # every cached report now describes the old data
+        invalidate_all()
+
+        return {"items": total, "warnings": len(errors)}
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+# ---------------- ENDPOINT ----------------
+@router.post("/restore/db", response_model=JobOut, status_code=202)
+def restore_database(
+    file: UploadFile = File(...),
+    sha256: Optional[str] = Form(None, description="Expected SHA-256 of the uploaded file"),
+    current_user: UserDisplaySchema = Depends(role_required(["super_admin"], bypass_admin=False))
+):
+    """
+    Upload a backup (.tar from /backup/files or a legacy .backup file)
+    and restore it in the background. Poll GET /jobs/{id}.
+    """
+    if find_running("restore") or find_running("backup"):
+        raise HTTPException(status_code=409, detail="A backup or restore is already running")
+
+    work_dir = os.path.join(RESTORE_DIR, uuid.uuid4().hex)
+    os.makedirs(work_dir)
+
+    try:
+        archive, uploaded_sha256 = _save_upload(file, work_dir)
+
+        if sha256 and sha256.lower() != uploaded_sha256:
+            raise HTTPException(status_code=400, detail="Uploaded file checksum does not match")
 
-        # delete backup file after restore
-        os.remove(filepath)
+        if os.path.isdir(archive) and not os.path.exists(os.path.join(archive, MANIFEST_NAME)):
+            raise HTTPException(status_code=400, detail="Backup archive has no manifest.json")
 
-        return {
-            "detail": f"Database '{db_name}' restored successfully from {file.filename}"
-        }
+    except Exception:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return submit_job("restore", run_restore, archive, work_dir, owner_id=current_user.id)
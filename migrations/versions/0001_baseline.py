@@ -0,0 +1,412 @@
+"""baseline schema (as built by Base.metadata.create_all)
+
+Databases created before Alembic already have these tables:
+app/scripts/migrate.py stamps them with this revision instead of running it.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ─── businesses ───────────────────────────────────────────────
+    op.create_table(
+        "businesses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("address", sa.String(), nullable=True),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("owner_username", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_businesses_id", "businesses", ["id"])
+    op.create_index("ix_businesses_name", "businesses", ["name"], unique=True)
+    op.create_index("ix_businesses_owner_username", "businesses", ["owner_username"])
+
+    # ─── users ────────────────────────────────────────────────────
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(50), nullable=False, unique=True),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("roles", sa.String(200), nullable=True),
+        sa.Column(
+            "business_id", sa.Integer(),
+            sa.ForeignKey("businesses.id", ondelete="SET NULL"), nullable=True
+        ),
+    )
+    op.create_index("ix_users_business_id", "users", ["business_id"])
+    op.create_index("idx_user_business_username", "users", ["business_id", "username"])
+
+    # ─── license_keys ─────────────────────────────────────────────
+    op.create_table(
+        "license_keys",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expiration_date", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "business_id", sa.Integer(),
+            sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False
+        ),
+    )
+    op.create_index("ix_license_keys_id", "license_keys", ["id"])
+    op.create_index("ix_license_keys_key", "license_keys", ["key"], unique=True)
+    op.create_index("ix_license_keys_is_active", "license_keys", ["is_active"])
+    op.create_index("ix_license_keys_expiration_date", "license_keys", ["expiration_date"])
+    op.create_index("ix_license_keys_business_id", "license_keys", ["business_id"])
+    op.create_index(
+        "idx_license_business_active_exp", "license_keys",
+        ["business_id", "is_active", "expiration_date"]
+    )
+
+    # ─── banks ────────────────────────────────────────────────────
+    op.create_table(
+        "banks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column(
+            "business_id", sa.Integer(),
+            sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.UniqueConstraint("name", "business_id", name="uix_bank_name_business"),
+    )
+    op.create_index("ix_banks_id", "banks", ["id"])
+    op.create_index("ix_banks_business_id", "banks", ["business_id"])
+    op.create_index("idx_bank_business_name", "banks", ["business_id", "name"])
+
+    # ─── accounts ─────────────────────────────────────────────────
+    op.create_table(
+        "accounts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("business_id", sa.Integer(), sa.ForeignKey("businesses.id"), nullable=True),
+    )
+
+    # ─── vendors ──────────────────────────────────────────────────
+    op.create_table(
+        "vendors",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("business_name", sa.String(), nullable=False),
+        sa.Column("address", sa.String(), nullable=False),
+        sa.Column("phone_number", sa.String(), nullable=False),
+        sa.Column(
+            "business_id", sa.Integer(),
+            sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.UniqueConstraint("business_id", "business_name", name="uq_vendor_business_name"),
+    )
+    op.create_index("ix_vendors_id", "vendors", ["id"])
+    op.create_index("ix_vendors_business_id", "vendors", ["business_id"])
+    op.create_index("idx_vendor_business_phone", "vendors", ["business_id", "phone_number"])
+
+    # ─── categories ───────────────────────────────────────────────
+    op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("description", sa.String(255), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("business_id", sa.Integer(), sa.ForeignKey("businesses.id"), nullable=False),
+        sa.UniqueConstraint("name", "business_id", name="uq_category_name_business"),
+    )
+    op.create_index("ix_categories_id", "categories", ["id"])
+    op.create_index("ix_categories_business_id", "categories", ["business_id"])
+
+    # ─── products ─────────────────────────────────────────────────
+    op.create_table(
+        "products",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column(
+            "business_id", sa.Integer(),
+            sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column(
+            "category_id", sa.Integer(),
+            sa.ForeignKey("categories.id", ondelete="RESTRICT"), nullable=False
+        ),
+        sa.Column("sku", sa.String(), nullable=True),
+        sa.Column("barcode", sa.String(), nullable=True),
+        sa.Column("type", sa.String(), nullable=True),
+        sa.Column("cost_price", sa.Float(), nullable=True),
+        sa.Column("selling_price", sa.Float(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint(
+            "name", "category_id", "business_id", name="uq_product_name_category_business"
+        ),
+        sa.UniqueConstraint("sku", "business_id", name="uq_product_sku_business"),
+        sa.UniqueConstraint("barcode", "business_id", name="uq_product_barcode_business"),
+    )
+    op.create_index("ix_products_id", "products", ["id"])
+    op.create_index("ix_products_business_id", "products", ["business_id"])
+    op.create_index("ix_products_category_id", "products", ["category_id"])
+    op.create_index("ix_products_sku", "products", ["sku"])
+    op.create_index("ix_products_barcode", "products", ["barcode"])
+    op.create_index("ix_products_is_active", "products", ["is_active"])
+    op.create_index("idx_product_business_active", "products", ["business_id", "is_active"])
+    op.create_index("idx_product_business_category", "products", ["business_id", "category_id"])
+    op.create_index("idx_product_business_name", "products", ["business_id", "name"])
+    op.create_index("idx_product_barcode_business", "products", ["barcode", "business_id"])
+
+    # ─── inventory ────────────────────────────────────────────────
+    op.create_table(
+        "inventory",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "business_id", sa.Integer(),
+            sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), nullable=False),
+        sa.Column("opening_stock", sa.Float(), nullable=True),
+        sa.Column("quantity_in", sa.Float(), nullable=True),
+        sa.Column("quantity_out", sa.Float(), nullable=True),
+        sa.Column("adjustment_total", sa.Float(), nullable=True),
+        sa.Column("current_stock", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_inventory_id", "inventory", ["id"])
+    op.create_index("ix_inventory_business_id", "inventory", ["business_id"])
+    op.create_index("idx_inventory_business_product", "inventory", ["business_id", "product_id"])
+    op.create_index("idx_inventory_business_created", "inventory", ["business_id", "created_at"])
+    op.create_index("idx_inventory_business_updated", "inventory", ["business_id", "updated_at"])
+
+    # ─── stock_adjustments ────────────────────────────────────────
+    op.create_table(
+        "stock_adjustments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "business_id", sa.Integer(),
+            sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column(
+            "product_id", sa.Integer(),
+            sa.ForeignKey("products.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column(
+            "inventory_id", sa.Integer(),
+            sa.ForeignKey("inventory.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("reason", sa.String(), nullable=False),
+        sa.Column(
+            "adjusted_by", sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+        ),
+        sa.Column("adjusted_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_stock_adjustments_id", "stock_adjustments", ["id"])
+    op.create_index("ix_stock_adjustments_business_id", "stock_adjustments", ["business_id"])
+    op.create_index(
+        "idx_stock_adjustment_business_product", "stock_adjustments",
+        ["business_id", "product_id"]
+    )
+
+    # ─── purchases ────────────────────────────────────────────────
+    op.create_table(
+        "purchases",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("invoice_no", sa.String(50), nullable=False),
+        sa.Column(
+            "business_id", sa.Integer(),
+            sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column(
+            "vendor_id", sa.Integer(),
+            sa.ForeignKey("vendors.id", ondelete="SET NULL"), nullable=True
+        ),
+        sa.Column("purchase_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("total_cost", sa.Float(), nullable=True),
+    )
+    op.create_index("ix_purchases_id", "purchases", ["id"])
+    op.create_index("ix_purchases_invoice_no", "purchases", ["invoice_no"])
+    op.create_index("ix_purchases_business_id", "purchases", ["business_id"])
+    op.create_index("idx_purchase_business_invoice", "purchases", ["business_id", "invoice_no"])
+    op.create_index("idx_purchase_business_created", "purchases", ["business_id", "created_at"])
+    op.create_index("idx_purchase_business_vendor", "purchases", ["business_id", "vendor_id"])
+
+    # ─── purchase_items ───────────────────────────────────────────
+    op.create_table(
+        "purchase_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "purchase_id", sa.Integer(),
+            sa.ForeignKey("purchases.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column(
+            "product_id", sa.Integer(),
+            sa.ForeignKey("products.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("cost_price", sa.Float(), nullable=False),
+        sa.Column("total_cost", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_purchase_items_id", "purchase_items", ["id"])
+    op.create_index(
+        "idx_purchase_item_purchase_product", "purchase_items", ["purchase_id", "product_id"]
+    )
+    op.create_index(
+        "idx_purchase_item_business_created", "purchase_items", ["purchase_id", "created_at"]
+    )
+
+    # ─── sales ────────────────────────────────────────────────────
+    op.create_table(
+        "sales",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "business_id", sa.Integer(),
+            sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column(
+            "invoice_no", sa.Integer(), sa.Identity(start=1, increment=1), nullable=False
+        ),
+        sa.Column("invoice_date", sa.DateTime(), nullable=False),
+        sa.Column("ref_no", sa.String(), nullable=True),
+        sa.Column("customer_name", sa.String(), nullable=True),
+        sa.Column("customer_phone", sa.String(), nullable=True),
+        sa.Column("total_amount", sa.Float(), nullable=True),
+        sa.Column(
+            "sold_by", sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+        ),
+        sa.Column(
+            "sold_at", sa.DateTime(timezone=True),
+            server_default=sa.func.now(), nullable=False
+        ),
+    )
+    op.create_index("ix_sales_id", "sales", ["id"])
+    op.create_index("ix_sales_business_id", "sales", ["business_id"])
+    op.create_index("ix_sales_invoice_no", "sales", ["invoice_no"], unique=True)
+    op.create_index("idx_sales_business_soldat", "sales", ["business_id", "sold_at"])
+    op.create_index("idx_sales_business_invoice", "sales", ["business_id", "invoice_no"])
+    op.create_index("idx_sales_business_date", "sales", ["business_id", "invoice_date"])
+
+    # ─── sale_items ───────────────────────────────────────────────
+    op.create_table(
+        "sale_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "sale_invoice_no", sa.Integer(),
+            sa.ForeignKey("sales.invoice_no", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column(
+            "product_id", sa.Integer(),
+            sa.ForeignKey("products.id", ondelete="SET NULL"), nullable=True
+        ),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("selling_price", sa.Float(), nullable=False),
+        sa.Column("cost_price", sa.Float(), nullable=False),
+        sa.Column("total_amount", sa.Float(), nullable=False),
+        sa.Column("gross_amount", sa.Float(), nullable=False),
+        sa.Column("discount", sa.Float(), nullable=True),
+        sa.Column("net_amount", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_sale_items_id", "sale_items", ["id"])
+    op.create_index("ix_sale_items_sale_invoice_no", "sale_items", ["sale_invoice_no"])
+    op.create_index(
+        "idx_saleitems_invoice_product", "sale_items", ["sale_invoice_no", "product_id"]
+    )
+
+    # ─── payments ─────────────────────────────────────────────────
+    op.create_table(
+        "payments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "business_id", sa.Integer(),
+            sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column(
+            "sale_invoice_no", sa.Integer(),
+            sa.ForeignKey("sales.invoice_no", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("amount_paid", sa.Float(), nullable=False),
+        sa.Column("discount_allowed", sa.Float(), nullable=True),
+        sa.Column("payment_method", sa.String(), nullable=False),
+        sa.Column(
+            "bank_id", sa.Integer(),
+            sa.ForeignKey("banks.id", ondelete="SET NULL"), nullable=True
+        ),
+        sa.Column("reference_no", sa.String(), nullable=True),
+        sa.Column("balance_due", sa.Float(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("payment_date", sa.DateTime(), nullable=True),
+        sa.Column(
+            "created_by", sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+        ),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_payments_id", "payments", ["id"])
+    op.create_index("ix_payments_business_id", "payments", ["business_id"])
+    op.create_index("ix_payments_payment_date", "payments", ["payment_date"])
+    op.create_index(
+        "idx_payment_business_invoice", "payments", ["business_id", "sale_invoice_no"]
+    )
+    op.create_index("idx_payment_business_date", "payments", ["business_id", "payment_date"])
+    op.create_index("idx_payment_business_status", "payments", ["business_id", "status"])
+
+    # ─── expenses ─────────────────────────────────────────────────
+    op.create_table(
+        "expenses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("ref_no", sa.String(100), nullable=False),
+        sa.Column(
+            "business_id", sa.Integer(),
+            sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("vendor_id", sa.Integer(), sa.ForeignKey("vendors.id"), nullable=False),
+        sa.Column(
+            "bank_id", sa.Integer(),
+            sa.ForeignKey("banks.id", ondelete="SET NULL"), nullable=True
+        ),
+        sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("account_type", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("payment_method", sa.String(), nullable=False),
+        sa.Column("expense_date", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.UniqueConstraint("business_id", "ref_no", name="uq_expense_business_ref"),
+    )
+    op.create_index("ix_expenses_id", "expenses", ["id"])
+    op.create_index("ix_expenses_business_id", "expenses", ["business_id"])
+    op.create_index("idx_expense_business_date", "expenses", ["business_id", "expense_date"])
+
+
+def downgrade():
+    for table in (
+        "expenses",
+        "payments",
+        "sale_items",
+        "sales",
+        "purchase_items",
+        "purchases",
+        "stock_adjustments",
+        "inventory",
+        "products",
+        "categories",
+        "vendors",
+        "accounts",
+        "banks",
+        "license_keys",
+        "users",
+        "businesses",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,116 @@
+"""performance indexes
+
+- sale_items.product_id, purchase_items.product_id, payments.sale_invoice_no
+  (FK columns that reports and cascades join on)
+- inventory(business_id, product_id) becomes UNIQUE; duplicate rows are
+  merged first so the index can be built
+- expenses(business_id, is_active, expense_date)
+- stock_adjustments(business_id, adjusted_at)
+- sales(business_id, sold_by, sold_at) for the staff report
+
+Indexes are built CONCURRENTLY so a live shop keeps selling while this runs.
+
+Revision ID: 0002_performance_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+revision = "0002_performance_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+NEW_INDEXES = [
+    ("idx_saleitems_product", "sale_items", "product_id"),
+    ("idx_purchase_item_product", "purchase_items", "product_id, created_at"),
+    ("idx_payment_invoice", "payments", "sale_invoice_no"),
+    ("idx_expense_business_active_date", "expenses", "business_id, is_active, expense_date"),
+    ("idx_stock_adjustment_business_adjusted", "stock_adjustments", "business_id, adjusted_at"),
+    ("idx_sales_business_staff_soldat", "sales", "business_id, sold_by, sold_at"),
+]
+
+
+def _merge_duplicate_inventory():
+    """
+    Older code paths could create a second inventory row for the same product.
+    Fold counters into the oldest row, repoint adjustments, drop the rest.
+    """
+    op.execute("""
+        WITH dup AS (
+            SELECT business_id, product_id, MIN(id) AS keep_id
+            FROM inventory
+            GROUP BY business_id, product_id
+            HAVING COUNT(*) > 1
+        ),
+        totals AS (
+            SELECT d.keep_id,
+                   SUM(COALESCE(i.quantity_in, 0)) AS quantity_in,
+                   SUM(COALESCE(i.quantity_out, 0)) AS quantity_out,
+                   SUM(COALESCE(i.adjustment_total, 0)) AS adjustment_total,
+                   SUM(COALESCE(i.opening_stock, 0)) AS opening_stock,
+                   MAX(i.updated_at) AS updated_at
+            FROM inventory i
+            JOIN dup d ON d.business_id = i.business_id AND d.product_id = i.product_id
+            GROUP BY d.keep_id
+        )
+        UPDATE inventory inv
+        SET quantity_in = t.quantity_in,
+            quantity_out = t.quantity_out,
+            adjustment_total = t.adjustment_total,
+            opening_stock = t.opening_stock,
+            current_stock = t.opening_stock + t.quantity_in
+                            - t.quantity_out + t.adjustment_total,
+            updated_at = t.updated_at
+        FROM totals t
+        WHERE inv.id = t.keep_id
+    """)
+
+    op.execute("""
+        UPDATE stock_adjustments sa
+        SET inventory_id = k.keep_id
+        FROM (
+            SELECT i.id, MIN(i.id) OVER (PARTITION BY i.business_id, i.product_id) AS keep_id
+            FROM inventory i
+        ) k
+        WHERE sa.inventory_id = k.id AND k.id <> k.keep_id
+    """)
+
+    op.execute("""
+        DELETE FROM inventory i
+        USING inventory keep
+        WHERE keep.business_id = i.business_id
+          AND keep.product_id = i.product_id
+          AND keep.id < i.id
+    """)
+
+
+def upgrade():
+    _merge_duplicate_inventory()
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_inventory_business_product "
+            "ON inventory (business_id, product_id)"
+        )
+        # The unique index covers every lookup the old one served
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_inventory_business_product")
+
+        for name, table, columns in NEW_INDEXES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _table, _columns in reversed(NEW_INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_inventory_business_product "
+            "ON inventory (business_id, product_id)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS uq_inventory_business_product")
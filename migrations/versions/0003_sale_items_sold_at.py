@@ -0,0 +1,42 @@
+"""sale_items.sold_at (copy of the sale header timestamp)
+
+Needed so sale_items can be range-partitioned on the same key as sales
+(see app/core/partitions.py). Existing rows are backfilled from sales.
+
+Revision ID: 0003_sale_items_sold_at
+Revises: 0002_performance_indexes
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_sale_items_sold_at"
+down_revision = "0002_performance_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "sale_items",
+        sa.Column(
+            "sold_at", sa.DateTime(timezone=True),
+            server_default=sa.func.now(), nullable=True
+        ),
+    )
+
+    op.execute("""
+        UPDATE sale_items si
+        SET sold_at = s.sold_at
+        FROM sales s
+        WHERE s.invoice_no = si.sale_invoice_no
+    """)
+
+    op.alter_column("sale_items", "sold_at", nullable=False)
+    op.create_index("idx_saleitems_soldat", "sale_items", ["sold_at"])
+
+
+def downgrade():
+    op.drop_index("idx_saleitems_soldat", table_name="sale_items")
+    op.drop_column("sale_items", "sold_at")
@@ -0,0 +1,46 @@
+"""sale_idempotency_keys (POST /sales/batch replay protection)
+
+Revision ID: 0004_sale_idempotency_keys
+Revises: 0003_sale_items_sold_at
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0004_sale_idempotency_keys"
+down_revision = "0003_sale_items_sold_at"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "sale_idempotency_keys",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "business_id", sa.Integer(),
+            sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("idempotency_key", sa.String(length=100), nullable=False),
+        sa.Column("sale_invoice_no", sa.Integer(), nullable=False),
+        sa.Column("result", postgresql.JSONB(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True),
+            server_default=sa.func.now(), nullable=False
+        ),
+        sa.UniqueConstraint(
+            "business_id", "idempotency_key", name="uq_sale_idempotency_business_key"
+        ),
+    )
+    op.create_index(
+        "ix_sale_idempotency_keys_sale_invoice_no",
+        "sale_idempotency_keys",
+        ["sale_invoice_no"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_sale_idempotency_keys_sale_invoice_no", table_name="sale_idempotency_keys")
+    op.drop_table("sale_idempotency_keys")
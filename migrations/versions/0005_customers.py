@@ -0,0 +1,157 @@
+"""customers table, sales/payments.customer_id and backfill
+
+Historical sales are grouped per business by normalised phone (or, when
+there is no phone, by normalised name). The most recent spelling of the
+name becomes the customer's display name. Walk-in sales stay unlinked.
+The same rules live in app/customers/service.py.
+
+Revision ID: 0005_customers
+Revises: 0004_sale_idempotency_keys
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_customers"
+down_revision = "0004_sale_idempotency_keys"
+branch_labels = None
+depends_on = None
+
+
+# Keep in step with normalize_name / normalize_phone / match_key
+NORMALIZED_NAME_SQL = "lower(regexp_replace(btrim(s.customer_name), '\\s+', ' ', 'g'))"
+DIGITS_SQL = "regexp_replace(coalesce(s.customer_phone, ''), '\\D', '', 'g')"
+NORMALIZED_PHONE_SQL = f"""
+    NULLIF(
+        CASE
+            WHEN {DIGITS_SQL} ~ '^234[0-9]{{10}}$' THEN '0' || substr({DIGITS_SQL}, 4)
+            ELSE {DIGITS_SQL}
+        END,
+        ''
+    )
+"""
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_table(
+        "customers",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "business_id", sa.Integer(),
+            sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("normalized_name", sa.String(), nullable=False),
+        sa.Column("normalized_phone", sa.String(), nullable=True),
+        sa.Column("match_key", sa.String(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True),
+            server_default=sa.func.now(), nullable=False
+        ),
+        sa.UniqueConstraint("business_id", "match_key", name="uq_customer_business_match_key"),
+    )
+    op.create_index("ix_customers_id", "customers", ["id"])
+    op.create_index("ix_customers_business_id", "customers", ["business_id"])
+    op.create_index("idx_customer_business_phone", "customers", ["business_id", "normalized_phone"])
+    op.create_index(
+        "idx_customer_name_trgm",
+        "customers",
+        ["normalized_name"],
+        postgresql_using="gin",
+        postgresql_ops={"normalized_name": "gin_trgm_ops"},
+    )
+
+    op.add_column(
+        "sales",
+        sa.Column(
+            "customer_id", sa.Integer(),
+            sa.ForeignKey("customers.id", ondelete="SET NULL"), nullable=True
+        ),
+    )
+    op.add_column(
+        "payments",
+        sa.Column(
+            "customer_id", sa.Integer(),
+            sa.ForeignKey("customers.id", ondelete="SET NULL"), nullable=True
+        ),
+    )
+
+    # ---- Backfill: one customer per (business, match key) ----
+    op.execute(f"""
+        CREATE TEMP TABLE customer_backfill ON COMMIT DROP AS
+        SELECT
+            k.invoice_no,
+            k.business_id,
+            k.sold_at,
+            k.name,
+            k.phone,
+            k.normalized_name,
+            k.normalized_phone,
+            CASE
+                WHEN k.normalized_phone IS NOT NULL THEN 'p:' || k.normalized_phone
+                ELSE 'n:' || k.normalized_name
+            END AS match_key
+        FROM (
+            SELECT
+                s.invoice_no,
+                s.business_id,
+                s.sold_at,
+                btrim(s.customer_name) AS name,
+                NULLIF(btrim(s.customer_phone), '') AS phone,
+                {NORMALIZED_NAME_SQL} AS normalized_name,
+                {NORMALIZED_PHONE_SQL} AS normalized_phone
+            FROM sales s
+            WHERE btrim(coalesce(s.customer_name, '')) <> ''
+        ) k
+        WHERE k.normalized_name NOT IN ('walk-in', 'walk in', 'walkin')
+    """)
+
+    op.execute("""
+        INSERT INTO customers (business_id, name, phone, normalized_name, normalized_phone, match_key)
+        SELECT DISTINCT ON (business_id, match_key)
+            business_id, name, phone, normalized_name, normalized_phone, match_key
+        FROM customer_backfill
+        ORDER BY business_id, match_key, sold_at DESC
+    """)
+
+    op.execute("""
+        UPDATE sales s
+        SET customer_id = c.id
+        FROM customer_backfill b
+        JOIN customers c
+          ON c.business_id = b.business_id
+         AND c.match_key = b.match_key
+        WHERE s.invoice_no = b.invoice_no
+    """)
+
+    op.execute("""
+        UPDATE payments p
+        SET customer_id = s.customer_id
+        FROM sales s
+        WHERE s.invoice_no = p.sale_invoice_no
+          AND s.customer_id IS NOT NULL
+    """)
+    op.execute("DROP TABLE customer_backfill")
+
+    op.create_index(
+        "idx_sales_business_customer_soldat",
+        "sales",
+        ["business_id", "customer_id", "sold_at"],
+    )
+    op.create_index("idx_payment_customer", "payments", ["customer_id"])
+
+
+def downgrade():
+    op.drop_index("idx_payment_customer", table_name="payments")
+    op.drop_index("idx_sales_business_customer_soldat", table_name="sales")
+    op.drop_column("payments", "customer_id")
+    op.drop_column("sales", "customer_id")
+    op.drop_index("idx_customer_name_trgm", table_name="customers")
+    op.drop_index("idx_customer_business_phone", table_name="customers")
+    op.drop_index("ix_customers_business_id", table_name="customers")
+    op.drop_index("ix_customers_id", table_name="customers")
+    op.drop_table("customers")
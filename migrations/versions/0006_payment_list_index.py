@@ -0,0 +1,30 @@
+"""payments (business_id, created_at, id) index for keyset pagination
+
+GET /payments/ lists newest first and pages with a (created_at, id)
+cursor; this index serves both the ORDER BY and the cursor predicate.
+Built CONCURRENTLY like 0002.
+
+Revision ID: 0006_payment_list_index
+Revises: 0005_customers
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+revision = "0006_payment_list_index"
+down_revision = "0005_customers"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_payment_business_created "
+            "ON payments (business_id, created_at, id)"
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_payment_business_created")
@@ -0,0 +1,30 @@
+"""partial index expenses (business_id, expense_date) WHERE is_active
+
+Every expense listing, report and cash-up reads active rows only, by
+business and date range; the partial index skips voided rows entirely.
+Built CONCURRENTLY like 0002.
+
+Revision ID: 0007_expense_active_date_index
+Revises: 0006_payment_list_index
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+revision = "0007_expense_active_date_index"
+down_revision = "0006_payment_list_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_expense_active_business_date "
+            "ON expenses (business_id, expense_date) WHERE is_active"
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_expense_active_business_date")
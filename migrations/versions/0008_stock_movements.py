@@ -0,0 +1,118 @@
+"""stock_movements ledger, stock_snapshots and the inventory trigger
+
+Every change of inventory.current_stock is appended to stock_movements by
+an AFTER INSERT OR UPDATE trigger, whichever code path made it (ORM
+counters, bulk upserts, stock-take). Setting shopman.stock_ledger = 'off'
+for a transaction skips it; tenant import does that because it copies the
+exported movements itself.
+
+Existing stock becomes one 'opening' movement per product, dated now:
+point-in-time queries start at this migration.
+
+Revision ID: 0008_stock_movements
+Revises: 0007_expense_active_date_index
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008_stock_movements"
+down_revision = "0007_expense_active_date_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "stock_movements",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column(
+            "business_id", sa.Integer(),
+            sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column(
+            "product_id", sa.Integer(),
+            sa.ForeignKey("products.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("movement_type", sa.String(20), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("stock_after", sa.Float(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True),
+            server_default=sa.func.now(), nullable=False
+        ),
+    )
+    op.create_index("idx_stock_movement_business_created", "stock_movements", ["business_id", "created_at"])
+    op.create_index("idx_stock_movement_product_created", "stock_movements", ["product_id", "created_at"])
+
+    op.create_table(
+        "stock_snapshots",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column(
+            "business_id", sa.Integer(),
+            sa.ForeignKey("businesses.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column(
+            "product_id", sa.Integer(),
+            sa.ForeignKey("products.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("snapshot_date", sa.Date(), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.UniqueConstraint(
+            "business_id", "snapshot_date", "product_id",
+            name="uq_stock_snapshot_business_date_product"
+        ),
+    )
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION record_stock_movement() RETURNS trigger AS $$
+        DECLARE
+            delta double precision;
+            kind text;
+        BEGIN
+            IF current_setting('shopman.stock_ledger', true) = 'off' THEN
+                RETURN NULL;
+            END IF;
+
+            IF TG_OP = 'INSERT' THEN
+                delta := COALESCE(NEW.current_stock, 0);
+                kind := 'opening';
+            ELSE
+                delta := COALESCE(NEW.current_stock, 0) - COALESCE(OLD.current_stock, 0);
+                kind := CASE
+                    WHEN NEW.adjustment_total IS DISTINCT FROM OLD.adjustment_total THEN 'adjustment'
+                    WHEN NEW.quantity_out IS DISTINCT FROM OLD.quantity_out THEN 'out'
+                    WHEN NEW.quantity_in IS DISTINCT FROM OLD.quantity_in THEN 'in'
+                    WHEN NEW.opening_stock IS DISTINCT FROM OLD.opening_stock THEN 'opening'
+                    ELSE 'correction'
+                END;
+            END IF;
+
+            IF delta <> 0 THEN
+                INSERT INTO stock_movements (business_id, product_id, movement_type, quantity, stock_after, created_at)
+                VALUES (NEW.business_id, NEW.product_id, kind, delta, COALESCE(NEW.current_stock, 0), now());
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER trg_inventory_stock_movement "
+        "AFTER INSERT OR UPDATE OF current_stock ON inventory "
+        "FOR EACH ROW EXECUTE FUNCTION record_stock_movement()"
+    )
+
+    op.execute("""
+        INSERT INTO stock_movements (business_id, product_id, movement_type, quantity, stock_after, created_at)
+        SELECT business_id, product_id, 'opening', current_stock, current_stock, now()
+        FROM inventory
+        WHERE COALESCE(current_stock, 0) <> 0
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS trg_inventory_stock_movement ON inventory")
+    op.execute("DROP FUNCTION IF EXISTS record_stock_movement()")
+    op.drop_table("stock_snapshots")
+    op.drop_table("stock_movements")
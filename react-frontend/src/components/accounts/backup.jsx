@@ -6,9 +6,30 @@ const Backup = () => {
   const [loading, setLoading] = useState(false);
   const [message, setMessage] = useState("");
   const [visible, setVisible] = useState(true);
+  const [progress, setProgress] = useState(0);
 
   if (!visible) return null;
 
+  const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+  // Backups run as a background job: start it, poll, then download
+  const waitForJob = async (axios, jobId) => {
+    while (true) {
+      const res = await axios.get(`/jobs/${jobId}`);
+      const job = res.data;
+
+      if (job.status === "succeeded") return job;
+      if (job.status === "failed") {
+        const failure = new Error(job.error || "Backup failed.");
+        failure.jobFailed = true;
+        throw failure;
+      }
+
+      setProgress(Math.round(job.progress));
+      await sleep(2000);
+    }
+  };
+
   const handleBackup = async () => {
     const confirmBackup = window.confirm(
       "Do you want to proceed with the database backup?\n\nThis may take a few seconds."
@@ -18,11 +39,17 @@ const Backup = () => {
 
     setLoading(true);
     setMessage("");
+    setProgress(0);
 
     try {
       const axios = axiosWithAuth(); // IMPORTANT: create once per request
 
-      const res = await axios.get("/backup/db", {
+      const started = await axios.post("/backup/db");
+      const job = await waitForJob(axios, started.data.id);
+
+      setMessage("Backup completed. Downloading...");
+
+      const res = await axios.get(job.result.download_url, {
         responseType: "blob",
       });
 
@@ -30,7 +57,7 @@ const Backup = () => {
       // Extract filename safely
       // -----------------------------
       const contentDisposition = res.headers?.["content-disposition"];
-      let filename = "database_backup.backup";
+      let filename = `${job.result.backup}.tar`;
 
       if (contentDisposition) {
         const match = contentDisposition.match(/filename="?([^"]+)"?/);
@@ -64,7 +91,9 @@ const Backup = () => {
       // -----------------------------
       let errorMessage = "Backup failed. Please try again.";
 
-      if (!error?.response) {
+      if (error?.jobFailed) {
+        errorMessage = error.message;
+      } else if (!error?.response) {
         errorMessage =
           "Network/CORS error: backend not reachable or blocked by browser.";
       } else if (error.response?.status === 403) {
@@ -105,7 +134,7 @@ const Backup = () => {
             onClick={handleBackup}
             disabled={loading}
           >
-            {loading ? "Backing up..." : "Start Backup"}
+            {loading ? `Backing up... ${progress}%` : "Start Backup"}
           </button>
 
           {message && <p className="backup-message">{message}</p>}
@@ -407,8 +407,21 @@ const UserManagement = () => {
       });
 
       if (!res.ok) throw new Error("Delete failed");
-      showPopup("Business deleted");
       setBusinessToDelete(null);
+      showPopup("Deleting business...");
+
+      // Deletion runs as a background job: poll until it finishes
+      let job = await res.json();
+      while (job.status === "queued" || job.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        const jobRes = await fetch(`${API_BASE_URL}/jobs/${job.id}`, {
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        job = await jobRes.json();
+      }
+
+      if (job.status === "failed") throw new Error(job.error || "Delete failed");
+      showPopup("Business deleted");
       fetchBusinesses();
     } catch (err) {
       showPopup("Failed to delete business");
@@ -6,9 +6,28 @@ const Backup = () => {
   const [loading, setLoading] = useState(false);
   const [message, setMessage] = useState("");
   const [visible, setVisible] = useState(true);
+  const [progress, setProgress] = useState(0);
 
   if (!visible) return null;
 
+  const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+  // Backups run as a background job: start it, poll, then download
+  const waitForJob = async (jobId) => {
+    while (true) {
+      const res = await axiosWithAuth().get(`/jobs/${jobId}`);
+      const job = res.data;
+
+      if (job.status === "succeeded") return job;
+      if (job.status === "failed") {
+        throw new Error(job.error || "Backup failed.");
+      }
+
+      setProgress(Math.round(job.progress));
+      await sleep(2000);
+    }
+  };
+
   const handleBackup = async () => {
     const confirmBackup = window.confirm(
       "Do you want to proceed with the database backup?\n\nThis may take a few seconds."
@@ -18,9 +37,15 @@ const Backup = () => {
 
     setLoading(true);
     setMessage("");
+    setProgress(0);
 
     try {
-      const res = await axiosWithAuth().get("/backup/db", {
+      const started = await axiosWithAuth().post("/backup/db");
+      const job = await waitForJob(started.data.id);
+
+      setMessage("Backup completed. Downloading...");
+
+      const res = await axiosWithAuth().get(job.result.download_url, {
         responseType: "blob",
       });
 
@@ -29,12 +54,12 @@ const Backup = () => {
       let filename;
 
       if (contentDisposition) {
-        const match = contentDisposition.match(/filename="?(.+)"?/);
+        const match = contentDisposition.match(/filename="?([^"]+)"?/);
         filename = match?.[1];
       }
 
       if (!filename) {
-        filename = "database_backup.backup";
+        filename = `${job.result.backup}.tar`;
       }
 
       // Create download
@@ -53,7 +78,9 @@ const Backup = () => {
       console.error(error);
 
       setMessage(
-        error?.response?.data?.detail || "Backup failed. insufficient permission."
+        error?.response?.data?.detail ||
+          error?.message ||
+          "Backup failed. insufficient permission."
       );
     } finally {
       setLoading(false);
@@ -85,7 +112,7 @@ const Backup = () => {
             onClick={handleBackup}
             disabled={loading}
           >
-            {loading ? "Backing up..." : "Start Backup"}
+            {loading ? `Backing up... ${progress}%` : "Start Backup"}
           </button>
 
           {message && <p className="backup-message">{message}</p>}
@@ -1,4 +1,4 @@
-import React, { useEffect, useState, useCallback, useMemo } from "react";
+import React, { useEffect, useState, useCallback } from "react";
 import axiosWithAuth from "../../utils/axiosWithAuth";
 import "./ListSalesPayment.css";
 
@@ -6,7 +6,10 @@ const ListSalesPayment = () => {
   const today = new Date().toISOString().split("T")[0];
 
   const [payments, setPayments] = useState([]);
+  const [summary, setSummary] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState("");
 
   const [startDate, setStartDate] = useState(today);
@@ -42,29 +45,55 @@ const ListSalesPayment = () => {
   }, []);
 
   /* ================= Fetch Payments ================= */
+  const buildParams = useCallback(() => {
+    const params = {};
+    if (startDate) params.start_date = startDate;
+    if (endDate) params.end_date = endDate;
+    if (status) params.status = status;
+    if (bankId) params.bank_id = bankId;
+    if (invoiceNo) params.invoice_no = invoiceNo.trim();
+    if (paymentMethod) params.payment_method = paymentMethod;   // ✅ NEW
+    return params;
+  }, [startDate, endDate, status, bankId, invoiceNo, paymentMethod]);
+
   const fetchPayments = useCallback(async () => {
     setLoading(true);
     setError("");
 
     try {
-      const params = {};
-      if (startDate) params.start_date = startDate;
-      if (endDate) params.end_date = endDate;
-      if (status) params.status = status;
-      if (bankId) params.bank_id = bankId;
-      if (invoiceNo) params.invoice_no = invoiceNo;
-      if (paymentMethod) params.payment_method = paymentMethod;   // ✅ NEW
-
-      const res = await axiosWithAuth().get("/payments/", { params });
-      setPayments(res.data || []);
+      const res = await axiosWithAuth().get("/payments/", { params: buildParams() });
+      setPayments(res.data?.payments || []);
+      setSummary(res.data?.summary || null);
+      setNextCursor(res.data?.next_cursor || null);
     } catch (err) {
       console.error(err);
-      setError("Failed to load payments");
+      setError(err.response?.data?.detail || "Failed to load payments");
       setPayments([]);
+      setSummary(null);
+      setNextCursor(null);
     } finally {
       setLoading(false);
     }
-  }, [startDate, endDate, status, bankId, invoiceNo, paymentMethod]);
+  }, [buildParams]);
+
+  /* ================= Next Page (cursor) ================= */
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+
+    try {
+      const res = await axiosWithAuth().get("/payments/", {
+        params: { ...buildParams(), cursor: nextCursor },
+      });
+      setPayments((prev) => [...prev, ...(res.data?.payments || [])]);
+      setNextCursor(res.data?.next_cursor || null);
+    } catch (err) {
+      console.error(err);
+      setError("Failed to load more payments");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
 
   useEffect(() => {
@@ -130,37 +159,12 @@ const ListSalesPayment = () => {
     }
   };
 
-  /* ================= Totals ================= */
-  const totals = useMemo(() => {
-    const invoiceMap = new Map();
-    let totalPaid = 0;
-
-    payments.forEach((p) => {
-      const invoiceNo = p.invoice_no ?? p.sale_invoice_no;
-      totalPaid += p.amount_paid || 0;
-
-      if (!invoiceMap.has(invoiceNo)) {
-        invoiceMap.set(invoiceNo, {
-          total_amount: p.total_amount || 0,
-          balance_due: p.balance_due || 0,
-        });
-      }
-    });
-
-    let totalSales = 0;
-    let totalBalance = 0;
-
-    invoiceMap.forEach((inv) => {
-      totalSales += inv.total_amount;
-      totalBalance += inv.balance_due;
-    });
-
-    return {
-      total_sales: totalSales,
-      amount_paid: totalPaid,
-      balance_due: totalBalance,
-    };
-  }, [payments]);
+  /* ================= Totals (server-side, whole filter) ================= */
+  const totals = {
+    total_sales: summary?.total_sales || 0,
+    amount_paid: summary?.amount_paid || 0,
+    balance_due: summary?.balance_due || 0,
+  };
 
   const formatAmount = (amount) =>
     Number(amount || 0).toLocaleString("en-US");
@@ -298,7 +302,7 @@ const ListSalesPayment = () => {
           {payments.length > 0 && (
             <tfoot>
               <tr className="sales-total-row">
-                <td colSpan="4">TOTAL</td>
+                <td colSpan="4">TOTAL ({summary?.count ?? payments.length} payments)</td>
                 <td style={{ fontWeight: "bold", fontSize: "1rem" }}>
                   {formatAmount(totals.total_sales)}
                 </td>
@@ -315,6 +319,15 @@ const ListSalesPayment = () => {
         </table>
       )}
 
+      {!loading && nextCursor && (
+        <div className="sales-payment-status-text">
+          Showing {payments.length} of {summary?.count ?? payments.length}{" "}
+          <button onClick={loadMore} disabled={loadingMore}>
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
+
       {/* ================= Edit Modal ================= */}
       {editModalVisible && currentPayment && (
         <div className="modal-overlay">
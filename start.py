@@ -66,6 +66,11 @@ def update_env_server_ip(ip_address):
 
 
 
+def run_migrations():
+    """Upgrade the database schema before the API starts"""
+    command = [PYTHON_EXECUTABLE, "-m", "app.scripts.migrate"]
+    subprocess.run(command, cwd=BASE_DIR, check=True)
+
 def start_backend():
     """Start FastAPI backend which serves both API and React UI"""
     command = [
@@ -88,6 +93,9 @@ if __name__ == "__main__":
         ip = get_preferred_ip()
         update_env_server_ip(ip)
 
+        print("[INFO] Applying database migrations...")
+        run_migrations()
+
         print("[INFO] Starting backend...")
         backend_proc = start_backend()
         open_browser(ip)